@@ -0,0 +1,140 @@
+"""
+Hit rate, wrong-answer rate and lookup latency of the semantic answer cache.
+
+A stream of opening questions is replayed through the cache: each query is
+looked up, and on a miss its intent is stored as the answer. Queries in the
+same group below are paraphrases of one intent, so a hit returning another
+group's answer is a wrong answer. Without --live the queries are embedded
+with hashed word and character n-grams, which only catches close rewordings;
+with --live they are embedded with text-embedding-ada-002 like in the server:
+
+    python benchmark_answer_cache.py --live
+
+The lookup latency is measured separately on a full cache of random vectors.
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import argparse
+import statistics
+import numpy as np
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from services.answer_cache import SemanticAnswerCache, CacheLookup
+from agents.routing_classifier import extract_features
+
+THRESHOLDS = [0.85, 0.9, 0.93, 0.95, 0.97]
+
+# Paraphrases of the same question, one group per intent
+QUERY_GROUPS = [
+    ["How much does the AI MEng program cost?", "What is the tuition for the AI MEng?",
+     "how much is tuition for the ai meng program", "AI MEng tuition cost?"],
+    ["Can the AI MEng be completed online?", "Is the AI MEng program available online?",
+     "can i do the ai meng online"],
+    ["How long is the AI MEng program?", "What is the duration of the AI MEng?",
+     "how many semesters is the AI MEng"],
+    ["What are the admission requirements for the MIDS program?", "MIDS admission requirements",
+     "what do I need to apply to MIDS?"],
+    ["Who teaches AIPI 540?", "Who is the instructor for AIPI 540?", "who teaches aipi 540"],
+    ["What courses are offered in computer science?", "Which computer science courses are offered?",
+     "list the compsci courses"],
+    ["Where is Perkins Library?", "where is perkins library located", "How do I get to Perkins Library?"],
+    ["Which dining halls are open late on West Campus?", "What dining is open late on west campus?",
+     "late night food on West Campus"],
+    ["Where is the Wilson gym?", "where is wilson recreation center", "Wilson gym location"],
+    ["What events are happening at Duke this weekend?", "What's going on at Duke this weekend?",
+     "duke events this weekend"],
+    ["Are there any AI talks this month?", "AI talks happening this month at Duke",
+     "any artificial intelligence talks this month?"],
+    ["What career outcomes do AI MEng graduates have?", "Where do AI MEng graduates work?",
+     "ai meng career outcomes"],
+]
+
+def hashed_embedding(text: str, dimension: int = 1536) -> np.ndarray:
+    """Offline stand-in for the OpenAI embedding: hashed n-gram counts"""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for feature in extract_features(text):
+        vector[zlib.crc32(feature.encode("utf-8")) % dimension] += 1
+    return vector
+
+def openai_embedding():
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return lambda text: client.embeddings.create(input=[text], model="text-embedding-ada-002").data[0].embedding
+
+def replay(embeddings, stream, threshold: float):
+    """Replay (group, query) pairs through a fresh cache; returns (hits, wrong answers)"""
+    embedded = {}
+    cache = SemanticAnswerCache(embed=lambda text: embedded[text], threshold=threshold)
+    hits = wrong = 0
+    for group, query in stream:
+        embedded[query] = embeddings[query]
+        lookup = cache._search(cache._unit(embedded[query]))
+        if lookup.hit:
+            hits += 1
+            wrong += lookup.answer != str(group)
+        else:
+            cache.store(lookup, query, str(group), ["curriculum"])
+    return hits, wrong
+
+def lookup_latency(size: int, dimension: int = 1536, lookups: int = 200) -> float:
+    """Median milliseconds per lookup on a full cache"""
+    rng = np.random.default_rng(0)
+    cache = SemanticAnswerCache(embed=lambda text: None, max_size=size)
+    for i in range(size):
+        cache.store(CacheLookup(cache._unit(rng.standard_normal(dimension))), str(i), str(i), ["curriculum"])
+    timings = []
+    for _ in range(lookups):
+        vector = cache._unit(rng.standard_normal(dimension))
+        start = time.perf_counter()
+        cache._search(vector)
+        timings.append(time.perf_counter() - start)
+    return 1000 * statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the semantic answer cache")
+    parser.add_argument("--live", action="store_true", help="embed queries with text-embedding-ada-002")
+    parser.add_argument("--repeats", type=int, default=3, help="times each query appears in the stream")
+    parser.add_argument("--answer-ms", type=float, default=4000, help="latency of an uncached answer")
+    parser.add_argument("--embed-ms", type=float, default=150, help="latency of the lookup embedding")
+    args = parser.parse_args()
+
+    stream = [(group, query) for group, queries in enumerate(QUERY_GROUPS) for query in queries] * args.repeats
+    random.Random(0).shuffle(stream)
+
+    embed = openai_embedding() if args.live else hashed_embedding
+    embeddings = {query: embed(query) for _, query in set(stream)}
+    # Repeated identical queries always hit; the paraphrases are what the threshold decides
+    first_time = len({query for _, query in stream})
+    print(f"{len(stream)} queries, {len(QUERY_GROUPS)} intents, {first_time} distinct phrasings "
+          f"({'ada-002' if args.live else 'hashed n-gram'} embeddings)")
+
+    print(f"\n{'threshold':>9}{'hit rate':>10}{'wrong':>8}{'mean ms/query':>15}")
+    for threshold in THRESHOLDS:
+        hits, wrong = replay(embeddings, stream, threshold)
+        hit_rate = hits / len(stream)
+        # Every query pays for the embedding; hits skip the agents
+        mean_ms = args.embed_ms + (1 - hit_rate) * args.answer_ms
+        print(f"{threshold:>9.2f}{hit_rate:>10.1%}{wrong:>8}{mean_ms:>15.0f}")
+    print(f"{'no cache':>9}{'':>10}{'':>8}{args.answer_ms:>15.0f}")
+
+    print(f"\n{'entries':>8}{'ms/lookup':>11}")
+    for size in [1000, 5000, 20000]:
+        print(f"{size:>8}{lookup_latency(size):>11.2f}")
+
+if __name__ == "__main__":
+    main()
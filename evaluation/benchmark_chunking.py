@@ -0,0 +1,115 @@
+"""
+Chunking throughput of the ingestion tokenizer: per-paragraph encoding against batch tokenization.
+
+A synthetic corpus of scraped-page-sized documents (50 MB by default, with
+some long unbroken paragraphs that have to be cut into token windows) is
+chunked four ways:
+
+- as ingestion did before: one encode call per paragraph, windows decoded back
+  to text, and every chunk encoded again to count its tokens for the batcher;
+- chunk_text on each document, which keeps the paragraph token counts;
+- Chunker.chunk_many, tokenizing a batch of documents with tiktoken's batch API;
+- Chunker.chunk_many over a process pool.
+
+    python benchmark_chunking.py --mb 50 --max-tokens 400 --processes 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+import tiktoken
+from services.chunking import Chunker, chunk_text
+
+WORDS = ("duke engineering master program students course tuition career artificial intelligence data "
+         "science application deadline faculty research graduate curriculum project internship credit "
+         "semester machine learning python team industry capstone seminar elective core requirement").split()
+
+def build_corpus(rng, megabytes: float, document_kb: float, long_share: float):
+    documents, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        paragraphs = []
+        while sum(len(p) for p in paragraphs) < document_kb * 1024:
+            paragraphs.append(" ".join(rng.choices(WORDS, k=rng.randrange(20, 200))) + ".")
+        if rng.random() < long_share:
+            # A page with a run of text without blank lines, like a scraped table or listing
+            paragraphs.insert(rng.randrange(len(paragraphs) + 1), " ".join(rng.choices(WORDS, k=3000)))
+        document = "\n\n".join(paragraphs)
+        documents.append(document)
+        size += len(document)
+    return documents
+
+def legacy_chunks(text, max_tokens, tokenizer):
+    """split_by_paragraphs as it was, plus the batcher's recount of every chunk"""
+    chunks, current, current_count = [], [], 0
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = tokenizer.encode(paragraph)
+        if len(tokens) > max_tokens:
+            for i in range(0, len(tokens), max_tokens):
+                chunks.append(tokenizer.decode(tokens[i:i + max_tokens]))
+            continue
+        if current_count + len(tokens) > max_tokens and current:
+            chunks.append("\n\n".join(current))
+            current, current_count = [], 0
+        current.append(paragraph)
+        current_count += len(tokens)
+    if current:
+        chunks.append("\n\n".join(current))
+    return [(chunk, len(tokenizer.encode(chunk))) for chunk in chunks]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-paragraph and batch tokenization for chunking")
+    parser.add_argument("--mb", type=float, default=50, help="corpus size")
+    parser.add_argument("--document-kb", type=float, default=12, help="average document size")
+    parser.add_argument("--long-share", type=float, default=0.05, help="share of documents with an oversized paragraph")
+    parser.add_argument("--max-tokens", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=4, help="threads of the batch tokenizer")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch", type=int, default=64, help="documents per chunk_many call")
+    args = parser.parse_args()
+
+    documents = build_corpus(random.Random(0), args.mb, args.document_kb, args.long_share)
+    megabytes = sum(len(document) for document in documents) / (1024 * 1024)
+    tokenizer = tiktoken.get_encoding("cl100k_base")
+    print(f"{len(documents)} documents, {megabytes:.1f} MB, chunks of at most {args.max_tokens} tokens\n")
+
+    def batches(chunker):
+        results = []
+        for start in range(0, len(documents), args.batch):
+            results += chunker.chunk_many(documents[start:start + args.batch])
+        return results
+
+    thread_chunker = Chunker(args.max_tokens, threads=args.threads, encoding=tokenizer)
+    process_chunker = Chunker(args.max_tokens, processes=args.processes, encoding=tokenizer)
+    process_chunker.chunk_many(documents[:args.processes])  # start the workers outside the timing
+    runs = {
+        "per paragraph (before)": lambda: [legacy_chunks(document, args.max_tokens, tokenizer) for document in documents],
+        "chunk_text": lambda: [chunk_text(document, args.max_tokens, tokenizer) for document in documents],
+        f"batch, {args.threads} threads": lambda: batches(thread_chunker),
+        f"batch, {args.processes} processes": lambda: batches(process_chunker),
+    }
+
+    print(f"{'chunker':<26}{'seconds':>9}{'MB/s':>8}{'docs/s':>9}{'chunks':>9}")
+    for name, run in runs.items():
+        start = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - start
+        chunks = sum(len(result) for result in results)
+        print(f"{name:<26}{elapsed:>9.2f}{megabytes / elapsed:>8.1f}{len(documents) / elapsed:>9.0f}{chunks:>9}")
+        if not name.startswith("per paragraph"):
+            # group_by_document relies on chunk_index following the page
+            assert all(chunk.char_start < following.char_start
+                       for result in results for chunk, following in zip(result, result[1:])), \
+                f"{name}: chunks out of page order"
+    process_chunker.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Prompt tokens and answer latency of the curriculum agent, full documents vs packed chunks.
+
+Every query of the evaluation set (eval_data.py) is answered twice by the
+curriculum agent's retrieval-augmented path: once pasting the top-3 matches
+in full, as before chunking, and once with the top RETRIEVAL_TOP_K chunks
+packed into CONTEXT_TOKEN_BUDGET tokens. Run it against an index built by the
+current ingestion (chunk vectors) to see the effect of both changes; against
+an index of whole-file vectors, the packed run truncates the files to the
+budget instead. Needs the OpenAI and Pinecone credentials in .env (or
+VECTOR_BACKEND=local):
+
+    python benchmark_context_packing.py --budget 3000 --top-k 12
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from agents.curriculum_agent import CurriculumAgent
+from agents.token_budget_memory import count_tokens
+from eval_data import test_data
+
+def run(agent, queries):
+    """Answer each query; returns (prompt tokens, retrieval seconds, answer seconds) per query"""
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        contexts = agent.retrieve_context(query)
+        retrieved = time.perf_counter()
+        prompt = agent.build_prompt(query, contexts)
+        agent.llm.predict(prompt)
+        answered = time.perf_counter()
+        results.append((count_tokens(prompt), retrieved - start, answered - retrieved))
+        print(f"  {results[-1][0]:>6} tokens {results[-1][2]:5.1f} s  {query}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-document and packed-chunk prompts")
+    parser.add_argument("--budget", type=int, default=3000, help="context token budget of the packed run")
+    parser.add_argument("--top-k", type=int, default=12, help="chunks retrieved in the packed run")
+    parser.add_argument("--limit", type=int, default=len(test_data), help="number of queries to run")
+    args = parser.parse_args()
+    queries = [item["query"] for item in test_data[:args.limit]]
+
+    agent = CurriculumAgent()
+    runs = {}
+    print("full documents (top 3)")
+    agent.retrieval_top_k, agent.context_token_budget = 3, 0
+    runs["full documents"] = run(agent, queries)
+
+    print(f"packed chunks (top {args.top_k}, {args.budget} tokens)")
+    agent.retrieval_top_k, agent.context_token_budget = args.top_k, args.budget
+    runs["packed chunks"] = run(agent, queries)
+
+    print(f"\n{'context':<16}{'mean tokens':>12}{'max tokens':>12}{'retrieval ms':>14}{'answer p50 s':>14}{'answer mean s':>15}")
+    for name, results in runs.items():
+        tokens = [t for t, _, _ in results]
+        retrieval = [r for _, r, _ in results]
+        answer = [a for _, _, a in results]
+        print(f"{name:<16}{statistics.mean(tokens):>12.0f}{max(tokens):>12}{1000 * statistics.mean(retrieval):>14.0f}"
+              f"{statistics.median(answer):>14.2f}{statistics.mean(answer):>15.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Peak memory of a crawl: buffering every page until discovery ends against streaming pages to disk.
+
+A large fixture site (the benchmark_crawler.py site, with long pages) is
+served from disk on a local port, and crawled in a fresh process per mode:
+
+- buffered, as crawl_domain did before: every (url, title, content) is kept
+  until the crawl is over, then the pages are written;
+- streaming, with webscraping_service.crawl: each page is written (atomically,
+  with the page index) as soon as it is extracted.
+
+Each process reports its peak RSS (ru_maxrss) before and after the crawl.
+
+    python benchmark_crawl_memory.py --pages 2000 --paragraphs 60
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+import services.webscraping_service as webscraping_service
+from services.crawler import Crawler
+from services.page_writer import PageWriter
+from benchmark_crawler import build_site, serve
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def crawl_child(mode: str, start_url: str, output_folder: str):
+    """Crawl in this process and print the peak RSS as JSON"""
+    webscraping_service.LINK_DOMAIN = "127.0.0.1"
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        if mode == "buffered":
+            crawler = Crawler(webscraping_service.scrape_website, workers=16, host_concurrency=16, host_delay=0)
+            pages = list(crawler.crawl([start_url]))
+            writer = PageWriter(output_folder, webscraping_service.get_program_name, webscraping_service.page_filename)
+            for url, title, content in pages:
+                writer.write(url, title, content)
+            writer.close()
+            saved = len(pages)
+        else:
+            saved_pages = webscraping_service.crawl([start_url], output_folder, workers=16, host_concurrency=16, host_delay=0)
+            saved = sum(len(urls) for programs in saved_pages.values() for urls in programs.values())
+    finally:
+        sys.stdout = stdout
+    print(json.dumps({"baseline": baseline, "peak": peak_rss_mb(), "pages": saved,
+                      "seconds": time.perf_counter() - start}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak RSS of buffered and streaming crawls")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--programs", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=60, help="paragraphs per page (about 500 characters each)")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "START_URL", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        crawl_child(*args.child)
+        return
+
+    temporary = tempfile.TemporaryDirectory()
+    site = os.path.join(temporary.name, "site")
+    build_site(site, random.Random(0), args.pages, args.programs, args.paragraphs)
+    server = serve(site, 0)
+    start_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    site_mb = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(site) for f in files) / (1024 * 1024)
+    print(f"{args.pages} pages, {site_mb:.0f} MB of HTML\n")
+
+    print(f"{'crawl':<12}{'pages':>7}{'seconds':>9}{'RSS before':>12}{'peak RSS':>10}")
+    for mode in ("buffered", "streaming"):
+        output = os.path.join(temporary.name, mode)
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, start_url, output],
+                                capture_output=True, text=True, check=True)
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{mode:<12}{stats['pages']:>7}{stats['seconds']:>9.1f}{stats['baseline']:>10.0f}MB{stats['peak']:>8.0f}MB")
+    server.shutdown()
+    temporary.cleanup()
+
+if __name__ == "__main__":
+    main()
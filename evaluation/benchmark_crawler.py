@@ -0,0 +1,205 @@
+"""
+Crawl throughput: one page at a time with a fixed sleep against the concurrent crawler.
+
+A fixture site is written to a temporary folder and served from disk by
+local HTTP servers, one per host (each on its own port), with a fixed
+latency per response like a remote site. Each host has program folders of
+linked pages. Discovery (fetching, parsing and following links) is run:
+
+- as crawl_domain did before: one start URL after the other, one requests.get
+  (and connection) per page, and a fixed sleep after each page;
+- with the Crawler at each worker count, all start URLs sharing one frontier,
+  with per-host concurrency and delay limits and pooled keep-alive sessions.
+
+A last run recrawls the site with a warm crawl cache, where every page
+answers 304 Not Modified and its cached links feed the frontier.
+
+Link discovery is then timed alone on a synthetic crawl of --frontier-urls
+URLs: checking every link against the deque the loop used to keep, and
+adding it to the set-backed Frontier.
+
+    python benchmark_crawler.py --hosts 3 --pages 150 --latency 0.05 --sleep 0.2
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import deque
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+import services.webscraping_service as webscraping_service
+from services.crawler import Crawler
+from services.crawl_cache import CrawlCache
+from services.crawl_frontier import Frontier
+from services.webscraping_service import crawl_priority, scrape_website
+
+WORDS = ("duke engineering master program students course tuition career artificial intelligence data "
+         "science application deadline faculty research graduate curriculum project internship credit").split()
+
+def build_site(root: str, rng, pages: int, programs: int, paragraphs: int = 5):
+    """Write a site of program folders; every page links to its program's index and a few other pages"""
+    paths = ["/"] + [f"/program-{p}/" for p in range(programs)]
+    paths += [f"/program-{i % programs}/page-{i}.html" for i in range(pages - len(paths))]
+    for path in paths:
+        links = rng.sample(paths, min(6, len(paths)))
+        if path.startswith("/program-"):
+            links.append(f"/{path.split('/')[1]}/")
+        body = "".join(f"<p>{' '.join(rng.choices(WORDS, k=80))}</p>" for _ in range(paragraphs))
+        anchors = "".join(f'<a href="{link}">{link}</a> ' for link in links)
+        # Links inside the content: nav and footer are stripped before links are read
+        html = (f"<html><head><title>Page {path}</title></head><body><nav>{anchors}</nav>"
+                f"<main>{body}<p>{anchors}</p></main><footer>{anchors}</footer></body></html>")
+        file_path = os.path.join(root, path.lstrip("/") + ("index.html" if path.endswith("/") else ""))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+def serve(root: str, latency: float):
+    """Serve a folder with keep-alive connections and a fixed latency per response; returns the server"""
+    class Handler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=root))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def legacy_crawl(start_urls, sleep: float):
+    """crawl_domain's discovery loop as it was, once per start URL"""
+    pages = 0
+    for base_url in start_urls:
+        base = urlparse(base_url)
+        base_path = base.path.rstrip('/')
+        visited, queue = set(), deque([base_url])
+        while queue:
+            url = queue.popleft()
+            if url in visited or url.split('#')[0].rstrip('/') in visited:
+                continue
+            visited.add(url)
+            pages += 1
+            title, content, links = scrape_website(url)
+            for link in links:
+                parsed = urlparse(link)
+                if parsed.netloc == base.netloc and parsed.path.startswith(base_path):
+                    if link not in visited and link not in queue:
+                        queue.append(link)
+            time.sleep(sleep)
+    return pages
+
+def frontier_benchmark(urls: int, links: int):
+    """Seconds to queue the links of every page, with the deque scan and with the Frontier"""
+    rng = random.Random(0)
+    pages = [f"https://masters.pratt.duke.edu/program-{i % 40}/page-{i}" for i in range(urls)]
+    # Pages link across the whole site (menus, related programs), so the queue grows with the crawl
+    outlinks = [rng.choices(pages, k=links) for _ in range(urls)]
+
+    start = time.perf_counter()
+    visited, queue = set(), deque([pages[0]])
+    while queue:
+        url = queue.popleft()
+        visited.add(url)
+        for link in outlinks[int(url.rsplit("-", 1)[1])]:
+            if link not in visited and link not in queue:
+                queue.append(link)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frontier = Frontier(crawl_priority)
+    frontier.add(pages[0])
+    while frontier:
+        url, depth = frontier.pop()
+        for link in outlinks[int(url.rsplit("-", 1)[1])]:
+            frontier.add(link, depth + 1)
+        frontier.done(url)
+    return legacy, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sequential crawl loop with the concurrent crawler")
+    parser.add_argument("--hosts", type=int, default=3, help="fixture hosts (one start URL each)")
+    parser.add_argument("--pages", type=int, default=150, help="pages per host")
+    parser.add_argument("--programs", type=int, default=8, help="program folders per host")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per response")
+    parser.add_argument("--sleep", type=float, default=0.2, help="sleep after each page in the sequential loop")
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 16, 32])
+    parser.add_argument("--host-concurrency", type=int, default=4)
+    parser.add_argument("--host-delay", type=float, default=0.01)
+    parser.add_argument("--skip-sequential", action="store_true")
+    parser.add_argument("--frontier-urls", type=int, default=5000, help="URLs of the synthetic frontier benchmark")
+    parser.add_argument("--links", type=int, default=30, help="links per page in the frontier benchmark")
+    args = parser.parse_args()
+
+    # Fixture hosts are 127.0.0.1 on different ports, so links to them must be kept
+    webscraping_service.LINK_DOMAIN = "127.0.0.1"
+    rng = random.Random(0)
+    temporary = tempfile.TemporaryDirectory()
+    servers, start_urls = [], []
+    for host in range(args.hosts):
+        root = os.path.join(temporary.name, f"host-{host}")
+        build_site(root, rng, args.pages, args.programs)
+        servers.append(serve(root, args.latency))
+        start_urls.append(f"http://127.0.0.1:{servers[-1].server_address[1]}/")
+    print(f"{args.hosts} hosts x {args.pages} pages, {args.latency * 1000:.0f} ms per response\n")
+
+    runs = {}
+    if not args.skip_sequential:
+        runs[f"sequential, sleep {args.sleep}s"] = lambda: legacy_crawl(start_urls, args.sleep)
+    for workers in args.workers:
+        def run(workers=workers):
+            crawler = Crawler(scrape_website, workers=workers, host_concurrency=args.host_concurrency,
+                              host_delay=args.host_delay)
+            for _ in crawler.crawl(start_urls, Frontier(crawl_priority)):
+                pass
+            return crawler.pages
+        runs[f"crawler, {workers} workers"] = run
+
+    cache = CrawlCache(os.path.join(temporary.name, "crawl_cache.json"))
+    def cached_run():
+        crawler = Crawler(partial(scrape_website, cache=cache), workers=max(args.workers),
+                          host_concurrency=args.host_concurrency, host_delay=args.host_delay)
+        for _ in crawler.crawl(start_urls, Frontier(crawl_priority)):
+            pass
+        return crawler.pages
+    runs[f"{max(args.workers)} workers, cold cache"] = cached_run
+    runs[f"{max(args.workers)} workers, recrawl"] = cached_run
+
+    results = []
+    for name, run in runs.items():
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                pages = run()
+            finally:
+                sys.stdout = stdout
+        results.append((name, pages, time.perf_counter() - start))
+
+    print(f"{'crawl':<28}{'pages':>7}{'seconds':>9}{'pages/s':>9}")
+    for name, pages, elapsed in results:
+        print(f"{name:<28}{pages:>7}{elapsed:>9.2f}{pages / elapsed:>9.1f}")
+    for server in servers:
+        server.shutdown()
+    temporary.cleanup()
+
+    legacy, frontier = frontier_benchmark(args.frontier_urls, args.links)
+    print(f"\nQueueing the links of {args.frontier_urls} pages ({args.links} links each):")
+    print(f"{'deque scan (before)':<28}{legacy:>9.2f} s")
+    print(f"{'Frontier':<28}{frontier:>9.2f} s")
+
+if __name__ == "__main__":
+    main()
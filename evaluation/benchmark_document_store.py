@@ -0,0 +1,81 @@
+"""
+Time to fetch the retrieved documents: per-query file reads against the packed document store.
+
+A synthetic corpus of scraped-page-sized text files is written to a temporary
+directory and packed into a document store. Each lookup fetches the top-3
+matches of a random query, once by resolving and reading the files (as
+retrieval did before) and once from the memory-mapped store:
+
+    python benchmark_document_store.py --documents 2000 --lookups 5000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+from services.document_store import DocumentStore, DocumentStoreWriter
+
+def read_files(paths):
+    contents = []
+    for path in paths:
+        abs_path = Path(path).resolve()
+        if abs_path.exists():
+            with open(abs_path, "r", encoding="utf-8") as f:
+                contents.append(f.read())
+    return contents
+
+def time_lookups(fetch, lookups):
+    timings = []
+    for keys in lookups:
+        start = time.perf_counter()
+        fetch(keys)
+        timings.append(1e6 * (time.perf_counter() - start))
+    return statistics.median(timings), statistics.quantiles(timings, n=100)[98]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare file reads with the packed document store")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--document-kb", type=float, default=12, help="average document size")
+    parser.add_argument("--lookups", type=int, default=5000, help="number of top-3 fetches")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = ["duke", "engineering", "master", "program", "students", "course", "tuition", "career", "ai", "data"]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        start = time.perf_counter()
+        with DocumentStoreWriter(os.path.join(directory, "store")) as writer:
+            for i in range(args.documents):
+                text = " ".join(rng.choice(words) for _ in range(int(args.document_kb * 1024 / 7)))
+                path = os.path.join(directory, "pages", f"page_{i}.txt")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                paths.append(path)
+                writer.add(f"doc_{i}", text)
+        print(f"{args.documents} documents of ~{args.document_kb:.0f} KB, packed in {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        store = DocumentStore(os.path.join(directory, "store"))
+        print(f"store opened in {1000 * (time.perf_counter() - start):.1f} ms\n")
+
+        lookups = [rng.sample(range(args.documents), 3) for _ in range(args.lookups)]
+        file_median, file_p99 = time_lookups(lambda rows: read_files([paths[row] for row in rows]), lookups)
+        store_median, store_p99 = time_lookups(lambda rows: [store.get(f"doc_{row}") for row in rows], lookups)
+        view_median, view_p99 = time_lookups(lambda rows: [store.get_bytes(f"doc_{row}") for row in rows], lookups)
+
+        print(f"{'top-3 fetch':<22}{'p50 us':>9}{'p99 us':>9}")
+        print(f"{'file reads':<22}{file_median:>9.1f}{file_p99:>9.1f}")
+        print(f"{'store (decoded)':<22}{store_median:>9.1f}{store_p99:>9.1f}")
+        print(f"{'store (zero-copy)':<22}{view_median:>9.1f}{view_p99:>9.1f}")
+
+if __name__ == "__main__":
+    main()
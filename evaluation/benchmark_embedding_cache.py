@@ -0,0 +1,102 @@
+"""
+Lookup latency, hit ratio and footprint of the query embedding cache.
+
+A Zipf-distributed stream of queries (a few popular questions asked often, a
+long tail asked once) is embedded through the cache, first with a cold cache,
+then after a simulated restart that keeps only the SQLite tier. Without --live
+the embedding model is a stub that sleeps for --embed-ms; with --live it is
+text-embedding-ada-002:
+
+    python benchmark_embedding_cache.py --queries 2000 --distinct 500
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import numpy as np
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from services.embedding_cache import EmbeddingCache
+
+MODEL = "text-embedding-ada-002"
+
+def stub_embedding(latency: float, dimension: int = 1536):
+    def embed(text):
+        time.sleep(latency)
+        rng = np.random.default_rng(abs(hash(text)) % 2 ** 32)
+        return rng.standard_normal(dimension).tolist()
+    return embed
+
+def openai_embedding():
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return lambda text: client.embeddings.create(input=[text], model=MODEL).data[0].embedding
+
+def replay(cache, stream, embed):
+    """Embed every query through the cache; returns milliseconds per query"""
+    timings = []
+    for query in stream:
+        start = time.perf_counter()
+        cache.embed(MODEL, query, embed)
+        timings.append(1000 * (time.perf_counter() - start))
+    return timings
+
+def report(label, cache, timings):
+    stats = cache.stats()
+    hits = [t for t in timings if t < 5]
+    print(f"{label:<10}{stats['hit_ratio']:>8.1%}{stats['memory_hits']:>8}{stats['disk_hits']:>8}{stats['misses']:>8}"
+          f"{statistics.mean(timings):>10.2f}{(statistics.median(hits) if hits else 0):>10.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding cache")
+    parser.add_argument("--queries", type=int, default=2000, help="length of the query stream")
+    parser.add_argument("--distinct", type=int, default=500, help="number of distinct queries")
+    parser.add_argument("--memory-entries", type=int, default=200, help="size of the in-memory tier")
+    parser.add_argument("--embed-ms", type=float, default=150, help="latency of the stub embedding model")
+    parser.add_argument("--live", action="store_true", help="embed with text-embedding-ada-002")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ranks = np.minimum(rng.zipf(1.2, size=args.queries), args.distinct) - 1
+    stream = [f"What is question number {rank} about Duke programs?" for rank in ranks]
+    embed = openai_embedding() if args.live else stub_embedding(args.embed_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "embeddings.db")
+        print(f"{args.queries} queries, {len(set(stream))} distinct, memory tier of {args.memory_entries}\n")
+        print(f"{'run':<10}{'hits':>8}{'memory':>8}{'disk':>8}{'misses':>8}{'mean ms':>10}{'hit ms':>10}")
+
+        cache = EmbeddingCache(max_entries=args.memory_entries)
+        report("memory", cache, replay(cache, stream, embed))
+
+        cache = EmbeddingCache(max_entries=args.memory_entries, db_path=db_path)
+        report("cold", cache, replay(cache, stream, embed))
+
+        # A new process (or a restart) only has the SQLite file
+        cache = EmbeddingCache(max_entries=args.memory_entries, db_path=db_path)
+        report("restart", cache, replay(cache, stream, embed))
+
+        stats = cache.stats()
+        vector = embed(stream[0])
+        print(f"\nmemory tier: {stats['memory_bytes'] / 2 ** 20:.1f} MB for {stats['memory_entries']} embeddings")
+        print(f"disk tier: {stats['disk_bytes'] / 2 ** 20:.1f} MB of float16 blobs "
+              f"({stats['disk_file_bytes'] / 2 ** 20:.1f} MB file) for {stats['disk_entries']} embeddings; "
+              f"as JSON they would take {stats['disk_entries'] * len(json.dumps(vector)) / 2 ** 20:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Ingestion embedding throughput: one request per chunk against batched, concurrent requests.
+
+A stub of the OpenAI embeddings endpoint runs on localhost. Each request takes
+a fixed latency plus a small cost per input, and a share of requests is
+rejected with a 429 and a Retry-After, like a rate-limited account. A
+synthetic corpus of scraped-page-sized documents is split into chunks and
+embedded once a request per chunk, in sequence (as ingestion did before), and
+once through the BatchEmbedder at each concurrency:
+
+    python benchmark_embedding_ingestion.py --documents 100 --latency 0.05 --rate-limit 0.05
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+import tiktoken
+from openai import OpenAI
+from services.batch_embedder import BatchEmbedder
+
+DIMENSION = 1536
+
+def stub_server(latency: float, per_input: float, rate_limit: float):
+    """Start the stub embeddings endpoint; returns the server and a request counter"""
+    rng = random.Random(0)
+    vector = np.random.default_rng(0).standard_normal(DIMENSION).astype(np.float32)
+    encoded = base64.b64encode(vector.tobytes()).decode()
+    counter = {"requests": 0, "rate_limited": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            with lock:
+                counter["requests"] += 1
+                limited = rng.random() < rate_limit
+                counter["rate_limited"] += limited
+            if limited:
+                self.reply(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                           {"retry-after-ms": "100"})
+                return
+            time.sleep(latency + per_input * len(inputs))
+            as_base64 = body.get("encoding_format") == "base64"
+            self.reply(200, {
+                "object": "list",
+                "model": body["model"],
+                "data": [{"object": "embedding", "index": i, "embedding": encoded if as_base64 else vector.tolist()}
+                         for i in range(len(inputs))],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            })
+
+        def reply(self, status, payload, headers=None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counter
+
+def build_corpus(rng, documents: int, paragraphs: int):
+    """Chunks of the synthetic corpus as (document number, text)"""
+    words = ["duke", "engineering", "master", "program", "students", "course", "tuition",
+             "career", "ai", "data", "application", "deadline", "faculty", "research"]
+    chunks = []
+    for document in range(documents):
+        for _ in range(paragraphs):
+            chunks.append((document, " ".join(rng.choice(words) for _ in range(rng.randrange(80, 300)))))
+    return chunks
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and batched embedding during ingestion")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--chunks-per-document", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--per-input", type=float, default=0.0005, help="extra seconds per input in a request")
+    parser.add_argument("--rate-limit", type=float, default=0.05, help="share of requests answered with a 429")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=64, help="maximum inputs per batched request")
+    args = parser.parse_args()
+
+    server, counter = stub_server(args.latency, args.per_input, args.rate_limit)
+    client = OpenAI(api_key="stub", base_url=f"http://127.0.0.1:{server.server_port}/v1")
+    tokenizer = tiktoken.get_encoding("cl100k_base")
+    count_tokens = lambda text: len(tokenizer.encode(text))
+    chunks = build_corpus(random.Random(0), args.documents, args.chunks_per_document)
+    print(f"{args.documents} documents, {len(chunks)} chunks; stub latency {1000 * args.latency:.0f} ms, "
+          f"{args.rate_limit:.0%} of requests rate limited\n")
+
+    def run(name, embed):
+        counter["requests"] = counter["rate_limited"] = 0
+        start = time.perf_counter()
+        embedded = embed()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<26}{args.documents / elapsed:>10.1f}{embedded / elapsed:>12.1f}"
+              f"{counter['requests']:>10}{counter['rate_limited']:>8}{elapsed:>9.2f}")
+
+    print(f"{'embedding':<26}{'docs/s':>10}{'chunks/s':>12}{'requests':>10}{'429s':>8}{'seconds':>9}")
+
+    # One request per chunk, as generate_embedding did; the client's own retries handle the 429s
+    def sequential():
+        for _, text in chunks:
+            client.embeddings.create(input=[text], model="text-embedding-ada-002")
+        return len(chunks)
+    run("sequential", sequential)
+
+    for concurrency in args.concurrency:
+        embedder = BatchEmbedder(client, count_tokens, max_batch_inputs=args.batch_size,
+                                 concurrency=concurrency, backoff_seconds=0.1)
+        run(f"batched, concurrency {concurrency}", lambda: sum(1 for _ in embedder.embed(chunks)))
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
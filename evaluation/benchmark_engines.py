@@ -0,0 +1,106 @@
+"""
+LLM round trips and end-to-end latency per query: router + ReAct agents vs native tool calling.
+
+Both engines run on the same AgentFactory and answer each query with an empty
+history. LLM calls of the current path are counted with a callback on the
+shared chat models (router, specialists, combine step and memory summary);
+the function-calling engine reports its own count. Needs the OpenAI, Pinecone
+and Duke API credentials in .env:
+
+    python benchmark_engines.py
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from langchain_core.callbacks import BaseCallbackHandler
+from agents.agent_factory import AgentFactory
+from agents.function_calling_agent import FunctionCallingAgent
+
+QUERIES = [
+    "How much does the AI MEng program at Duke cost?",
+    "Can the AI MEng program at Duke be completed online?",
+    "Who teaches AIPI 540 and what does the course cover?",
+    "What courses are offered in the computer science department?",
+    "Which dining halls are open late on West Campus?",
+    "Where is Perkins Library?",
+    "What events are happening at Duke this weekend?",
+    "Are there any info sessions for admitted engineering students next week?",
+    "Where is the career fair being held this week?",
+    "Which AI courses are offered and are there any AI talks this month?",
+]
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts chat model calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.calls += 1
+
+def run_engine(factory, queries, counter):
+    """Answer each query with a fresh session; returns (llm calls, seconds) per query"""
+    results = []
+    for query in queries:
+        router = factory.create_router()
+        counter.calls = 0
+        start = time.perf_counter()
+        metadata = {}
+        try:
+            _, metadata = router.process_query_with_metadata(query)
+        except Exception as e:
+            print(f"[ERROR] {query}: {e}")
+        elapsed = time.perf_counter() - start
+        calls = metadata.get("llm_calls", counter.calls)
+        results.append((calls, elapsed))
+        print(f"  {calls} LLM calls, {elapsed:6.1f} s  {query}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ReAct and function-calling engines")
+    parser.add_argument("--limit", type=int, default=len(QUERIES), help="number of queries to run")
+    args = parser.parse_args()
+    queries = QUERIES[:args.limit]
+
+    factory = AgentFactory()
+    counter = LLMCallCounter()
+    factory.llm.callbacks = [counter]
+    factory.router_llm.callbacks = [counter]
+
+    engines = {}
+    print("router + ReAct agents")
+    factory.function_calling_agent = None
+    engines["react"] = run_engine(factory, queries, counter)
+
+    print("function calling")
+    factory.function_calling_agent = FunctionCallingAgent(factory.curriculum_agent, factory.executor)
+    engines["function_calling"] = run_engine(factory, queries, counter)
+
+    print(f"\n{'engine':<18}{'LLM calls/query':>16}{'p50 s':>8}{'mean s':>8}{'max s':>8}")
+    for engine, results in engines.items():
+        calls = [c for c, _ in results]
+        seconds = [s for _, s in results]
+        print(f"{engine:<18}{statistics.mean(calls):>16.1f}{statistics.median(seconds):>8.1f}"
+              f"{statistics.mean(seconds):>8.1f}{max(seconds):>8.1f}")
+
+if __name__ == "__main__":
+    main()
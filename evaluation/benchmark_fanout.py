@@ -0,0 +1,85 @@
+"""
+End-to-end latency of a three-domain query with sequential and concurrent specialists.
+
+The specialized agents are stubs that sleep for a fixed time (or hang, to
+exercise the per-agent timeout), and the router and combine chains are fake
+LLMs, so only the dispatch overhead is measured:
+
+    python benchmark_fanout.py --latencies 1.5 1.0 2.0 --timeout 1.8
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from agents.router_agent import RouterAgent, ROUTER_TEMPLATE, COMBINE_TEMPLATE
+
+class StubAgent:
+    """Specialized agent that takes a fixed time to answer"""
+
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+
+    def answer(self, query, chat_history=None):
+        time.sleep(self.latency)
+        return f"{self.name} answer"
+
+    async def aanswer(self, query, chat_history=None):
+        await asyncio.sleep(self.latency)
+        return f"{self.name} answer"
+
+class StubFactory:
+    """Holds the components a RouterAgent takes from the AgentFactory"""
+
+    def __init__(self, latencies, pool_size: int, timeout: float):
+        self.curriculum_agent = StubAgent("curriculum", latencies[0])
+        self.locations_agent = StubAgent("locations", latencies[1])
+        self.events_agent = StubAgent("events", latencies[2])
+        self.fallback_agent = None
+        self.llm = FakeListChatModel(responses=["combined answer"])
+        self.router_chain = LLMChain(llm=FakeListChatModel(responses=["***curriculum,locations,events***"]),
+                                     prompt=PromptTemplate.from_template(ROUTER_TEMPLATE))
+        self.combine_chain = LLMChain(llm=self.llm, prompt=PromptTemplate.from_template(COMBINE_TEMPLATE))
+        self.function_calling_agent = None
+        self.routing_classifier = None
+        self.routing_threshold = 1.0
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+        self.agent_timeout = timeout
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and concurrent specialist fan-out")
+    parser.add_argument("--latencies", type=float, nargs=3, default=[1.5, 1.0, 2.0],
+                        help="seconds taken by the curriculum, locations and events agents")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-agent timeout in seconds")
+    args = parser.parse_args()
+
+    query = "Which AI courses are offered, where are they taught, and are there info sessions this week?"
+    runs = [
+        ("sequential", lambda: RouterAgent(factory=StubFactory(args.latencies, 1, sum(args.latencies) + args.timeout))),
+        ("threads", lambda: RouterAgent(factory=StubFactory(args.latencies, 3, args.timeout))),
+        ("asyncio", lambda: RouterAgent(factory=StubFactory(args.latencies, 3, args.timeout))),
+    ]
+    for mode, make_router in runs:
+        router = make_router()
+        start = time.perf_counter()
+        if mode == "asyncio":
+            _, metadata = asyncio.run(router.aprocess_query_with_metadata(query))
+        else:
+            _, metadata = router.process_query_with_metadata(query)
+        elapsed = time.perf_counter() - start
+        print(f"\n{mode}: {1000 * elapsed:.0f} ms")
+        print(json.dumps(metadata, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Page extraction throughput of each HTML parser backend.
+
+Fixture pages shaped like the crawled program pages (a header and nav menu
+full of links, inline scripts and styles, a main column of nested sections,
+lists, tables and entities, a sidebar and a footer) are written to a folder,
+or read from --html-dir (saved .html files). Every backend installed extracts
+the title, main content and links of each page:
+
+- bs4: BeautifulSoup with html.parser, as scrape_website did before (a tree,
+  then separate passes to strip tags, get the text and find the links);
+- html.parser: one streaming pass of the standard library parser;
+- lxml and selectolax, when installed (pip install lxml / selectolax).
+
+The extractions are also compared with bs4's, as the share of pages with
+the same title, content and links.
+
+    python benchmark_html_extraction.py --pages 500 --repeat 3
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+from services.html_extraction import BACKENDS, extract_page
+
+WORDS = ("duke engineering master program students course tuition career artificial intelligence data "
+         "science application deadline faculty research graduate curriculum project internship credit "
+         "semester machine learning python team industry capstone seminar elective core requirement").split()
+
+def sentence(rng, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words)).capitalize() + "."
+
+def fixture_page(rng, number: int) -> str:
+    menu = "".join(f'<li><a href="/program-{i}/">Program {i}</a></li>' for i in range(rng.randrange(40, 80)))
+    sections = []
+    for s in range(rng.randrange(4, 10)):
+        paragraphs = "".join(f"<p>{sentence(rng, rng.randrange(30, 120))} <a href=\"/program-{s}/page-{p}\">More &amp; details</a></p>"
+                             for p in range(rng.randrange(2, 6)))
+        items = "".join(f"<li>{sentence(rng, 8)}</li>" for _ in range(rng.randrange(3, 10)))
+        rows = "".join(f"<tr><td>AIPI {500 + r}</td><td>{sentence(rng, 5)}</td><td>3&nbsp;credits</td></tr>"
+                       for r in range(rng.randrange(0, 8)))
+        sections.append(f'<section class="block"><h2>{sentence(rng, 4)}</h2><div class="row"><div class="col">'
+                        f'{paragraphs}<ul>{items}</ul><table>{rows}</table>'
+                        f'<a href="/files/brochure-{s}.pdf">Brochure</a></div></div></section>')
+    script = "var settings = {" + ",".join(f'"k{i}": "{sentence(rng, 6)}"' for i in range(60)) + "};"
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Program page {number} | Duke</title>'
+            f'<style>.block {{ margin: 0 }} .row {{ display: flex }}</style><script>{script}</script></head><body>'
+            f'<header><a href="/">Home</a><nav><ul>{menu}</ul></nav></header>'
+            f'<main><h1>Program page {number}</h1><!-- main column -->{"".join(sections)}</main>'
+            f'<aside><a href="/apply">Apply</a> {sentence(rng, 20)}</aside>'
+            f'<footer><ul>{menu}</ul><p>&copy; Duke University</p></footer>'
+            f'<script>console.log("{number}");</script></body></html>')
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page extraction throughput of the HTML parser backends")
+    parser.add_argument("--pages", type=int, default=500, help="fixture pages to generate")
+    parser.add_argument("--html-dir", help="folder of saved .html pages to use instead of fixtures")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the pages per backend (best is reported)")
+    args = parser.parse_args()
+
+    if args.html_dir:
+        folder = args.html_dir
+    else:
+        temporary = tempfile.TemporaryDirectory()
+        folder = temporary.name
+        rng = random.Random(0)
+        for number in range(args.pages):
+            with open(os.path.join(folder, f"page-{number}.html"), "w", encoding="utf-8") as f:
+                f.write(fixture_page(rng, number))
+
+    pages = []
+    for root, _, files in os.walk(folder):
+        for file in sorted(files):
+            if file.endswith(".html"):
+                with open(os.path.join(root, file), "r", encoding="utf-8", errors="replace") as f:
+                    pages.append(f.read())
+    megabytes = sum(len(page) for page in pages) / (1024 * 1024)
+    url = "https://masters.pratt.duke.edu/program/"
+    print(f"{len(pages)} pages, {megabytes:.1f} MB of HTML; backends: {', '.join(BACKENDS)}\n")
+
+    reference = [extract_page(page, url, "bs4") for page in pages]
+    print(f"{'backend':<14}{'seconds':>9}{'pages/s':>9}{'MB/s':>8}{'same as bs4':>13}")
+    for backend in BACKENDS:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = [extract_page(page, url, backend) for page in pages]
+            best = min(best, time.perf_counter() - start)
+        same = sum(result == expected for result, expected in zip(results, reference)) / len(pages)
+        print(f"{backend:<14}{best:>9.2f}{len(pages) / best:>9.0f}{megabytes / best:>8.1f}{same:>12.0%}")
+
+if __name__ == "__main__":
+    main()
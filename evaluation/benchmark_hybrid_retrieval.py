@@ -0,0 +1,169 @@
+"""
+Recall@k and latency of vector-only, BM25-only and hybrid (RRF) retrieval.
+
+A synthetic course catalog is indexed in a local vector index and a BM25
+index. Two kinds of queries are asked: course codes as users type them
+("what is AIPI540 about?", whose answer is one course) and descriptions that
+share few words with the catalog ("a class on teaching agents to act from
+rewards", answered by every course with that title). Without --live, the
+embeddings are simulated: a course's embedding is close to its title's and
+weakly to its subject's, and a code query only carries the subject, like an
+embedding model that has never seen the course number. With --live, courses
+and queries are embedded with text-embedding-ada-002:
+
+    python benchmark_hybrid_retrieval.py --k 5 --live
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import numpy as np
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from services.vector_index import LocalVectorIndex
+from services.lexical_index import LexicalIndex, LexicalIndexWriter, reciprocal_rank_fusion
+
+# Course titles, and how a student might describe them without the catalog's words
+TITLES = [
+    ("Deep Reinforcement Learning", "teaching agents to act from rewards"),
+    ("Computer Vision", "getting machines to understand pictures"),
+    ("Natural Language Processing", "software that understands human text"),
+    ("Probabilistic Machine Learning", "bayesian models of uncertainty"),
+    ("Data Engineering", "building pipelines that move and clean records"),
+    ("Cloud Computing", "running applications on remote servers at scale"),
+    ("Technology Product Management", "leading the development of tech products"),
+    ("Robotics", "machines that move around and sense the world"),
+    ("Signal Processing", "filtering audio and sensor waveforms"),
+    ("Database Systems", "storing and querying structured records"),
+    ("Computer Networks", "how internet packets get routed"),
+    ("Operating Systems", "how the kernel manages processes and memory"),
+    ("Statistical Inference", "estimating population quantities from samples"),
+    ("Time Series Analysis", "forecasting values that change over time"),
+    ("Medical Imaging", "scanning the body with mri and ct"),
+    ("Quantum Computing", "computation using qubits"),
+    ("Cybersecurity", "protecting systems from attackers"),
+    ("Embedded Systems", "programming microcontrollers inside devices"),
+    ("Convex Optimization", "finding the best solution under constraints"),
+    ("Ethics of Artificial Intelligence", "responsible and fair use of algorithms"),
+]
+SUBJECTS = ["AIPI", "ECE", "COMPSCI", "STA", "BME", "MENG"]
+FILLER = ("students project lectures assignments final exam weekly labs semester graduate level "
+          "prerequisites programming python course credit hands-on team practical theory").split()
+
+def build_catalog(rng, courses_per_title: int):
+    """Courses as (code, title index, subject, text)"""
+    catalog, codes = [], set()
+    for title_index, (title, _) in enumerate(TITLES):
+        for subject in rng.sample(SUBJECTS, courses_per_title):
+            number = rng.randrange(500, 800)
+            while f"{subject} {number}" in codes:
+                number = rng.randrange(500, 800)
+            code = f"{subject} {number}"
+            codes.add(code)
+            text = (f"{code}: {title}. This course covers {title.lower()} for graduate students. "
+                    + " ".join(rng.choice(FILLER) for _ in range(60)))
+            catalog.append((code, title_index, subject, text))
+    return catalog
+
+def build_queries(rng, catalog):
+    """Queries as (kind, text, relevant row indexes)"""
+    queries = []
+    for row, (code, _, _, _) in enumerate(catalog):
+        typed = code.replace(" ", "") if rng.random() < 0.5 else code.lower()
+        queries.append(("code", f"what is {typed} about?", {row}))
+    for title_index, (_, description) in enumerate(TITLES):
+        relevant = {row for row, course in enumerate(catalog) if course[1] == title_index}
+        queries.append(("description", f"is there a class on {description}?", relevant))
+    return queries
+
+def simulated_embeddings(catalog, queries, dimension: int = 256, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    titles = rng.standard_normal((len(TITLES), dimension))
+    subjects = {subject: rng.standard_normal(dimension) for subject in SUBJECTS}
+    documents = [titles[title] + 0.5 * subjects[subject] + 0.5 * rng.standard_normal(dimension)
+                 for _, title, subject, _ in catalog]
+    embedded = []
+    for kind, text, relevant in queries:
+        course = catalog[next(iter(relevant))]
+        if kind == "code":
+            embedded.append(0.5 * subjects[course[2]] + rng.standard_normal(dimension))
+        else:
+            embedded.append(titles[course[1]] + 0.5 * rng.standard_normal(dimension))
+    return documents, embedded
+
+def openai_embeddings(catalog, queries):
+    from openai import OpenAI
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def embed(texts):
+        vectors = []
+        for start in range(0, len(texts), 100):
+            response = client.embeddings.create(input=texts[start:start + 100], model="text-embedding-ada-002")
+            vectors += [item.embedding for item in response.data]
+        return vectors
+    return embed([course[3] for course in catalog]), embed([text for _, text, _ in queries])
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vector, BM25 and hybrid retrieval")
+    parser.add_argument("--k", type=int, default=5, help="recall cutoff")
+    parser.add_argument("--courses-per-title", type=int, default=4)
+    parser.add_argument("--live", action="store_true", help="embed with text-embedding-ada-002")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    catalog = build_catalog(rng, args.courses_per_title)
+    queries = build_queries(rng, catalog)
+    documents, embedded = openai_embeddings(catalog, queries) if args.live else simulated_embeddings(catalog, queries)
+
+    with tempfile.TemporaryDirectory() as directory:
+        vector_index = LocalVectorIndex(os.path.join(directory, "vectors"))
+        vector_index.upsert([{"id": str(row), "values": values, "metadata": {}} for row, values in enumerate(documents)])
+        with LexicalIndexWriter(os.path.join(directory, "lexical")) as writer:
+            for row, course in enumerate(catalog):
+                writer.add(str(row), course[3])
+        lexical_index = LexicalIndex(os.path.join(directory, "lexical"))
+
+        # Retrieve as the curriculum agent does: each index returns k matches, fused by rank
+        retrievers = {
+            "vector": lambda text, vector: vector_index.query(vector=vector, top_k=args.k, include_metadata=True),
+            "bm25": lambda text, vector: lexical_index.query(text, top_k=args.k, include_metadata=True),
+            "hybrid": lambda text, vector: reciprocal_rank_fusion(
+                vector_index.query(vector=vector, top_k=args.k, include_metadata=True),
+                lexical_index.query(text, top_k=args.k, include_metadata=True),
+                top_k=args.k
+            ),
+        }
+
+        print(f"{len(catalog)} courses, {len(queries)} queries, "
+              f"{'ada-002' if args.live else 'simulated'} embeddings, recall@{args.k}\n")
+        print(f"{'retrieval':<10}{'code':>8}{'description':>13}{'overall':>9}{'ms/query':>10}")
+        for name, retrieve in retrievers.items():
+            recalls = {"code": [], "description": []}
+            timings = []
+            for (kind, text, relevant), vector in zip(queries, embedded):
+                start = time.perf_counter()
+                response = retrieve(text, vector)
+                timings.append(time.perf_counter() - start)
+                found = {int(match["id"]) for match in response["matches"]}
+                recalls[kind].append(len(found & relevant) / min(len(relevant), args.k))
+            overall = statistics.mean(recalls["code"] + recalls["description"])
+            print(f"{name:<10}{statistics.mean(recalls['code']):>8.1%}{statistics.mean(recalls['description']):>13.1%}"
+                  f"{overall:>9.1%}{1000 * statistics.median(timings):>10.3f}")
+        print("\n(vector timings exclude the query embedding call, which BM25 does not need)")
+
+if __name__ == "__main__":
+    main()
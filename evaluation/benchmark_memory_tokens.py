@@ -0,0 +1,99 @@
+import os
+import sys
+import argparse
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from langchain.chains.conversation.memory import ConversationBufferMemory
+from agents.router_agent import ROUTER_TEMPLATE
+from agents.token_budget_memory import TokenBudgetMemory, count_tokens
+
+QUESTIONS = [
+    "What are the career outcomes for Duke AI MEng students?",
+    "How much does the AI MEng program at Duke cost?",
+    "When is the application deadline for Duke's AI MEng program?",
+    "Where is the Pratt School of Engineering on campus?",
+    "Are there any info sessions for admitted engineering students next week?",
+    "Can the AI MEng program at Duke be completed online?",
+    "What housing options are available for Duke grad students?",
+    "Who teaches AIPI 540 and what does the course cover?",
+    "Which dining halls are open late on West Campus?",
+    "How long does it take to complete the AI MEng program at Duke?",
+]
+
+ANSWER = (
+    "Here is what I found for you. The Duke AI MEng program combines core courses in machine learning, "
+    "deep learning and MLOps with a capstone project completed with an industry partner. Students can choose "
+    "between a 12 month accelerated track and a 16 month standard track, and an online option is available for "
+    "working professionals. Most graduates join technology companies, consulting firms or research groups as "
+    "machine learning engineers, data scientists or product managers. For the most accurate and up to date "
+    "details on tuition, deadlines and course offerings, check the program website or contact the admissions office."
+)
+
+class StubSummarizer:
+    """Offline stand-in for the summarization LLM that keeps the tail of the conversation"""
+
+    def __init__(self, max_words: int = 150):
+        self.max_words = max_words
+
+    def predict(self, prompt: str) -> str:
+        text = prompt.split("New lines of conversation:")[-1].split("New summary:")[0]
+        previous = prompt.split("Current summary:")[-1].split("New lines of conversation:")[0]
+        words = (previous.strip() + " " + text.strip()).split()
+        return " ".join(words[-self.max_words:])
+
+def router_prompt_tokens(memory, query: str) -> int:
+    """Tokens of the router prompt the RouterAgent would send for this turn"""
+    return count_tokens(ROUTER_TEMPLATE.format(chat_history=memory.buffer_as_str, query=query))
+
+def run_session(memory, turns: int):
+    """Simulate a session and record the router prompt size before each turn"""
+    tokens = []
+    for turn in range(turns):
+        query = QUESTIONS[turn % len(QUESTIONS)]
+        tokens.append(router_prompt_tokens(memory, query))
+        memory.save_context({"input": query}, {"output": ANSWER})
+    return tokens
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure router prompt tokens per turn over a long session")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--max-tokens", type=int, default=1000)
+    parser.add_argument("--live", action="store_true", help="summarize with gpt-4o-mini instead of the offline stub")
+    args = parser.parse_args()
+
+    if args.live:
+        from langchain.chat_models import ChatOpenAI
+        summarizer = ChatOpenAI(temperature=0, model_name="gpt-4o-mini", openai_api_key=os.getenv("OPENAI_API_KEY"))
+    else:
+        summarizer = StubSummarizer()
+
+    buffer_tokens = run_session(
+        ConversationBufferMemory(memory_key="chat_history", return_messages=True), args.turns
+    )
+    budget_tokens = run_session(
+        TokenBudgetMemory(llm=summarizer, memory_key="chat_history", return_messages=True,
+                          max_token_limit=args.max_tokens),
+        args.turns
+    )
+
+    print(f"{'turn':>5}{'buffer memory':>16}{'token budget memory':>22}")
+    for turn, (buffered, budgeted) in enumerate(zip(buffer_tokens, budget_tokens), start=1):
+        if turn == 1 or turn % 5 == 0:
+            print(f"{turn:>5}{buffered:>16}{budgeted:>22}")
+    print(f"\nmax prompt tokens  buffer: {max(buffer_tokens)}  token budget: {max(budget_tokens)}")
+    print(f"total prompt tokens buffer: {sum(buffer_tokens)}  token budget: {sum(budget_tokens)}")
+
+if __name__ == "__main__":
+    main()
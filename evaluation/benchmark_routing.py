@@ -0,0 +1,104 @@
+"""
+Accuracy and latency of the local routing classifier against the LLM router.
+
+The shipped routing dataset is split into folds; each fold is classified by a
+model trained on the others. For each confidence threshold the script reports
+the share of queries routed locally, the accuracy of those local decisions, and
+the routing latency saved per query. With --live, the queries below the
+threshold are also sent to the LLM router to measure its accuracy and latency:
+
+    python benchmark_routing.py --live
+"""
+import os
+import sys
+import time
+import argparse
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from agents.routing_classifier import RoutingClassifier, load_routing_dataset
+from agents.router_agent import ROUTER_TEMPLATE, parse_routing
+
+THRESHOLDS = [0.5, 0.7, 0.8, 0.9, 0.95]
+
+def cross_validate(queries, labels, folds: int):
+    """Classify every query with a model that did not see it; returns (agents, confidence, seconds) per query"""
+    predictions = [None] * len(queries)
+    for fold in range(folds):
+        train = [i for i in range(len(queries)) if i % folds != fold]
+        classifier = RoutingClassifier().fit([queries[i] for i in train], [labels[i] for i in train])
+        for i in range(fold, len(queries), folds):
+            start = time.perf_counter()
+            agents, confidence = classifier.predict(queries[i])
+            predictions[i] = (agents, confidence, time.perf_counter() - start)
+    return predictions
+
+def run_llm_router(queries):
+    """Route queries with the LLM router used by RouterAgent; returns (agents, seconds) per query"""
+    from langchain.chat_models import ChatOpenAI
+    from langchain.chains import LLMChain
+    from langchain.prompts import PromptTemplate
+
+    llm = ChatOpenAI(temperature=0, model_name="gpt-4o-mini", openai_api_key=os.getenv("OPENAI_API_KEY"))
+    chain = LLMChain(llm=llm, prompt=PromptTemplate(input_variables=["chat_history", "query"], template=ROUTER_TEMPLATE))
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        routing = chain.run(query=query, chat_history="").strip().lower()
+        results.append((parse_routing(routing, query), time.perf_counter() - start))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local routing classifier")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=800,
+                        help="LLM router latency assumed when --live is not set")
+    parser.add_argument("--live", action="store_true", help="also route queries with the gpt-4o-mini router")
+    args = parser.parse_args()
+
+    queries, labels = load_routing_dataset()
+    predictions = cross_validate(queries, labels, args.folds)
+    correct = [set(agents) == set(label) for (agents, _, _), label in zip(predictions, labels)]
+    local_ms = 1000 * sum(seconds for _, _, seconds in predictions) / len(predictions)
+
+    start = time.perf_counter()
+    RoutingClassifier().fit(queries, labels)
+    print(f"{len(queries)} labeled queries, training on all of them takes {time.perf_counter() - start:.2f} s")
+    print(f"local classifier: {local_ms:.2f} ms per query, accuracy {sum(correct) / len(correct):.1%} "
+          f"({args.folds}-fold cross-validation)")
+
+    llm_ms = args.llm_latency_ms
+    llm_correct = None
+    if args.live:
+        llm_results = run_llm_router(queries)
+        llm_correct = [set(agents) == set(label) for (agents, _), label in zip(llm_results, labels)]
+        llm_ms = 1000 * sum(seconds for _, seconds in llm_results) / len(llm_results)
+        print(f"LLM router: {llm_ms:.0f} ms per query, accuracy {sum(llm_correct) / len(llm_correct):.1%}")
+    else:
+        print(f"LLM router: {llm_ms:.0f} ms per query assumed (pass --live to measure)")
+
+    print(f"\n{'threshold':>9}{'local':>8}{'local acc':>11}{'overall acc':>13}{'ms saved/query':>16}")
+    for threshold in THRESHOLDS:
+        local = [confidence >= threshold for _, confidence, _ in predictions]
+        share = sum(local) / len(local)
+        local_accuracy = sum(c for c, l in zip(correct, local) if l) / max(1, sum(local))
+        overall = "-"
+        if llm_correct is not None:
+            overall = f"{sum(c if l else lc for c, lc, l in zip(correct, llm_correct, local)) / len(local):.1%}"
+        # Every query pays for the classifier; the local share skips the LLM call
+        saved = share * llm_ms - local_ms
+        print(f"{threshold:>9.2f}{share:>8.0%}{local_accuracy:>11.1%}{overall:>13}{saved:>16.0f}")
+
+if __name__ == "__main__":
+    main()
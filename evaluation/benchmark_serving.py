@@ -0,0 +1,213 @@
+"""
+Load test comparing the Flask app (thread per request) with the ASGI app.
+
+The query service is replaced by a stub that makes one HTTP call to a local
+stub backend, which sleeps for --upstream-latency seconds to stand in for the
+router, agent, tool and combine calls. Each server runs in its own process:
+
+    python benchmark_serving.py --concurrency 200 --duration 15
+"""
+import os
+import sys
+import time
+import types
+import socket
+import asyncio
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+server_root = os.path.join(project_root, "server")
+sys.path.insert(0, server_root)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve_upstream(port: int, latency: float):
+    """Stub backend that waits like the OpenAI/Pinecone/Duke API calls would"""
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def complete(request):
+        await asyncio.sleep(latency)
+        return JSONResponse({"response": "Duke University is located in Durham, North Carolina."})
+
+    app = Starlette(routes=[Route("/complete", complete, methods=["POST"])])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+def install_stub_query_service(upstream_url: str):
+    """Replace services.query_service with a stub that calls the stub backend"""
+    import threading
+    import requests
+    import httpx
+
+    local = threading.local()
+
+    class StubQueryService:
+        def __init__(self):
+            self.async_client = None
+
+        def process_query_with_metadata(self, query, session_id="default"):
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+            return local.session.post(upstream_url, json={"message": query}, timeout=60).json()["response"], {}
+
+        async def aprocess_query_with_metadata(self, query, session_id="default"):
+            if self.async_client is None:
+                self.async_client = httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=None, max_keepalive_connections=0))
+            response = await self.async_client.post(upstream_url, json={"message": query})
+            return response.json()["response"], {}
+
+        def flush(self):
+            pass
+
+        def stats(self):
+            return {}
+
+    module = types.ModuleType("services.query_service")
+    module.QueryService = StubQueryService
+    sys.modules["services.query_service"] = module
+
+def serve_flask(port: int, upstream_url: str, threads: int):
+    """Serve app.py with a fixed pool of worker threads, like a gunicorn gthread worker"""
+    from werkzeug.serving import BaseWSGIServer
+
+    install_stub_query_service(upstream_url)
+    import app as flask_app
+    import logging
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = 4096
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer("127.0.0.1", port, flask_app.app).serve_forever()
+
+def serve_asgi(port: int, upstream_url: str):
+    """Serve asgi_app.py with a single uvicorn worker"""
+    import uvicorn
+
+    install_stub_query_service(upstream_url)
+    import asgi_app
+    uvicorn.run(asgi_app.app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+def wait_for_port(port: int, timeout: float = 20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+async def run_load(url: str, concurrency: int, duration: float):
+    """Keep `concurrency` requests in flight for `duration` seconds"""
+    import httpx
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int, client):
+        nonlocal errors
+        count = 0
+        while time.perf_counter() < deadline:
+            payload = {"message": "Where is Duke University located?", "session_id": f"load-{worker_id}-{count}"}
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload)
+                if response.status_code != 200:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+            count += 1
+
+    # new connection per request; httpx keep-alive pooling stalls under this many concurrent connections
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else float("nan")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": 1000 * percentile(0.50),
+        "p99_ms": 1000 * percentile(0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Flask and ASGI serving modes under load")
+    parser.add_argument("--serve", choices=["upstream", "flask", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--upstream-url", help=argparse.SUPPRESS)
+    parser.add_argument("--upstream-latency", type=float, default=0.5)
+    parser.add_argument("--flask-threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+
+    if args.serve == "upstream":
+        return serve_upstream(args.port, args.upstream_latency)
+    if args.serve == "flask":
+        return serve_flask(args.port, args.upstream_url, args.flask_threads)
+    if args.serve == "asgi":
+        return serve_asgi(args.port, args.upstream_url)
+
+    upstream_port = free_port()
+    upstream_url = f"http://127.0.0.1:{upstream_port}/complete"
+    processes = [subprocess.Popen([sys.executable, __file__, "--serve", "upstream", "--port", str(upstream_port),
+                                   "--upstream-latency", str(args.upstream_latency)])]
+    results = {}
+    try:
+        wait_for_port(upstream_port)
+        for mode in ["flask", "asgi"]:
+            port = free_port()
+            server = subprocess.Popen([sys.executable, __file__, "--serve", mode, "--port", str(port),
+                                       "--upstream-url", upstream_url, "--flask-threads", str(args.flask_threads)],
+                                      cwd=server_root)
+            processes.append(server)
+            wait_for_port(port)
+            print(f"Running {mode} for {args.duration:.0f}s at concurrency {args.concurrency}...")
+            results[mode] = asyncio.run(run_load(f"http://127.0.0.1:{port}/process", args.concurrency, args.duration))
+            server.terminate()
+            server.wait()
+    finally:
+        for process in processes:
+            process.terminate()
+
+    print(f"\nupstream latency {1000 * args.upstream_latency:.0f} ms, Flask pool of {args.flask_threads} threads, "
+          f"ASGI single worker")
+    print(f"{'mode':<8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode, row in results.items():
+        print(f"{mode:<8}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10.1f}{row['p50_ms']:>10.0f}{row['p99_ms']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import argparse
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+# keep every session resident so the numbers reflect the per-session cost rather than eviction
+os.environ.setdefault("SESSION_MAX_SIZE", "100000")
+
+from agents.agent_factory import AgentFactory
+from services.query_service import QueryService
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def bench_shared_sessions(session_counts):
+    """
+    Create sessions through QueryService, which shares one AgentFactory per process
+
+    Returns:
+        List of result rows, one per session count
+    """
+    start = time.perf_counter()
+    service = QueryService()
+    factory_seconds = time.perf_counter() - start
+    print(f"Shared factory built once in {factory_seconds:.2f}s (RSS {rss_mb():.1f} MB)")
+
+    results = []
+    created = 0
+    for target in session_counts:
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        while created < target:
+            service.get_or_create_agent(f"session-{created}")
+            created += 1
+        elapsed = time.perf_counter() - start
+        results.append({
+            "mode": "shared",
+            "sessions": target,
+            "create_ms_per_session": 1000 * elapsed / max(1, target),
+            "rss_mb": rss_mb(),
+            "rss_delta_mb": rss_mb() - rss_before,
+        })
+    return results
+
+def bench_per_session_agents(count):
+    """
+    Reproduce the previous behaviour, where every session built its own specialized
+    agents, LLM clients and Pinecone handle, for a small number of sessions
+
+    Returns:
+        A result row extrapolated from the measured sessions
+    """
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    factories = [AgentFactory() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    per_session_mb = (rss_mb() - rss_before) / max(1, count)
+    return {
+        "mode": f"per-session (measured on {len(factories)})",
+        "sessions": count,
+        "create_ms_per_session": 1000 * elapsed / max(1, count),
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": per_session_mb * count,
+        "projected_10k_mb": per_session_mb * 10_000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session creation time and resident memory")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--per-session-baseline", type=int, default=20,
+                        help="number of sessions to build the old way for comparison (0 to skip)")
+    args = parser.parse_args()
+
+    rows = bench_shared_sessions(sorted(args.sessions))
+    if args.per_session_baseline:
+        rows.append(bench_per_session_agents(args.per_session_baseline))
+
+    print(f"\n{'mode':<32}{'sessions':>10}{'ms/session':>14}{'RSS MB':>10}{'delta MB':>10}")
+    for row in rows:
+        print(f"{row['mode']:<32}{row['sessions']:>10}{row['create_ms_per_session']:>14.3f}"
+              f"{row['rss_mb']:>10.1f}{row['rss_delta_mb']:>10.1f}")
+        if "projected_10k_mb" in row:
+            print(f"{'':<32}projected RSS for 10k sessions: {row['projected_10k_mb']:.0f} MB")
+
+if __name__ == "__main__":
+    main()
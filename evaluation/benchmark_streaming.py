@@ -0,0 +1,125 @@
+"""
+Time to first token seen by the WebSocket client, with and without streaming.
+
+The ASGI app serves a stub query service whose answer is generated token by
+token (--first-token-latency before the first token, --token-latency between
+tokens), standing in for the router call followed by a streamed specialist
+answer. The Lambda relay functions post frames to a fake API Gateway client
+that records when each frame was sent:
+
+    python benchmark_streaming.py --requests 20
+
+Pass --url to measure against a running server instead (real agents, so both
+modes send real queries).
+"""
+import os
+import sys
+import time
+import types
+import asyncio
+import argparse
+import threading
+import statistics
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+server_root = os.path.join(project_root, "server")
+sys.path.insert(0, server_root)
+
+ANSWER = (
+    "The Duke AI MEng program can be completed in 12 months on the accelerated track or 16 months on the "
+    "standard track, and an online option is available for working professionals. Core courses cover machine "
+    "learning, deep learning and MLOps, and every student completes a capstone project with an industry partner."
+)
+
+def install_stub_query_service(first_token_latency: float, token_latency: float):
+    """Replace services.query_service with a stub that generates the answer word by word"""
+
+    class StubQueryService:
+        async def astream_query(self, query, session_id="default", metadata=None):
+            await asyncio.sleep(first_token_latency)
+            for index, word in enumerate(ANSWER.split(" ")):
+                if index:
+                    await asyncio.sleep(token_latency)
+                yield word if index == 0 else " " + word
+
+        async def aprocess_query_with_metadata(self, query, session_id="default"):
+            return "".join([token async for token in self.astream_query(query, session_id)]), {}
+
+        def flush(self):
+            pass
+
+        def stats(self):
+            return {}
+
+    module = types.ModuleType("services.query_service")
+    module.QueryService = StubQueryService
+    sys.modules["services.query_service"] = module
+
+def start_stub_server(port: int):
+    """Serve asgi_app.py in a background thread"""
+    import uvicorn
+    import asgi_app
+
+    server = uvicorn.Server(uvicorn.Config(asgi_app.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+class RecordingApiClient:
+    """Stand-in for the API Gateway management client that records when frames are posted"""
+
+    def __init__(self):
+        self.frames = []
+
+    def post_to_connection(self, ConnectionId, Data):
+        self.frames.append(time.perf_counter())
+
+def measure(lambda_handler, streaming: bool, message: str):
+    """Run one message through the Lambda relay and return (time to first frame, total time, frames)"""
+    client = RecordingApiClient()
+    lambda_handler.get_api_client = lambda event: client
+    event = {"requestContext": {"domainName": "localhost", "stage": "prod"}}
+
+    start = time.perf_counter()
+    if streaming:
+        lambda_handler.relay_ec2_stream(event, "connection", message)
+    else:
+        lambda_handler.send_message_to_client(event, "connection", lambda_handler.send_to_ec2(message))
+    return client.frames[0] - start, client.frames[-1] - start, len(client.frames)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare time to first token with and without streaming")
+    parser.add_argument("--url", help="/process endpoint of a running asgi_app.py (default: local stub)")
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--message", default="How long does it take to complete the AI MEng program at Duke?")
+    args = parser.parse_args()
+
+    if args.url:
+        url = args.url
+    else:
+        import socket
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        install_stub_query_service(args.first_token_latency, args.token_latency)
+        start_stub_server(port)
+        url = f"http://127.0.0.1:{port}/process"
+
+    import logging
+    import lambda_handler
+    lambda_handler.EC2_ENDPOINT = url
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'mode':<10}{'first frame ms':>16}{'complete ms':>13}{'frames':>8}")
+    for streaming in [False, True]:
+        results = [measure(lambda_handler, streaming, args.message) for _ in range(args.requests)]
+        first = statistics.median(r[0] for r in results)
+        total = statistics.median(r[1] for r in results)
+        frames = statistics.median(r[2] for r in results)
+        print(f"{'streamed' if streaming else 'buffered':<10}{1000 * first:>16.0f}{1000 * total:>13.0f}{frames:>8.0f}")
+
+if __name__ == "__main__":
+    main()
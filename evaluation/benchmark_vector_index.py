@@ -0,0 +1,106 @@
+"""
+Query latency and recall of the local vector index against a Pinecone round trip.
+
+A synthetic corpus of random 1536-dimension embeddings is saved as a local
+index in float32, float16 and (when hnswlib is installed) float32 with an
+HNSW graph. Each variant is reopened from disk and queried; recall@k is
+measured against the exact float32 top-k. With --live, the same number of
+queries is sent to the Pinecone index configured in .env:
+
+    python benchmark_vector_index.py --vectors 5000 --live
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import numpy as np
+
+# project path
+project_root = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(project_root, "server"))
+
+# environment variables
+from dotenv import load_dotenv
+ec2_env_path = "/home/ec2-user/websocket-handler/.env"
+local_env_path = os.path.join(project_root, ".env")
+if os.path.exists(ec2_env_path):
+    load_dotenv(dotenv_path=ec2_env_path)
+else:
+    load_dotenv(dotenv_path=local_env_path)
+
+from services.vector_index import LocalVectorIndex, hnswlib
+
+def synthetic_corpus(count: int, dimension: int, rng) -> np.ndarray:
+    """Embeddings clustered around a few hundred topics, like pages of the same programs"""
+    centers = rng.standard_normal((max(1, count // 20), dimension))
+    return centers[rng.integers(len(centers), size=count)] + 0.5 * rng.standard_normal((count, dimension))
+
+def time_queries(query, vectors, top_k: int):
+    """Median milliseconds per query and the ids returned for each query"""
+    timings, results = [], []
+    for vector in vectors:
+        start = time.perf_counter()
+        response = query(vector=vector.tolist(), top_k=top_k, include_metadata=True)
+        timings.append(time.perf_counter() - start)
+        results.append([match["id"] for match in response["matches"]])
+    return 1000 * statistics.median(timings), results
+
+def recall(results, exact) -> float:
+    return statistics.mean(len(set(r) & set(e)) / len(e) for r, e in zip(results, exact))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local vector index")
+    parser.add_argument("--vectors", type=int, default=5000, help="corpus size")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--live", action="store_true", help="also query the Pinecone index from .env")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = synthetic_corpus(args.vectors, args.dimension, rng)
+    queries = corpus[rng.integers(len(corpus), size=args.queries)] + 0.3 * rng.standard_normal((args.queries, args.dimension))
+    upsert = [{"id": f"doc_{i}", "values": values, "metadata": {"file_path": f"doc_{i}.txt"}}
+              for i, values in enumerate(corpus)]
+
+    variants = [("float32", "float32", False), ("float16", "float16", False)]
+    if hnswlib is not None:
+        variants.append(("float32 + hnsw", "float32", True))
+    else:
+        print("hnswlib is not installed, skipping the HNSW variant")
+
+    print(f"{args.vectors} vectors x {args.dimension}, top {args.top_k}, {args.queries} queries\n")
+    print(f"{'index':<16}{'build s':>9}{'open ms':>9}{'MB':>8}{'ms/query':>10}{'recall':>8}")
+    exact = None
+    with tempfile.TemporaryDirectory() as directory:
+        for name, dtype, hnsw in variants:
+            path = os.path.join(directory, name.replace(" ", ""))
+            start = time.perf_counter()
+            index = LocalVectorIndex(path, dtype=dtype, hnsw=hnsw)
+            index.upsert(upsert)
+            index.save()
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = LocalVectorIndex(path)
+            opened = 1000 * (time.perf_counter() - start)
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2 ** 20
+
+            ms, results = time_queries(index.query, queries, args.top_k)
+            exact = exact or results
+            print(f"{name:<16}{build:>9.2f}{opened:>9.1f}{size:>8.1f}{ms:>10.2f}{recall(results, exact):>8.1%}")
+
+    if args.live:
+        from services.vector_index import open_vector_index
+        os.environ["VECTOR_BACKEND"] = "pinecone"
+        index = open_vector_index(os.getenv("PINECONE_INDEX", "agenticchatbotdb"))
+        namespace = os.getenv("PINECONE_NAMESPACE", "ns1")
+        ms, _ = time_queries(lambda **kwargs: index.query(namespace=namespace, **kwargs), queries, args.top_k)
+        print(f"{'pinecone':<16}{'':>9}{'':>9}{'':>8}{ms:>10.2f}{'-':>8}")
+    else:
+        print("\nPass --live to measure a Pinecone round trip")
+
+if __name__ == "__main__":
+    main()
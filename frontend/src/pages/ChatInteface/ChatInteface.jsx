@@ -201,7 +201,31 @@ const ChatInterface = () => {
         fallbackTimerRef.current = null;
       }
 
-      if (data && data.response) {
+      if (data && data.type === "token") {
+        // Streamed piece of the answer: start the assistant message or append to it
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          if (last && last.isStreaming) {
+            return [...prev.slice(0, -1), { ...last, content: last.content + data.token }];
+          }
+          const messageId = Date.now() + 1;
+          lastMessageRef.current = messageId;
+          return [...prev, { id: messageId, content: data.token, role: "assistant", isStreaming: true }];
+        });
+        setIsLoading(false);
+      } else if (data && data.type === "done") {
+        // End of a streamed answer: replace the streamed text with the full response
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          if (last && last.isStreaming) {
+            return [...prev.slice(0, -1), { id: last.id, content: data.response, role: "assistant" }];
+          }
+          const messageId = Date.now() + 1;
+          lastMessageRef.current = messageId;
+          return [...prev, { id: messageId, content: data.response, role: "assistant" }];
+        });
+        setIsLoading(false);
+      } else if (data && data.response) {
         // Standard response format (original)
         const messageId = Date.now() + 1;
         setMessages((prev) => {
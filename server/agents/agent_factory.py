@@ -0,0 +1,155 @@
+from langchain.chat_models import ChatOpenAI
+from langchain.agents import Tool
+from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate
+from agents.base_agent import BaseAgent
+from agents.curriculum_agent import CurriculumAgent
+from services.embedding_cache import create_embedding_cache
+from agents.locations_agent import LocationsAgent
+from agents.events_agent import EventsAgent
+from agents.function_calling_agent import FunctionCallingAgent
+from agents.router_agent import RouterAgent, ROUTER_TEMPLATE, COMBINE_TEMPLATE
+from agents.token_budget_memory import TokenBudgetMemory
+from agents.routing_classifier import train_default_classifier
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import dotenv
+
+dotenv.load_dotenv()
+
+class AgentFactory:
+    """Builds the session-independent parts of the agent system once and hands out per-session routers"""
+
+    def __init__(self):
+        """
+        Initialize the shared LLM clients, specialized agents, tools and chains
+
+        Nothing built here holds conversation state, so a single factory can serve
+        every session. Each session only brings its own memory (see create_router).
+        """
+        # Shared LLM clients
+        self.llm = ChatOpenAI(
+            temperature=0.2,
+            model_name="gpt-4o-mini",
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        )
+        self.router_llm = ChatOpenAI(
+            temperature=0,  # Low temperature for more deterministic routing
+            model_name="gpt-4o-mini",
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        )
+
+        # Query embeddings reused across sessions (and, with EMBEDDING_CACHE_DB_PATH, across workers)
+        self.embedding_cache = create_embedding_cache()
+
+        # Specialized agents (tools, prompts, executors and the Pinecone handle are built here once)
+        self.curriculum_agent = CurriculumAgent(llm=self.llm, embedding_cache=self.embedding_cache)
+        self.locations_agent = LocationsAgent(llm=self.llm)
+        self.events_agent = EventsAgent(llm=self.llm)
+
+        # Tools used by the general agent when the router cannot decide
+        self.router_tools = [
+            Tool(
+                name="Curriculum Information",
+                func=self.curriculum_agent.answer,
+                description="Use this tool when the query is about courses, classes, majors, curriculum, academic programs, degrees, professors, or any academic information at Duke."
+            ),
+            Tool(
+                name="Location Information",
+                func=self.locations_agent.answer,
+                description="Use this tool when the query is about campus buildings, libraries, dining halls, dorms, directions, maps, facilities, or any physical locations at Duke."
+            ),
+            Tool(
+                name="Event Information",
+                func=self.events_agent.answer,
+                description="Use this tool when the query is about events, schedules, concerts, games, performances, club meetings, conferences, or any time-based activities at Duke."
+            )
+        ]
+        self.fallback_agent = BaseAgent(tools=self.router_tools, llm=self.llm)
+
+        # Local routing classifier, trained on the routing dataset shipped in data/routing
+        self.routing_threshold = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.9"))
+        self.routing_classifier = None
+        if os.getenv("LOCAL_ROUTER", "true").lower() == "true":
+            try:
+                self.routing_classifier = train_default_classifier()
+            except Exception as e:
+                print(f"[WARN] Local router disabled, could not train the routing classifier: {e}")
+
+        # Router and combine chains
+        self.router_prompt = PromptTemplate(
+            input_variables=["chat_history", "query"],
+            template=ROUTER_TEMPLATE
+        )
+        self.router_chain = LLMChain(
+            llm=self.router_llm,
+            prompt=self.router_prompt,
+            verbose=True
+        )
+
+        self.combine_prompt = PromptTemplate(
+            input_variables=["query", "responses"],
+            template=COMBINE_TEMPLATE
+        )
+        self.combine_chain = LLMChain(
+            llm=self.llm,
+            prompt=self.combine_prompt
+        )
+
+        # Pool the specialized agents of multi-domain queries run on, and how long the router waits for them
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("AGENT_POOL_SIZE", "16")),
+            thread_name_prefix="agent"
+        )
+        self.agent_timeout = float(os.getenv("AGENT_TIMEOUT_SECONDS", "60"))
+
+        # AGENT_ENGINE=function_calling answers with native OpenAI tool calling instead of router + ReAct agents
+        self.engine = os.getenv("AGENT_ENGINE", "react")
+        self.function_calling_agent = None
+        if self.engine == "function_calling":
+            self.function_calling_agent = FunctionCallingAgent(self.curriculum_agent, self.executor)
+
+    def create_memory(self) -> TokenBudgetMemory:
+        """
+        Create the memory for a new session
+
+        Returns:
+            A token-budgeted memory that summarizes older turns with the shared router LLM
+        """
+        return TokenBudgetMemory(
+            llm=self.router_llm,
+            memory_key="chat_history",
+            return_messages=True,
+            max_token_limit=int(os.getenv("MEMORY_MAX_TOKENS", "1000")),
+            max_summary_tokens=int(os.getenv("MEMORY_MAX_SUMMARY_TOKENS", "300"))
+        )
+
+    def create_router(self, memory=None) -> RouterAgent:
+        """
+        Create a router agent for a session
+
+        Args:
+            memory: The session's conversation memory
+
+        Returns:
+            A router agent that uses the shared components and the given memory
+        """
+        return RouterAgent(memory=memory or self.create_memory(), factory=self)
+
+_factory = None
+_factory_lock = threading.Lock()
+
+def get_agent_factory() -> AgentFactory:
+    """
+    Get the process-wide agent factory, building it on first use
+
+    Returns:
+        The shared AgentFactory
+    """
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                _factory = AgentFactory()
+    return _factory
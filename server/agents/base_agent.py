@@ -1,53 +1,132 @@
 from langchain.agents import initialize_agent, AgentType
 from langchain.chains.conversation.memory import ConversationBufferMemory
 from langchain.chat_models import ChatOpenAI
+from agents.streaming import FinalAnswerParser, Replacement
+from typing import AsyncIterator
 import os
-import dotenv 
+import dotenv
 
 dotenv.load_dotenv()
 
 class BaseAgent:
     """Base agent class for Duke University chatbot"""
-    
-    def __init__(self, tools=None, memory=None):
+
+    def __init__(self, tools=None, memory=None, llm=None):
         """
         Initialize the base agent
-        
+
         Args:
             tools: List of LangChain tools to use
-            memory: Conversation memory to use
+            memory: Conversation memory to use when the agent is used on its own
+            llm: Optional shared chat model; a new client is created if not provided
         """
         # Initialize LLM
-        self.llm = ChatOpenAI(
+        self.llm = llm or ChatOpenAI(
             temperature=0.2,
             model_name="gpt-4o-mini",  # You can change to your preferred model
             openai_api_key=os.getenv("OPENAI_API_KEY")
         )
-        
+
         # Initialize memory if not provided
         self.memory = memory or ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-        
+
         # Initialize tools
         self.tools = tools or []
-        
+
         # Initialize agent
+        # The executor is not bound to a memory so that a single instance can be
+        # shared by every session; the chat history is passed in on each call instead
         self.agent = initialize_agent(
             tools=self.tools,
             llm=self.llm,
             agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
             verbose=True,
-            memory=self.memory,
             handle_parsing_errors=True
         )
-    
-    def process_query(self, query: str) -> str:
+
+    def answer(self, query: str, chat_history=None) -> str:
+        """
+        Answer a query without reading from or writing to any memory
+
+        Args:
+            query: The user's query string
+            chat_history: Prior messages of the conversation
+
+        Returns:
+            The agent's response
+        """
+        return self.agent.run(input=query, chat_history=chat_history or [])
+
+    async def aanswer(self, query: str, chat_history=None) -> str:
+        """Async version of answer; LLM and tool calls are awaited instead of blocking a thread"""
+        return await self.agent.arun(input=query, chat_history=chat_history or [])
+
+    async def astream_answer(self, query: str, chat_history=None) -> AsyncIterator[str]:
+        """
+        Answer a query, yielding the final answer as the LLM generates it
+
+        Only the agent's own LLM calls are streamed; calls made inside tools are not.
+        The tokens are decoded from the "Final Answer" JSON the agent writes, and any
+        part of the answer that could not be streamed is yielded once the run ends. If
+        the answer does not continue the streamed text, it is yielded whole as a
+        Replacement.
+
+        Args:
+            query: The user's query string
+            chat_history: Prior messages of the conversation
+
+        Yields:
+            Pieces of the agent's response
+        """
+        inputs = {"input": query, "chat_history": chat_history or []}
+        tool_runs = set()
+        parsers = {}
+        streamed = ""
+        output = None
+
+        async for event in self.agent.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            if kind == "on_tool_start":
+                tool_runs.add(event["run_id"])
+            elif kind == "on_chat_model_start" and not tool_runs.intersection(event["parent_ids"]):
+                parsers[event["run_id"]] = FinalAnswerParser()
+            elif kind == "on_chat_model_stream" and event["run_id"] in parsers:
+                text = parsers[event["run_id"]].feed(event["data"]["chunk"].content)
+                if text:
+                    streamed += text
+                    yield text
+            elif kind == "on_chain_end" and not event["parent_ids"]:
+                output = event["data"]["output"]["output"]
+
+        # Answers that were not written as streamable JSON (e.g. recovered parsing errors)
+        if output is None or output == streamed:
+            return
+        if output.startswith(streamed):
+            yield output[len(streamed):]
+        else:
+            yield Replacement(output)
+
+    def process_query(self, query: str, memory=None) -> str:
         """
         Process a user query
-        
+
         Args:
             query: The user's query string
-            
+            memory: Conversation memory to use instead of the agent's own memory
+
         Returns:
             The agent's response
         """
-        return self.agent.run(query)
\ No newline at end of file
+        memory = memory or self.memory
+        chat_history = memory.load_memory_variables({})[memory.memory_key]
+        response = self.answer(query, chat_history)
+        memory.save_context({"input": query}, {"output": response})
+        return response
+
+    async def aprocess_query(self, query: str, memory=None) -> str:
+        """Async version of process_query"""
+        memory = memory or self.memory
+        chat_history = memory.load_memory_variables({})[memory.memory_key]
+        response = await self.aanswer(query, chat_history)
+        await memory.asave_context({"input": query}, {"output": response})
+        return response
@@ -0,0 +1,78 @@
+from agents.token_budget_memory import tokenizer, count_tokens
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+import re
+
+# A chunk that doesn't fit is cut down to the remaining budget only if at least this much is left
+MIN_PARTIAL_TOKENS = 128
+
+def source_label(chunk: Dict[str, Any]) -> str:
+    """Readable name of the page a chunk came from"""
+    file_path = chunk.get("file_path")
+    return Path(file_path).stem.replace("_", " ") if file_path else chunk["source"]
+
+def pack_context(chunks: Sequence[Dict[str, Any]], token_budget: int) -> Tuple[List[str], int]:
+    """
+    Select retrieved chunks that fit in a token budget and lay them out by source
+
+    Chunks are taken best match first. Duplicates (the same text, or text already
+    contained in a selected chunk, as with navigation and footer paragraphs repeated
+    across scraped pages) are skipped, and a chunk that doesn't fit is skipped in favor
+    of smaller ones, or truncated when enough budget is left. The selected chunks are
+    grouped by source page, pages ordered by their best match and chunks in page order,
+    so the model reads each page's passages in context.
+
+    Args:
+        chunks: Dicts with "text", "score", "source", "chunk_index" and optional "file_path",
+            sorted by decreasing score
+        token_budget: Maximum number of context tokens
+
+    Returns:
+        One context block per source page, and the number of tokens used
+    """
+    selected = []
+    seen = set()
+    used = 0
+    for chunk in chunks:
+        text = chunk["text"].strip()
+        normalized = re.sub(r"\s+", " ", text).lower()
+        if not normalized or normalized in seen or any(normalized in other for other in seen):
+            continue
+
+        tokens = count_tokens(text)
+        remaining = token_budget - used
+        if tokens > remaining:
+            if remaining < MIN_PARTIAL_TOKENS:
+                continue
+            text = tokenizer.decode(tokenizer.encode(text)[:remaining])
+            tokens = remaining
+
+        seen.add(normalized)
+        selected.append({**chunk, "text": text})
+        used += tokens
+        if used >= token_budget:
+            break
+
+    return group_by_document(selected), used
+
+def group_by_document(chunks: Sequence[Dict[str, Any]]) -> List[str]:
+    """
+    Lay out chunks as one context block per source page
+
+    Pages are ordered by their best chunk and chunks by their position in the page.
+
+    Args:
+        chunks: Chunk dicts as taken by pack_context, sorted by decreasing score
+
+    Returns:
+        One "[Source: page]" block per page
+    """
+    sources: Dict[str, List[Dict[str, Any]]] = {}
+    for chunk in chunks:
+        sources.setdefault(chunk["source"], []).append(chunk)
+    blocks = []
+    for source_chunks in sources.values():
+        source_chunks.sort(key=lambda chunk: chunk["chunk_index"])
+        body = "\n\n".join(chunk["text"].strip() for chunk in source_chunks)
+        blocks.append(f"[Source: {source_label(source_chunks[0])}]\n{body}")
+    return blocks
@@ -1,9 +1,15 @@
 import os
+import asyncio
+from functools import lru_cache
 from agents.base_agent import BaseAgent
+from agents.streaming import astream_llm
+from agents.context_packing import group_by_document, pack_context
 from tools.duke_api_tools import get_curriculum_tools
 from langchain.chains.conversation.memory import ConversationBufferMemory
-from pinecone import Pinecone
-from openai import OpenAI
+from services.vector_index import open_vector_index
+from services.document_store import DocumentStore, document_store_path
+from services.lexical_index import LexicalIndex, lexical_index_path, reciprocal_rank_fusion
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -11,30 +17,71 @@ from pathlib import Path
 env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
-PINECONE = os.getenv("PINECONE_API_KEY")
 ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT", "us-east-1")
 INDEX_NAME = os.getenv("PINECONE_INDEX", "agenticchatbotdb")
+EMBEDDING_MODEL = "text-embedding-ada-002"
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "12"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # "vector", "lexical" (no network calls) or "hybrid"
+FILE_CACHE_SIZE = int(os.getenv("CURRICULUM_FILE_CACHE_SIZE", "256"))  # Scraped files kept by the fallback path
 
-pc = Pinecone(api_key=PINECONE)
+@lru_cache(maxsize=FILE_CACHE_SIZE)
+def read_scraped_file(rel_path: str) -> str:
+    """
+    Read a scraped file by its path relative to the agents directory
+
+    Only used for vectors ingested before the document store existed. The most
+    recently read FILE_CACHE_SIZE files are kept, for every session of the process.
+    A failed read raises, so it is not cached and the file is read again next time.
+
+    Returns:
+        The file's text
+    """
+    agent_dir = Path(__file__).resolve().parent
+    with open((agent_dir / rel_path).resolve(), 'r', encoding='utf-8') as f:
+        return f.read()
 
 class CurriculumAgent(BaseAgent):
     """Agent specialized for curriculum-related queries"""
     
-    def __init__(self, memory=None):
+    def __init__(self, memory=None, llm=None, embedding_cache=None,
+                 retrieval_top_k=RETRIEVAL_TOP_K, context_token_budget=CONTEXT_TOKEN_BUDGET,
+                 retrieval_mode=RETRIEVAL_MODE):
         """
         Initialize a curriculum agent with appropriate tools
         
         Args:
             memory: Optional conversation memory
+            llm: Optional shared chat model
+            embedding_cache: Optional EmbeddingCache for query embeddings
+            retrieval_top_k: Number of chunks retrieved per query
+            context_token_budget: Maximum context tokens in the prompt (0 pastes every match in full)
+            retrieval_mode: "vector" (embeddings), "lexical" (BM25 only) or "hybrid" (both, fused by rank)
         """
         # Get curriculum tools
         curriculum_tools = get_curriculum_tools()
 
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.index = pc.Index(INDEX_NAME)
+        self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # BM25 index over the same chunks, for exact terms like course codes that embeddings miss
+        self.lexical_index = LexicalIndex(lexical_index_path())
+        self.retrieval_mode = retrieval_mode
+        if retrieval_mode != "vector" and not len(self.lexical_index):
+            print(f"[WARN] The lexical index at {self.lexical_index.path} is empty, retrieving with embeddings only")
+            self.retrieval_mode = "vector"
+
+        # Pinecone, or the local index when VECTOR_BACKEND=local; not opened at all for lexical retrieval
+        self.index = open_vector_index(INDEX_NAME) if self.retrieval_mode != "lexical" else None
+        self.embedding_cache = embedding_cache
+
+        # Texts of the indexed documents, memory-mapped once and looked up by vector id
+        self.document_store = DocumentStore(document_store_path())
+
+        self.retrieval_top_k = retrieval_top_k
+        self.context_token_budget = context_token_budget
         
         # Initialize the base agent with curriculum tools
-        super().__init__(tools=curriculum_tools, memory=memory)
+        super().__init__(tools=curriculum_tools, memory=memory, llm=llm)
         
         # Add Duke University-specific system message
         system_message = """
@@ -49,41 +96,115 @@ class CurriculumAgent(BaseAgent):
         self.agent.agent.llm_chain.prompt.messages[0].prompt.template = system_message
 
     def embed_text(self, text: str) -> list:
+        if self.embedding_cache is not None:
+            return self.embedding_cache.embed(EMBEDDING_MODEL, text, self._embed_text)
+        return self._embed_text(text)
+    
+    async def aembed_text(self, text: str) -> list:
+        if self.embedding_cache is not None:
+            return await self.embedding_cache.aembed(EMBEDDING_MODEL, text, self._aembed_text)
+        return await self._aembed_text(text)
+
+    def _embed_text(self, text: str) -> list:
         response = self.client.embeddings.create(
             input=[text],
-            model="text-embedding-ada-002"
+            model=EMBEDDING_MODEL
         )
         return response.data[0].embedding
-    
-    def retrieve_context(self, query, top_k = 3):
-        embedding = self.embed_text(query)
-        response = self.index.query(
-            vector=embedding,
-            top_k=top_k,
-            include_metadata=True,
-            namespace=os.getenv("PINECONE_NAMESPACE", "ns1")
+
+    async def _aembed_text(self, text: str) -> list:
+        response = await self.async_client.embeddings.create(
+            input=[text],
+            model=EMBEDDING_MODEL
         )
+        return response.data[0].embedding
+    
+    def retrieve_context(self, query, top_k=None):
+        top_k = top_k or self.retrieval_top_k
+        responses = []
+        if self.retrieval_mode != "lexical":
+            embedding = self.embed_text(query)
+            responses.append(self.index.query(
+                vector=embedding,
+                top_k=top_k,
+                include_metadata=True,
+                namespace=os.getenv("PINECONE_NAMESPACE", "ns1")
+            ))
+        if self.retrieval_mode != "vector":
+            responses.append(self.lexical_index.query(query, top_k=top_k, include_metadata=True))
+        return self.pack_matches(self.fuse(responses, top_k))
+
+    async def aretrieve_context(self, query, top_k=None):
+        top_k = top_k or self.retrieval_top_k
+        responses = []
+        if self.retrieval_mode != "lexical":
+            embedding = await self.aembed_text(query)
+            # Both vector index clients are synchronous, so the query runs in the default executor
+            responses.append(await asyncio.to_thread(
+                self.index.query,
+                vector=embedding,
+                top_k=top_k,
+                include_metadata=True,
+                namespace=os.getenv("PINECONE_NAMESPACE", "ns1")
+            ))
+        if self.retrieval_mode != "vector":
+            # Local and sub-millisecond, so it runs inline
+            responses.append(self.lexical_index.query(query, top_k=top_k, include_metadata=True))
+        return self.pack_matches(self.fuse(responses, top_k))
 
-        contents = []
+    def fuse(self, responses, top_k):
+        """Merge the vector and lexical matches by reciprocal rank fusion (a single response is used as is)"""
+        if len(responses) == 1:
+            return responses[0]
+        return reciprocal_rank_fusion(*responses, top_k=top_k)
+
+    def read_matches(self, response):
+        """
+        Get the text of each match
+
+        Returns:
+            Chunk dicts (text, score, source page and position in it), best match first
+        """
+        chunks = []
         for match in response["matches"]:
-            rel_path = match["metadata"].get("file_path")
-            if rel_path:
-                agent_dir = Path(__file__).resolve().parent
-                abs_path = (agent_dir / rel_path).resolve()
-
-                if abs_path.exists():
-                    try:
-                        with open(abs_path, 'r', encoding='utf-8') as f:
-                            contents.append(f.read())
-                    except Exception as e:
-                        print(f"[ERROR] Reading {abs_path}: {e}")
-                else:
-                    print(f"[WARN] File not found: {abs_path}")
-
-        return contents
+            metadata = match["metadata"] or {}
+            text = self.document_store.get(match["id"])
+            if text is None:
+                text = self.read_file(metadata.get("file_path"))
+                # A chunk vector locates its text in the page; a whole-file vector uses all of it
+                if text and "char_start" in metadata:
+                    text = text[int(metadata["char_start"]):int(metadata["char_end"])]
+            if text:
+                chunks.append({
+                    "text": text,
+                    "score": match["score"],
+                    # Vectors indexed before chunking cover a whole file
+                    "source": metadata.get("doc_id", match["id"]),
+                    "chunk_index": int(metadata.get("chunk_index", 0)),
+                    "file_path": metadata.get("file_path"),
+                })
+        return chunks
+
+    def pack_matches(self, response):
+        """Fit the retrieved chunks into the context token budget (if any), grouped by source page"""
+        chunks = self.read_matches(response)
+        if not self.context_token_budget:
+            return group_by_document(chunks)
+        return pack_context(chunks, self.context_token_budget)[0]
+
+    def read_file(self, rel_path):
+        """Read a scraped file by its path relative to the agents directory (see read_scraped_file)"""
+        if not rel_path:
+            return None
+        try:
+            return read_scraped_file(rel_path)
+        except FileNotFoundError as e:
+            print(f"[WARN] File not found: {e.filename} (re-run the ingestion to fill the document store)")
+        except Exception as e:
+            print(f"[ERROR] Reading {rel_path}: {e}")
+        return None
     
-    def process_query(self, query: str) -> str:
-        contexts = self.retrieve_context(query)
+    def build_prompt(self, query: str, contexts) -> str:
         context_str = "\n\n".join(contexts)
 
         prompt = f"""
@@ -97,5 +218,17 @@ class CurriculumAgent(BaseAgent):
 
         Answer:
         """
-        
-        return self.llm.predict(prompt)
\ No newline at end of file
+        return prompt
+
+    def answer(self, query: str, chat_history=None) -> str:
+        contexts = self.retrieve_context(query)
+        return self.llm.predict(self.build_prompt(query, contexts))
+
+    async def aanswer(self, query: str, chat_history=None) -> str:
+        contexts = await self.aretrieve_context(query)
+        return await self.llm.apredict(self.build_prompt(query, contexts))
+
+    async def astream_answer(self, query: str, chat_history=None):
+        contexts = await self.aretrieve_context(query)
+        async for token in astream_llm(self.llm, self.build_prompt(query, contexts)):
+            yield token
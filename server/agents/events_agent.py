@@ -5,12 +5,13 @@ from langchain.chains.conversation.memory import ConversationBufferMemory
 class EventsAgent(BaseAgent):
     """Agent specialized for events-related queries"""
     
-    def __init__(self, memory=None):
+    def __init__(self, memory=None, llm=None):
         """
         Initialize an event agent with appropriate tools
         
         Args:
             memory: Optional conversation memory
+            llm: Optional shared chat model
         """
         
         # Get events tools
@@ -18,7 +19,7 @@ class EventsAgent(BaseAgent):
         
         
         # Initialize the base agent with curriculum tools
-        super().__init__(tools=events_tools, memory=memory)
+        super().__init__(tools=events_tools, memory=memory, llm=llm)
 
         print('\nInitializing EventsAgent...')
         
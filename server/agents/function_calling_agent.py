@@ -0,0 +1,235 @@
+from langchain.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from tools.duke_api_tools import get_curriculum_tools, get_location_tools, get_events_tools
+from openai import OpenAI, AsyncOpenAI
+from pydantic import BaseModel, Field
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
+import asyncio
+import json
+import os
+import time
+
+SYSTEM_PROMPT = """
+        You are an AI assistant for Duke University, helping incoming students and students considering applying to Duke.
+        You answer questions about Duke's academic programs and courses, its campus buildings, dining and facilities, and events happening at Duke.
+        Use the tools to look up what you need before answering. When a question spans several of these areas, call all the tools you need at once.
+        Use search_duke_documents for questions about degree programs (curriculum, tuition, admissions, duration, career outcomes),
+        the course tools for specific courses, the place tools for locations on campus, and the events tool for anything happening at Duke.
+        Always be informative, helpful, and concise in your responses.
+        When you don't know the answer, suggest consulting Duke's official resources or contacting the appropriate department.
+        """
+
+# LangChain message types to OpenAI chat roles
+ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+class DocumentSearchInput(BaseModel):
+    query: str = Field(description="What to look up, e.g. 'AI MEng tuition' or 'MIDS career outcomes'")
+
+class SearchDukeDocumentsTool(BaseTool):
+    name: str = "search_duke_documents"
+    description: str = (
+        "Search the pages scraped from Duke's program websites (Pratt masters programs, the graduate school and undergraduate admissions). "
+        "Use this for questions about degree programs such as the AI MEng: curriculum, tuition, admissions, duration and career outcomes."
+    )
+    args_schema: Type[BaseModel] = DocumentSearchInput
+    curriculum_agent: Any = None  # Provides the Pinecone retrieval
+
+    def _run(self, query: str) -> str:
+        return "\n\n".join(self.curriculum_agent.retrieve_context(query))
+
+    async def _arun(self, query: str) -> str:
+        return "\n\n".join(await self.curriculum_agent.aretrieve_context(query))
+
+class FunctionCallingAgent:
+    """
+    Agent that answers with OpenAI native tool calling instead of the router and ReAct agents
+
+    Every Duke API tool and the document search are offered to the model in a single
+    request, so routing and tool selection happen in the same call, and tool arguments
+    come back as structured JSON rather than text that has to be parsed. Tool calls
+    requested together are run concurrently. Like the specialized agents, it holds no
+    conversation state and is shared by all sessions.
+    """
+
+    def __init__(self, curriculum_agent, executor, model: str = "gpt-4o-mini", temperature: float = 0.2,
+                 max_iterations: int = 5, max_tool_output_chars: int = 12000):
+        """
+        Args:
+            curriculum_agent: The curriculum agent, whose Pinecone retrieval backs search_duke_documents
+            executor: Thread pool used to run tool calls concurrently
+            model: The OpenAI chat model
+            temperature: Sampling temperature
+            max_iterations: Maximum number of tool-calling rounds before the model must answer
+            max_tool_output_chars: Tool results are truncated to this length before being sent to the model
+        """
+        tools = [SearchDukeDocumentsTool(curriculum_agent=curriculum_agent)]
+        tools += get_curriculum_tools() + get_location_tools() + get_events_tools()
+        self.tools = {tool.name: tool for tool in tools}
+        self.tool_schemas = [convert_to_openai_tool(tool) for tool in tools]
+
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.executor = executor
+        self.model = model
+        self.temperature = temperature
+        self.max_iterations = max_iterations
+        self.max_tool_output_chars = max_tool_output_chars
+
+    def build_messages(self, query: str, chat_history=None) -> List[Dict[str, Any]]:
+        """
+        Build the chat messages for a query
+
+        Args:
+            query: The user's query
+            chat_history: Prior LangChain messages of the conversation
+
+        Returns:
+            OpenAI chat messages: system prompt, history, then the query
+        """
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        for message in chat_history or []:
+            messages.append({"role": ROLES.get(message.type, "user"), "content": message.content})
+        messages.append({"role": "user", "content": query})
+        return messages
+
+    def request(self, messages: List[Dict[str, Any]], final: bool = False) -> Dict[str, Any]:
+        """Arguments of a chat completion request; the final request must answer without calling tools"""
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "messages": messages,
+            "tools": self.tool_schemas,
+            "tool_choice": "none" if final else "auto",
+        }
+
+    def format_result(self, result) -> str:
+        text = result if isinstance(result, str) else json.dumps(result, default=str)
+        if len(text) > self.max_tool_output_chars:
+            text = text[:self.max_tool_output_chars] + " ...(truncated)"
+        return text
+
+    def run_tool(self, name: str, arguments: str) -> str:
+        """
+        Run a tool requested by the model
+
+        Args:
+            name: The tool name
+            arguments: The JSON-encoded arguments
+
+        Returns:
+            The tool result as text; errors are returned to the model rather than raised
+        """
+        tool = self.tools.get(name)
+        if tool is None:
+            return json.dumps({"error": f"Unknown tool: {name}"})
+        try:
+            return self.format_result(tool.invoke(json.loads(arguments or "{}")))
+        except Exception as e:
+            print(f"[ERROR] Running tool {name}: {e}")
+            return json.dumps({"error": str(e)})
+
+    async def arun_tool(self, name: str, arguments: str) -> str:
+        """Async version of run_tool"""
+        tool = self.tools.get(name)
+        if tool is None:
+            return json.dumps({"error": f"Unknown tool: {name}"})
+        try:
+            return self.format_result(await tool.ainvoke(json.loads(arguments or "{}")))
+        except Exception as e:
+            print(f"[ERROR] Running tool {name}: {e}")
+            return json.dumps({"error": str(e)})
+
+    def _record_call(self, metadata: Dict[str, Any], start: float):
+        metadata["llm_calls"] += 1
+        metadata["llm_ms"].append(round(1000 * (time.perf_counter() - start), 1))
+
+    def _append_tool_results(self, messages, metadata, tool_calls, results):
+        for tool_call, result in zip(tool_calls, results):
+            messages.append({"role": "tool", "tool_call_id": tool_call["id"], "content": result})
+            metadata["tool_calls"].append(tool_call["function"]["name"])
+
+    def answer(self, query: str, chat_history=None, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Answer a query, calling tools as the model requests them
+
+        Args:
+            query: The user's query
+            chat_history: Prior messages of the conversation
+            metadata: Optional dict that receives the number and latency of LLM calls and the tools used
+
+        Returns:
+            The model's answer
+        """
+        metadata = metadata if metadata is not None else {}
+        metadata.update(engine="function_calling", llm_calls=0, llm_ms=[], tool_calls=[])
+        messages = self.build_messages(query, chat_history)
+
+        for iteration in range(self.max_iterations + 1):
+            start = time.perf_counter()
+            response = self.client.chat.completions.create(**self.request(messages, final=iteration == self.max_iterations))
+            self._record_call(metadata, start)
+
+            message = response.choices[0].message
+            if not message.tool_calls:
+                return message.content or ""
+
+            tool_calls = [tool_call.model_dump() for tool_call in message.tool_calls]
+            messages.append({"role": "assistant", "content": message.content, "tool_calls": tool_calls})
+            results = list(self.executor.map(
+                lambda tool_call: self.run_tool(tool_call["function"]["name"], tool_call["function"]["arguments"]),
+                tool_calls
+            ))
+            self._append_tool_results(messages, metadata, tool_calls, results)
+
+    async def aanswer(self, query: str, chat_history=None, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Async version of answer"""
+        parts = []
+        async for token in self.astream_answer(query, chat_history, metadata):
+            parts.append(token)
+        return "".join(parts)
+
+    async def astream_answer(self, query: str, chat_history=None, metadata: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Answer a query, yielding the answer as the model generates it
+
+        Tool calls arrive as streamed fragments too; they are assembled and run
+        (concurrently) before the next request.
+        """
+        metadata = metadata if metadata is not None else {}
+        metadata.update(engine="function_calling", llm_calls=0, llm_ms=[], tool_calls=[])
+        messages = self.build_messages(query, chat_history)
+
+        for iteration in range(self.max_iterations + 1):
+            start = time.perf_counter()
+            stream = await self.async_client.chat.completions.create(
+                **self.request(messages, final=iteration == self.max_iterations), stream=True
+            )
+
+            content = []
+            tool_calls = {}
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content.append(delta.content)
+                    yield delta.content
+                for fragment in delta.tool_calls or []:
+                    tool_call = tool_calls.setdefault(fragment.index, {"id": "", "type": "function",
+                                                                       "function": {"name": "", "arguments": ""}})
+                    tool_call["id"] = fragment.id or tool_call["id"]
+                    if fragment.function:
+                        tool_call["function"]["name"] += fragment.function.name or ""
+                        tool_call["function"]["arguments"] += fragment.function.arguments or ""
+            self._record_call(metadata, start)
+
+            if not tool_calls:
+                return
+
+            tool_calls = [tool_calls[index] for index in sorted(tool_calls)]
+            messages.append({"role": "assistant", "content": "".join(content) or None, "tool_calls": tool_calls})
+            results = await asyncio.gather(*(
+                self.arun_tool(tool_call["function"]["name"], tool_call["function"]["arguments"])
+                for tool_call in tool_calls
+            ))
+            self._append_tool_results(messages, metadata, tool_calls, results)
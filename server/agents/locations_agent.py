@@ -5,18 +5,19 @@ from langchain.chains.conversation.memory import ConversationBufferMemory
 class LocationsAgent(BaseAgent):
     """Agent specialized for Duke location-related queries"""
     
-    def __init__(self, memory=None):
+    def __init__(self, memory=None, llm=None):
         """
         Initialize a locations agent with appropriate tools
         
         Args:
             memory: Optional conversation memory
+            llm: Optional shared chat model
         """
         # Get location tools
         location_tools = get_location_tools()
         
         # Initialize the base agent with location tools
-        super().__init__(tools=location_tools, memory=memory)
+        super().__init__(tools=location_tools, memory=memory, llm=llm)
         
         # Add Duke University-specific system message for locations
         system_message = """
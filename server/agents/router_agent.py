@@ -1,80 +1,29 @@
 from langchain.chains.conversation.memory import ConversationBufferMemory
-from langchain.chat_models import ChatOpenAI
-from langchain.agents import Tool
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from typing import List, Dict, Any
-from agents.curriculum_agent import CurriculumAgent
-from agents.locations_agent import LocationsAgent
-from agents.events_agent import EventsAgent
-from agents.base_agent import BaseAgent
-import os 
-import dotenv
+from agents.streaming import append_piece, astream_llm
+from concurrent.futures import wait
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import time
 import re
 
-dotenv.load_dotenv()
-
-class RouterAgent(BaseAgent):
-    """Router agent that directs queries to the appropriate specialized agent"""
-    
-    def __init__(self, memory=None):
-        """
-        Initialize the router agent
-        
-        Args:
-            memory: Conversation memory to use
-        """
-        # Initialize specialized agents (they'll share the same memory)
-        self.memory = memory or ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-        self.curriculum_agent = CurriculumAgent(memory=self.memory)
-        self.locations_agent = LocationsAgent(memory=self.memory)
-        self.events_agent = EventsAgent(memory=self.memory)
-        
-        # Create tools for the router
-        self.tools = [
-            Tool(
-                name="Curriculum Information",
-                func=self.curriculum_agent.process_query,
-                description="Use this tool when the query is about courses, classes, majors, curriculum, academic programs, degrees, professors, or any academic information at Duke."
-            ),
-            Tool(
-                name="Location Information",
-                func=self.locations_agent.process_query,
-                description="Use this tool when the query is about campus buildings, libraries, dining halls, dorms, directions, maps, facilities, or any physical locations at Duke."
-            ),
-            Tool(
-                name="Event Information",
-                func=self.events_agent.process_query,
-                description="Use this tool when the query is about events, schedules, concerts, games, performances, club meetings, conferences, or any time-based activities at Duke."
-            )
-        ]
-        
-        # Initialize the router's LLM
-        self.llm = ChatOpenAI(
-            temperature=0,  # Low temperature for more deterministic routing
-            model_name="gpt-4o-mini",
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Create a prompt template for the router
-        router_template = """
+ROUTER_TEMPLATE = """
         You are a router for a Duke University information system. Your job is to analyze a user query and determine which specialized agent should handle it.
-        
+
         The available agents are:
         1. Curriculum Information Agent: For queries about courses, classes, majors, academic programs, degrees, professors, or any academic information.
         2. Location Information Agent: For queries about campus buildings, libraries, dining halls, dorms, directions, maps, facilities, or any physical locations.
         3. Event Information Agent: For queries about events, schedules, concerts, games, performances, club meetings, conferences, or any time-based activities.
-        
+
         Chat History:
         {chat_history}
-        
+
         User Query: {query}
-        
+
         Think about which agent or agents would be best suited to answer this query. If the query might require information from multiple domains, list all relevant agents.
-        
+
         First, analyze the query and identify the key information needs.
         Then, determine which agent(s) would be most appropriate.
-        
+
         Your response should be one of:
         - "curriculum": For purely academic/curriculum questions
         - "locations": For purely location-based questions
@@ -86,137 +35,494 @@ class RouterAgent(BaseAgent):
 
         Make sure that the responses would end in the following way ***agent_name*** for example if using one agent it would be
         ***curriculum*** or if using multiple agents it would be ***curriculum,locations***
-        
+
         Agent(s):
         """
-        
-        self.router_prompt = PromptTemplate(
-            input_variables=["chat_history", "query"],
-            template=router_template
-        )
-        
-        self.router_chain = LLMChain(
-            llm=self.llm,
-            prompt=self.router_prompt,
-            verbose=True
-        )
-        
-        # Call the parent constructor with our tools
-        super().__init__(tools=self.tools, memory=self.memory)
-    
+
+COMBINE_TEMPLATE = """
+        You need to combine information from multiple specialized agents to answer the user's query.
+
+        User Query: {query}
+
+        Agent Responses:
+        {responses}
+
+        Please synthesize this information into a single, coherent response that addresses all aspects of the user's query.
+        Avoid redundancy and present the information in a natural, conversational way without mentioning that it came from different agents.
+        """
+
+AGENT_LABELS = {
+    "curriculum": "Curriculum Info",
+    "locations": "Location Info",
+    "events": "Event Info",
+}
+
+def timed_call(func, *args) -> Tuple[Any, Optional[Exception], float]:
+    """
+    Call a function and time it, capturing any exception
+
+    Returns:
+        (result, error, seconds), with result None if the call raised
+    """
+    start = time.perf_counter()
+    try:
+        return func(*args), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+async def atimed_call(coro, timeout: Optional[float]) -> Tuple[Any, Optional[Exception], float]:
+    """Async version of timed_call that also gives up after timeout seconds (None to wait indefinitely)"""
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout), None, time.perf_counter() - start
+    except asyncio.TimeoutError:
+        return None, TimeoutError(f"timed out after {timeout:g}s"), time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+def parse_routing(routing: str, query: str) -> List[str]:
+    """
+    Turn the router's answer into the names of the agents to run
+
+    Args:
+        routing: The router LLM's response, ending in ***agent_name(s)***
+        query: The user's query, used for a keyword fallback
+
+    Returns:
+        Agent names in routing order, or an empty list if no agent fits
+    """
+    match = re.search(r"\*\*\*(.*?)\*\*\*", routing)
+    agents_str = match.group(1) if match else routing
+
+    agent_names = []
+    for agent_name in agents_str.split(','):
+        agent_name = agent_name.strip()
+        if agent_name in AGENT_LABELS and agent_name not in agent_names:
+            agent_names.append(agent_name)
+    if agent_names:
+        return agent_names
+
+    # Default to using the most appropriate agent based on keywords
+    query_lower = query.lower()
+    if any(word in query_lower for word in ["class", "course", "major", "degree", "professor"]):
+        return ["curriculum"]
+    elif any(word in query_lower for word in ["where", "building", "location", "dorm", "hall"]):
+        return ["locations"]
+    elif any(word in query_lower for word in ["when", "event", "schedule", "game", "concert"]):
+        return ["events"]
+    return []
+
+class RouterAgent:
+    """Router agent that directs queries to the appropriate specialized agent"""
+
+    def __init__(self, memory=None, factory=None):
+        """
+        Initialize the router agent for a single session
+
+        The specialized agents, LLM clients, chains and tools are built once per
+        process by the agent factory and shared; the router itself only owns the
+        session's memory, so creating one is cheap.
+
+        Args:
+            memory: Conversation memory to use
+            factory: The AgentFactory holding the shared components (defaults to the process-wide one)
+        """
+        if factory is None:
+            from agents.agent_factory import get_agent_factory
+            factory = get_agent_factory()
+
+        self.memory = memory or ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+
+        # Shared specialized agents (they receive this session's chat history on each call)
+        self.curriculum_agent = factory.curriculum_agent
+        self.locations_agent = factory.locations_agent
+        self.events_agent = factory.events_agent
+        self.fallback_agent = factory.fallback_agent
+
+        # Shared chains
+        self.llm = factory.llm
+        self.router_chain = factory.router_chain
+        self.combine_chain = factory.combine_chain
+
+        # Single-call tool-calling engine that replaces routing and the specialized agents when enabled
+        self.function_calling_agent = factory.function_calling_agent
+
+        # Local routing model; the LLM router is only called below the confidence threshold
+        self.routing_classifier = factory.routing_classifier
+        self.routing_threshold = factory.routing_threshold
+
+        # Specialized agents of multi-domain queries run concurrently on the shared pool
+        self.executor = factory.executor
+        self.agent_timeout = factory.agent_timeout
+
+    def get_chat_history(self):
+        """
+        Get the chat history to pass to the specialized agents
+
+        Returns:
+            The messages stored in the session memory
+        """
+        return self.memory.load_memory_variables({})[self.memory.memory_key]
+
     def route_query(self, query: str) -> str:
         """
         Route a query to the appropriate agent(s)
-        
+
         Args:
             query: The user's query
-            
+
         Returns:
             The routing decision
         """
-        # Get chat history from memory
+        # Get chat history from memory as plain text (the summary plus the recent turns)
         chat_history = ""
-        if hasattr(self.memory, "buffer"):
-            chat_history = self.memory.buffer
-        
+        if hasattr(self.memory, "buffer_as_str"):
+            chat_history = self.memory.buffer_as_str
+
         # Run the router chain
         response = self.router_chain.run(query=query, chat_history=chat_history)
-        
+
         # Clean up response
         return response.strip().lower()
-    
+
+    async def aroute_query(self, query: str) -> str:
+        """Async version of route_query"""
+        chat_history = ""
+        if hasattr(self.memory, "buffer_as_str"):
+            chat_history = self.memory.buffer_as_str
+
+        response = await self.router_chain.arun(query=query, chat_history=chat_history)
+        return response.strip().lower()
+
+    def classify_query(self, query: str, metadata: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Route a query with the local classifier
+
+        Args:
+            query: The user's query
+            metadata: The query's metadata, where the classifier's confidence is recorded
+
+        Returns:
+            The agent names, or None if the classifier is not confident enough
+        """
+        if self.routing_classifier is None:
+            return None
+
+        agent_names, confidence = self.routing_classifier.predict(query)
+        metadata["router_confidence"] = round(confidence, 3)
+        if confidence < self.routing_threshold:
+            return None
+
+        print(f"Local router decision: {','.join(agent_names)} (confidence {confidence:.2f})")
+        return agent_names
+
+    def select_agents(self, query: str, metadata: Dict[str, Any]) -> List[str]:
+        """
+        Decide which agents handle a query, calling the LLM router only when the local classifier is unsure
+
+        Args:
+            query: The user's query
+            metadata: The query's metadata, where the routing decision and latency are recorded
+
+        Returns:
+            Agent names in routing order, or an empty list for the general agent
+        """
+        start = time.perf_counter()
+        agent_names = self.classify_query(query, metadata)
+        metadata["router"] = "local"
+
+        if agent_names is None:
+            # Get the routing decision
+            routing = self.route_query(query)
+            metadata["router"] = "llm"
+
+            # Log the routing decision
+            print(f"Router decision: {routing}")
+            agent_names = parse_routing(routing, query)
+
+        metadata["routing_ms"] = round(1000 * (time.perf_counter() - start), 1)
+        metadata["routed_to"] = agent_names
+        return agent_names
+
+    async def aselect_agents(self, query: str, metadata: Dict[str, Any]) -> List[str]:
+        """Async version of select_agents"""
+        start = time.perf_counter()
+        agent_names = self.classify_query(query, metadata)
+        metadata["router"] = "local"
+
+        if agent_names is None:
+            routing = await self.aroute_query(query)
+            metadata["router"] = "llm"
+            print(f"Router decision: {routing}")
+            agent_names = parse_routing(routing, query)
+
+        metadata["routing_ms"] = round(1000 * (time.perf_counter() - start), 1)
+        metadata["routed_to"] = agent_names
+        return agent_names
+
     def process_query(self, query: str) -> str:
         """
         Process a user query by routing to the appropriate agent(s)
-        
+
         Args:
             query: The user's query
-            
+
         Returns:
             The agent's response
         """
-        # Get the routing decision
-        routing = self.route_query(query)
-        
-        # Log the routing decision
-        print(f"Router decision: {routing}")
-        
-        match = re.search(r"\*\*\*(.*?)\*\*\*", routing)
-        if match:
-            agents_str = match.group(1)
-            routing = [agent.strip() for agent in agents_str.split(',')]
-        
-        # If multiple agents are needed, combine their responses
-        if len(routing) > 1:
-            agents_to_use = routing.split(",")
-            responses = []
-            
-            for agent_name in agents_to_use:
-                agent_name = agent_name.strip()
-                
-                if agent_name == "curriculum":
-                    responses.append(f"[Curriculum Info] {self.curriculum_agent.process_query(query)}")
-                elif agent_name == "locations":
-                    responses.append(f"[Location Info] {self.locations_agent.process_query(query)}")
-                elif agent_name == "events":
-                    responses.append(f"[Event Info] {self.events_agent.process_query(query)}")
-            
-            # Combine responses using another LLM call to ensure coherence
-            return self.combine_responses(query, responses)
-        
-        
-        # Otherwise, route to a single agent
-        if routing[0] == "curriculum":
-            response = self.curriculum_agent.process_query(query)
-            print('\n\nresponse from the curriculum agent: ', response)
-            return response
-        elif routing[0] == "locations":
-            return self.locations_agent.process_query(query)
-        elif routing[0] == "events":
-            return self.events_agent.process_query(query)
-        else:
-            # Default to using the most appropriate agent based on keywords
-            if any(word in query.lower() for word in ["class", "course", "major", "degree", "professor"]):
-                return self.curriculum_agent.process_query(query)
-            elif any(word in query.lower() for word in ["where", "building", "location", "dorm", "hall"]):
-                return self.locations_agent.process_query(query)
-            elif any(word in query.lower() for word in ["when", "event", "schedule", "game", "concert"]):
-                return self.events_agent.process_query(query)
+        return self.process_query_with_metadata(query)[0]
+
+    def process_query_with_metadata(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Process a user query and report how it was handled
+
+        The metadata is built for this call only, so concurrent queries of one session
+        don't overwrite each other's.
+
+        Args:
+            query: The user's query
+
+        Returns:
+            The agent's response, and metadata with the routing decision and the
+            routing, per-agent, combine and total latencies
+        """
+        start = time.perf_counter()
+        response, metadata = self._dispatch(query)
+
+        # Store the exchange once, rather than once per specialized agent
+        self.memory.save_context({"input": query}, {"output": response})
+        metadata["total_ms"] = round(1000 * (time.perf_counter() - start), 1)
+        return response, metadata
+
+    async def aprocess_query(self, query: str) -> str:
+        """Async version of process_query"""
+        return (await self.aprocess_query_with_metadata(query))[0]
+
+    async def aprocess_query_with_metadata(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """Async version of process_query_with_metadata"""
+        start = time.perf_counter()
+        response, metadata = await self._adispatch(query)
+        await self.memory.asave_context({"input": query}, {"output": response})
+        metadata["total_ms"] = round(1000 * (time.perf_counter() - start), 1)
+        return response, metadata
+
+    async def astream_query(self, query: str, metadata: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Process a user query, yielding the response as it is generated
+
+        Routing and, for multi-domain queries, the specialized agents run to
+        completion first; the answering agent or the combine step is then streamed.
+
+        Args:
+            query: The user's query
+            metadata: Optional dict that is filled with the routing decision and latencies of this query
+
+        Yields:
+            Pieces of the response
+        """
+        start = time.perf_counter()
+        metadata = metadata if metadata is not None else {}
+        metadata["agents"] = {}
+        parts = []
+        async for token in self._astream_dispatch(query, metadata):
+            append_piece(parts, token)
+            yield token
+
+        # The exchange is only stored once the whole response has been streamed
+        await self.memory.asave_context({"input": query}, {"output": "".join(parts)})
+        metadata["total_ms"] = round(1000 * (time.perf_counter() - start), 1)
+
+    def get_agent(self, agent_name: str):
+        """Get the specialized agent for a routing name"""
+        return {
+            "curriculum": self.curriculum_agent,
+            "locations": self.locations_agent,
+            "events": self.events_agent,
+        }[agent_name]
+
+    def run_agents(self, agent_names: List[str], query: str, chat_history) -> List[Tuple[Any, Optional[Exception], float]]:
+        """
+        Run the specialized agents concurrently, waiting at most agent_timeout seconds
+
+        Timed-out agents are abandoned, not cancelled: a worker thread can't be
+        interrupted, so an agent that already started keeps its pool worker until
+        it finishes, and its answer is dropped. Agents still queued for a worker
+        are cancelled.
+
+        Args:
+            agent_names: The agents selected by the router
+            query: The user's query
+            chat_history: Prior messages of the conversation
+
+        Returns:
+            (response, error, seconds) for each agent, in the order of agent_names
+        """
+        futures = [
+            self.executor.submit(timed_call, self.get_agent(agent_name).answer, query, chat_history)
+            for agent_name in agent_names
+        ]
+        done, _ = wait(futures, timeout=self.agent_timeout)
+
+        results = []
+        for agent_name, future in zip(agent_names, futures):
+            if future in done:
+                results.append(future.result())
+            else:
+                future.cancel()  # only succeeds if the agent hasn't started
+                error = TimeoutError(f"{agent_name} agent timed out after {self.agent_timeout:g}s")
+                results.append((None, error, self.agent_timeout))
+        return results
+
+    async def arun_agents(self, agent_names: List[str], query: str, chat_history) -> List[Tuple[Any, Optional[Exception], float]]:
+        """Async version of run_agents; agents that time out are cancelled"""
+        return await asyncio.gather(*(
+            atimed_call(self.get_agent(agent_name).aanswer(query, chat_history), self.agent_timeout)
+            for agent_name in agent_names
+        ))
+
+    def record_agent(self, metadata: Dict[str, Any], agent_name: str, error: Optional[Exception], seconds: float) -> str:
+        """Record an agent's status ("ok", "timeout" or "error") and latency in the query metadata"""
+        status = "ok" if error is None else "timeout" if isinstance(error, TimeoutError) else "error"
+        metadata["agents"][agent_name] = {"status": status, "latency_ms": round(1000 * seconds, 1)}
+        return status
+
+    def collect_responses(self, agent_names: List[str], results, metadata: Dict[str, Any]) -> List[str]:
+        """
+        Record the status and latency of each agent and label their responses for the combine step
+
+        Agents that failed or timed out are listed as unavailable, so the combined answer
+        can still use the others.
+
+        Returns:
+            The labeled responses
+
+        Raises:
+            The first agent's error if no agent answered
+        """
+        responses = []
+        errors = []
+        for agent_name, (response, error, seconds) in zip(agent_names, results):
+            status = self.record_agent(metadata, agent_name, error, seconds)
+            if error is None:
+                responses.append(f"[{AGENT_LABELS[agent_name]}] {response}")
             else:
-                # If still unsure, use the BaseAgent's process_query method
-                return super().process_query(query)
-    
+                print(f"[WARN] {agent_name} agent {status}: {error}")
+                errors.append(error)
+                responses.append(f"[{AGENT_LABELS[agent_name]}] No information is available right now.")
+
+        if len(errors) == len(agent_names):
+            raise errors[0]
+        return responses
+
+    def _dispatch(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Route a query and run the selected specialized agent(s)
+
+        Args:
+            query: The user's query
+
+        Returns:
+            The agent's response, and the metadata of this query
+        """
+        metadata = {"agents": {}}
+        chat_history = self.get_chat_history()
+        if self.function_calling_agent is not None:
+            return self.function_calling_agent.answer(query, chat_history, metadata), metadata
+
+        agent_names = self.select_agents(query, metadata)
+
+        if not agent_names:
+            # If still unsure, let the general agent pick a specialized agent as a tool
+            return self.fallback_agent.answer(query, chat_history), metadata
+
+        if len(agent_names) == 1:
+            # Through the pool too, so a single agent is held to agent_timeout as well
+            (response, error, seconds), = self.run_agents(agent_names, query, chat_history)
+            self.record_agent(metadata, agent_names[0], error, seconds)
+            if error is not None:
+                raise error
+            print(f'\n\nresponse from the {agent_names[0]} agent: ', response)
+            return response, metadata
+
+        # If multiple agents are needed, run them concurrently and combine their responses
+        responses = self.collect_responses(agent_names, self.run_agents(agent_names, query, chat_history), metadata)
+        start = time.perf_counter()
+        response = self.combine_responses(query, responses)
+        metadata["combine_ms"] = round(1000 * (time.perf_counter() - start), 1)
+        return response, metadata
+
+    async def _adispatch(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """Async version of _dispatch"""
+        metadata = {"agents": {}}
+        chat_history = self.get_chat_history()
+        if self.function_calling_agent is not None:
+            return await self.function_calling_agent.aanswer(query, chat_history, metadata), metadata
+
+        agent_names = await self.aselect_agents(query, metadata)
+
+        if not agent_names:
+            return await self.fallback_agent.aanswer(query, chat_history), metadata
+
+        if len(agent_names) == 1:
+            (response, error, seconds), = await self.arun_agents(agent_names, query, chat_history)
+            self.record_agent(metadata, agent_names[0], error, seconds)
+            if error is not None:
+                raise error
+            return response, metadata
+
+        responses = self.collect_responses(agent_names, await self.arun_agents(agent_names, query, chat_history), metadata)
+        start = time.perf_counter()
+        response = await self.acombine_responses(query, responses)
+        metadata["combine_ms"] = round(1000 * (time.perf_counter() - start), 1)
+        return response, metadata
+
+    async def _astream_dispatch(self, query: str, metadata: Dict[str, Any]) -> AsyncIterator[str]:
+        """Streaming version of _dispatch, recording the query's metadata in metadata"""
+        chat_history = self.get_chat_history()
+        if self.function_calling_agent is not None:
+            async for token in self.function_calling_agent.astream_answer(query, chat_history, metadata):
+                yield token
+            return
+
+        agent_names = await self.aselect_agents(query, metadata)
+
+        if not agent_names:
+            stream = self.fallback_agent.astream_answer(query, chat_history)
+        elif len(agent_names) == 1:
+            stream = self.get_agent(agent_names[0]).astream_answer(query, chat_history)
+        else:
+            responses = self.collect_responses(agent_names, await self.arun_agents(agent_names, query, chat_history), metadata)
+            stream = self.astream_combine_responses(query, responses)
+
+        start = time.perf_counter()
+        async for token in stream:
+            yield token
+
+        seconds = time.perf_counter() - start
+        if len(agent_names) == 1:
+            self.record_agent(metadata, agent_names[0], None, seconds)
+        elif agent_names:
+            metadata["combine_ms"] = round(1000 * seconds, 1)
+
     def combine_responses(self, query: str, responses: List[str]) -> str:
         """
         Combine responses from multiple agents into a coherent answer
-        
+
         Args:
             query: The original user query
             responses: List of responses from different agents
-            
+
         Returns:
             A coherent combined response
         """
-        combine_template = """
-        You need to combine information from multiple specialized agents to answer the user's query.
-        
-        User Query: {query}
-        
-        Agent Responses:
-        {responses}
-        
-        Please synthesize this information into a single, coherent response that addresses all aspects of the user's query.
-        Avoid redundancy and present the information in a natural, conversational way without mentioning that it came from different agents.
-        """
-        
-        combine_prompt = PromptTemplate(
-            input_variables=["query", "responses"],
-            template=combine_template
-        )
-        
-        combine_chain = LLMChain(
-            llm=self.llm,
-            prompt=combine_prompt
-        )
-        
-        return combine_chain.run(query=query, responses="\n\n".join(responses))
\ No newline at end of file
+        return self.combine_chain.run(query=query, responses="\n\n".join(responses))
+
+    async def acombine_responses(self, query: str, responses: List[str]) -> str:
+        """Async version of combine_responses"""
+        return await self.combine_chain.arun(query=query, responses="\n\n".join(responses))
+
+    async def astream_combine_responses(self, query: str, responses: List[str]) -> AsyncIterator[str]:
+        """Streaming version of combine_responses"""
+        prompt = self.combine_chain.prompt.format(query=query, responses="\n\n".join(responses))
+        async for token in astream_llm(self.combine_chain.llm, prompt):
+            yield token
@@ -0,0 +1,158 @@
+from agents.router_agent import AGENT_LABELS
+from pathlib import Path
+from typing import List, Sequence, Tuple
+import numpy as np
+import json
+import re
+import zlib
+
+DEFAULT_DATASET_PATH = Path(__file__).resolve().parent.parent / "data" / "routing" / "routing_queries.jsonl"
+
+DOMAINS = list(AGENT_LABELS)
+
+def load_routing_dataset(path=DEFAULT_DATASET_PATH) -> Tuple[List[str], List[List[str]]]:
+    """
+    Load the labeled routing queries
+
+    Args:
+        path: JSON lines file with {"query": ..., "agents": [...]} per line
+
+    Returns:
+        The queries and, for each, the agents that should handle it
+    """
+    queries, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                queries.append(row["query"])
+                labels.append(row["agents"])
+    return queries, labels
+
+def extract_features(query: str) -> List[str]:
+    """Word unigrams and bigrams plus character trigrams of each word (robust to typos like "wheres")"""
+    words = re.findall(r"[a-z0-9]+", query.lower())
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+class RoutingClassifier:
+    """
+    Local multi-label routing model: hashed n-gram TF-IDF features and one logistic
+    regression per domain
+
+    Predicting takes well under a millisecond, so confident predictions can skip the
+    LLM router call entirely.
+    """
+
+    def __init__(self, n_features: int = 2 ** 20, l2: float = 1e-5, epochs: int = 200,
+                 learning_rate: float = 10.0, momentum: float = 0.9):
+        """
+        Args:
+            n_features: Size of the hashing space
+            l2: L2 regularization strength
+            epochs: Full-batch gradient descent steps
+            learning_rate: Gradient descent step size
+            momentum: Gradient descent momentum
+        """
+        self.n_features = n_features
+        self.l2 = l2
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.momentum = momentum
+        self.columns = None  # Sorted feature hashes seen in training; other hashes are ignored
+        self.idf = None
+        self.weights = None
+        self.bias = None
+
+    def _hashes(self, query: str) -> np.ndarray:
+        return np.array([zlib.crc32(feature.encode("utf-8")) % self.n_features
+                         for feature in extract_features(query)], dtype=np.int64)
+
+    def _vectorize(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse TF-IDF vector of a query as (column indices, L2-normalized values)"""
+        hashes = self._hashes(query)
+        positions = np.minimum(np.searchsorted(self.columns, hashes), len(self.columns) - 1)
+        known = positions[self.columns[positions] == hashes]
+        if not len(known):
+            return known, np.zeros(0)
+        columns, counts = np.unique(known, return_counts=True)
+        values = (1 + np.log(counts)) * self.idf[columns]
+        return columns, values / np.linalg.norm(values)
+
+    def fit(self, queries: Sequence[str], labels: Sequence[Sequence[str]]) -> "RoutingClassifier":
+        """
+        Train on labeled queries
+
+        Args:
+            queries: The training queries
+            labels: The agents that should handle each query
+
+        Returns:
+            The trained classifier
+        """
+        hashes = [self._hashes(query) for query in queries]
+        self.columns = np.unique(np.concatenate(hashes))
+
+        # Document frequencies over the training set
+        document_frequency = np.zeros(len(self.columns))
+        for query_hashes in hashes:
+            document_frequency[np.searchsorted(self.columns, np.unique(query_hashes))] += 1
+        self.idf = np.log((1 + len(queries)) / (1 + document_frequency)) + 1
+
+        # Sparse training matrix as parallel arrays of row, column and value
+        rows, columns, values = [], [], []
+        for row, query in enumerate(queries):
+            query_columns, query_values = self._vectorize(query)
+            rows.append(np.full(len(query_columns), row))
+            columns.append(query_columns)
+            values.append(query_values)
+        rows, columns, values = np.concatenate(rows), np.concatenate(columns), np.concatenate(values)
+        Y = np.array([[domain in agents for domain in DOMAINS] for agents in labels], dtype=float)
+
+        self.weights = np.zeros((len(self.columns), len(DOMAINS)))
+        self.bias = np.zeros(len(DOMAINS))
+        weights_velocity = np.zeros_like(self.weights)
+        bias_velocity = np.zeros_like(self.bias)
+        for _ in range(self.epochs):
+            # X @ weights and X.T @ error for the sparse X, one bincount per domain
+            contributions = values[:, None] * self.weights[columns]
+            scores = np.stack([np.bincount(rows, contributions[:, d], len(queries)) for d in range(len(DOMAINS))], axis=1)
+            error = 1 / (1 + np.exp(-(scores + self.bias))) - Y
+            contributions = values[:, None] * error[rows]
+            gradient = np.stack([np.bincount(columns, contributions[:, d], len(self.columns)) for d in range(len(DOMAINS))], axis=1)
+            weights_velocity = self.momentum * weights_velocity - self.learning_rate * (gradient / len(queries) + self.l2 * self.weights)
+            bias_velocity = self.momentum * bias_velocity - self.learning_rate * error.mean(axis=0)
+            self.weights += weights_velocity
+            self.bias += bias_velocity
+        return self
+
+    def predict_proba(self, query: str) -> np.ndarray:
+        """Probability that each domain in DOMAINS is needed for the query"""
+        columns, values = self._vectorize(query)
+        return 1 / (1 + np.exp(-(values @ self.weights[columns] + self.bias)))
+
+    def predict(self, query: str) -> Tuple[List[str], float]:
+        """
+        Predict the agents for a query
+
+        Args:
+            query: The user's query
+
+        Returns:
+            The agent names, and the confidence that exactly this set of agents is right
+        """
+        probabilities = self.predict_proba(query)
+        selected = probabilities >= 0.5
+        if not selected.any():
+            selected[np.argmax(probabilities)] = True
+        confidence = float(np.prod(np.where(selected, probabilities, 1 - probabilities)))
+        return [domain for domain, chosen in zip(DOMAINS, selected) if chosen], confidence
+
+def train_default_classifier(path=DEFAULT_DATASET_PATH) -> RoutingClassifier:
+    """Train the routing classifier on the dataset shipped with the repo"""
+    queries, labels = load_routing_dataset(path)
+    return RoutingClassifier().fit(queries, labels)
@@ -0,0 +1,98 @@
+from typing import AsyncIterator, List
+import json
+import re
+
+# Start of the final answer in the conversational ReAct agent's JSON output
+FINAL_ANSWER_START = re.compile(r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"')
+
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class Replacement(str):
+    """
+    A streamed piece of a response that replaces everything streamed before it
+
+    Yielded when the final answer does not continue the text already streamed, so
+    consumers start the response over from this piece instead of appending it.
+    """
+
+def append_piece(parts: List[str], piece: str):
+    """Add a streamed piece to the pieces of a response, starting over at a Replacement"""
+    if isinstance(piece, Replacement):
+        parts.clear()
+    parts.append(piece)
+
+class FinalAnswerParser:
+    """
+    Incrementally extract the final answer from a streamed ReAct agent response
+
+    The agent answers with a JSON blob such as {"action": "Final Answer", "action_input": "..."}.
+    Tokens are fed in as the LLM generates them, and the decoded characters of the
+    action_input string are returned as soon as they are complete. Responses that
+    call a tool instead of answering produce no output.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None  # Index of the next undecoded answer character, once the answer has started
+        self.done = False
+
+    def feed(self, token: str) -> str:
+        """
+        Add a token of LLM output
+
+        Args:
+            token: The next piece of the LLM response
+
+        Returns:
+            The answer text decoded from this token (may be empty)
+        """
+        if self.done:
+            return ""
+        self.buffer += token
+
+        if self.position is None:
+            match = FINAL_ANSWER_START.search(self.buffer)
+            if not match:
+                return ""
+            self.position = match.end()
+
+        decoded = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if char == '"':
+                self.done = True
+                break
+            if char != '\\':
+                decoded.append(char)
+                self.position += 1
+                continue
+
+            # Escape sequences may be split across tokens; wait for the rest
+            escape = self.buffer[self.position + 1:self.position + 2]
+            if not escape:
+                break
+            if escape == 'u':
+                digits = self.buffer[self.position + 2:self.position + 6]
+                if len(digits) < 4:
+                    break
+                decoded.append(json.loads(f'"\\u{digits}"'))
+                self.position += 6
+            else:
+                decoded.append(JSON_ESCAPES.get(escape, escape))
+                self.position += 2
+        return "".join(decoded)
+
+async def astream_llm(llm, prompt: str) -> AsyncIterator[str]:
+    """
+    Stream the text of a chat model's response as it is generated
+
+    Args:
+        llm: The chat model
+        prompt: The prompt to send
+
+    Yields:
+        Pieces of the response text
+    """
+    async for chunk in llm.astream(prompt):
+        if chunk.content:
+            yield chunk.content
@@ -0,0 +1,150 @@
+from langchain.chains.conversation.memory import ConversationBufferMemory
+from langchain.prompts import PromptTemplate
+from langchain.schema import SystemMessage, get_buffer_string
+from typing import Any, List
+import tiktoken
+
+tokenizer = tiktoken.get_encoding("cl100k_base")
+
+SUMMARY_TEMPLATE = """
+        Progressively summarize the lines of conversation provided, adding onto the previous summary and returning a new summary.
+        Keep the programs, courses, places, events, dates and preferences the user mentioned, since later questions may refer back to them.
+        Keep the summary under {max_words} words.
+
+        Current summary:
+        {summary}
+
+        New lines of conversation:
+        {new_lines}
+
+        New summary:
+        """
+
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["summary", "new_lines", "max_words"],
+    template=SUMMARY_TEMPLATE
+)
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the cl100k_base encoding used by the OpenAI models"""
+    return len(tokenizer.encode(text))
+
+class TokenBudgetMemory(ConversationBufferMemory):
+    """
+    Conversation memory that keeps recent turns verbatim within a token budget
+    and folds older turns into a rolling summary
+    """
+
+    llm: Any = None
+    max_token_limit: int = 1000
+    max_summary_tokens: int = 300
+    moving_summary_buffer: str = ""
+
+    @property
+    def buffer_as_messages(self) -> List[Any]:
+        """The rolling summary (if any) followed by the verbatim recent messages"""
+        messages = self.chat_memory.messages
+        if self.moving_summary_buffer:
+            summary = SystemMessage(content=f"Summary of the earlier conversation: {self.moving_summary_buffer}")
+            return [summary] + list(messages)
+        return messages
+
+    @property
+    def buffer_as_str(self) -> str:
+        return self._buffer_as_str(self.buffer_as_messages)
+
+    def save_context(self, inputs, outputs) -> None:
+        """Save the turn, then summarize older turns if the verbatim buffer is over budget"""
+        super().save_context(inputs, outputs)
+        self.prune()
+
+    async def asave_context(self, inputs, outputs) -> None:
+        """Async version of save_context"""
+        await super().asave_context(inputs, outputs)
+        await self.aprune()
+
+    def prune(self):
+        """
+        Move the oldest turns into the summary once the verbatim messages exceed max_token_limit
+
+        Turns are pruned down to half the budget, so the summarization call runs
+        every few turns rather than on every turn once the budget is reached.
+        """
+        pruned = self._pop_over_budget()
+        if pruned:
+            self.moving_summary_buffer = self.predict_new_summary(pruned, self.moving_summary_buffer)
+
+    async def aprune(self):
+        """Async version of prune"""
+        pruned = self._pop_over_budget()
+        if pruned:
+            self.moving_summary_buffer = await self.apredict_new_summary(pruned, self.moving_summary_buffer)
+
+    def _pop_over_budget(self) -> List[Any]:
+        """Remove and return the oldest messages while the verbatim buffer is over budget"""
+        messages = self.chat_memory.messages
+        token_counts = [count_tokens(get_buffer_string([message])) for message in messages]
+        total = sum(token_counts)
+        if total <= self.max_token_limit:
+            return []
+
+        # Prune whole human/AI pairs and always keep the latest exchange verbatim
+        pruned = []
+        while total > self.max_token_limit // 2 and len(messages) > 2:
+            for _ in range(2):
+                pruned.append(messages.pop(0))
+                total -= token_counts.pop(0)
+        return pruned
+
+    def _summary_prompt(self, messages: List[Any], existing_summary: str) -> str:
+        new_lines = get_buffer_string(messages, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        return SUMMARY_PROMPT.format(
+            summary=existing_summary or "(none)",
+            new_lines=new_lines,
+            max_words=int(self.max_summary_tokens * 0.75)
+        )
+
+    def _truncate_summary(self, summary: str) -> str:
+        # Guard the budget even if the model ignores the length instruction
+        summary_tokens = tokenizer.encode(summary)
+        if len(summary_tokens) > self.max_summary_tokens:
+            summary = tokenizer.decode(summary_tokens[:self.max_summary_tokens])
+        return summary
+
+    def predict_new_summary(self, messages: List[Any], existing_summary: str) -> str:
+        """
+        Fold messages into the existing summary
+
+        Args:
+            messages: The messages leaving the verbatim buffer
+            existing_summary: The current rolling summary
+
+        Returns:
+            The updated summary
+        """
+        if self.llm is None:
+            # Without a summarizer the pruned turns are simply dropped
+            return existing_summary
+
+        try:
+            summary = self.llm.predict(self._summary_prompt(messages, existing_summary)).strip()
+        except Exception as e:
+            print(f"[ERROR] Summarizing conversation: {e}")
+            return existing_summary
+        return self._truncate_summary(summary)
+
+    async def apredict_new_summary(self, messages: List[Any], existing_summary: str) -> str:
+        """Async version of predict_new_summary"""
+        if self.llm is None:
+            return existing_summary
+
+        try:
+            summary = (await self.llm.apredict(self._summary_prompt(messages, existing_summary))).strip()
+        except Exception as e:
+            print(f"[ERROR] Summarizing conversation: {e}")
+            return existing_summary
+        return self._truncate_summary(summary)
+
+    def clear(self) -> None:
+        super().clear()
+        self.moving_summary_buffer = ""
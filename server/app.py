@@ -1,5 +1,6 @@
 import os
 import json
+import atexit
 import logging
 from flask import Flask, request, jsonify
 from services.query_service import QueryService
@@ -19,12 +20,19 @@ app = Flask(__name__)
 
 # Initialize the query service
 query_service = QueryService()
+# Persist the sessions still in memory when the process exits
+atexit.register(query_service.flush)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint"""
     return jsonify({"status": "healthy"})
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Session store and cache metrics, used to size the store and tune the caches"""
+    return jsonify(query_service.stats())
+
 @app.route('/process', methods=['POST'])
 def process_message():
     """Process messages sent from Lambda"""
@@ -37,7 +45,7 @@ def process_message():
         logger.info(f"Received message from Lambda: {message}")
         
         # Process the message using the query service
-        response_text = query_service.process_query(message, session_id)
+        response_text, metadata = query_service.process_query_with_metadata(message, session_id)
         logger.info(f"Output generated by agent: {response_text}")
         
         # Here you would add your vector database and API call logic
@@ -46,7 +54,8 @@ def process_message():
             "status": "success",
             # "response": f"Hi from EC2. Your message: \"{response_text}\"",
             "response": response_text,
-            "processed_by": "ec2"
+            "processed_by": "ec2",
+            "metadata": metadata
         }
         
         logger.info(f"Sending response: {response}")
@@ -0,0 +1,117 @@
+import json
+import logging
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from services.query_service import QueryService
+from agents.streaming import Replacement, append_piece
+from tools.duke_api_tools import aclose_api_services
+import dotenv
+
+# Load environment variables
+dotenv.load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                    filename='/tmp/websocket_messages.log')
+logger = logging.getLogger(__name__)
+
+# Initialize the query service
+query_service = QueryService()
+
+async def health_check(request: Request):
+    """Simple health check endpoint"""
+    return JSONResponse({"status": "healthy"})
+
+async def stats(request: Request):
+    """Session store and cache metrics, used to size the store and tune the caches"""
+    return JSONResponse(query_service.stats())
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_response(message: str, session_id: str):
+    """
+    Stream the response as server-sent events
+
+    Each piece of the answer is sent as a "token" event as soon as the LLM generates it,
+    followed by a "done" event with the full response (or an "error" event). A final
+    answer that does not continue the streamed text is sent as a "replace" event.
+    """
+    parts = []
+    metadata = {}
+    try:
+        async for token in query_service.astream_query(message, session_id, metadata):
+            append_piece(parts, token)
+            if isinstance(token, Replacement):
+                yield sse_event("replace", {"response": str(token)})
+            else:
+                yield sse_event("token", {"token": token})
+
+        response_text = "".join(parts)
+        logger.info(f"Output generated by agent: {response_text}")
+        yield sse_event("done", {"status": "success", "response": response_text, "processed_by": "ec2",
+                                 "metadata": metadata})
+    except Exception as e:
+        logger.error(f"Error streaming message: {str(e)}")
+        yield sse_event("error", {"status": "error", "error": str(e)})
+
+async def process_message(request: Request):
+    """
+    Process messages sent from Lambda, awaiting the LLM, Pinecone and Duke API calls
+
+    Requests with "stream": true in the body, or that accept text/event-stream, get the
+    response as server-sent events; otherwise the complete response is returned as JSON.
+    """
+    try:
+        data = await request.json()
+        message = data.get('message', '')
+        session_id = data.get('session_id', 'default')
+
+        logger.info(f"Received message from Lambda: {message}")
+
+        if data.get('stream') or 'text/event-stream' in request.headers.get('accept', ''):
+            return StreamingResponse(
+                stream_response(message, session_id),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+
+        response_text, metadata = await query_service.aprocess_query_with_metadata(message, session_id)
+        logger.info(f"Output generated by agent: {response_text}")
+
+        response = {
+            "status": "success",
+            "response": response_text,
+            "processed_by": "ec2",
+            "metadata": metadata
+        }
+
+        logger.info(f"Sending response: {response}")
+        return JSONResponse(response)
+    except Exception as e:
+        logger.error(f"Error processing message: {str(e)}")
+        return JSONResponse({"status": "error", "error": str(e)}, status_code=500)
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """On shutdown, persist the sessions still in memory and close the Duke API clients"""
+    yield
+    await run_in_threadpool(query_service.flush)
+    await aclose_api_services()
+
+app = Starlette(routes=[
+    Route('/health', health_check, methods=['GET']),
+    Route('/stats', stats, methods=['GET']),
+    Route('/process', process_message, methods=['POST']),
+], lifespan=lifespan)
+
+if __name__ == '__main__':
+    # A single worker holds many in-flight conversations; add workers to use more cores
+    import uvicorn
+    uvicorn.run("asgi_app:app", host='0.0.0.0', port=5000)
@@ -5,6 +5,7 @@ import requests
 import os
 import openai
 import re
+import time
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -14,6 +15,12 @@ EC2_ENDPOINT = "ip address "
 
 openai.api_key = os.environ.get("OPENAI_API_KEY")  
 
+# relay the EC2 response token by token (needs the ASGI server, asgi_app.py)
+STREAM_RESPONSES = os.environ.get("STREAM_RESPONSES", "true").lower() == "true"
+
+# minimum seconds between streamed frames; tokens that arrive in between are sent together
+STREAM_FLUSH_INTERVAL = float(os.environ.get("STREAM_FLUSH_INTERVAL", "0.1"))
+
 # list of inappropriate words/curse words to filter
 INAPPROPRIATE_WORDS = [
     "ass", "asshole", "bitch", "bullshit", "crap", "damn", "dick", "fuck", "fucking", 
@@ -66,15 +73,25 @@ def lambda_handler(event, context):
             corrected_message = correct_grammar_with_openai(original_message)
             logger.info(f"Original: '{original_message}', Corrected: '{corrected_message}'")
             
+            if STREAM_RESPONSES:
+                prefix = ""
+                if corrected_message != original_message:
+                    logger.info("Corrections were made to the message")
+                    prefix = f"I've corrected your message: '{original_message}' → '{corrected_message}'\n\nAnswer: "
+                
+                relay_ec2_stream(event, connection_id, corrected_message, prefix)
+                logger.info(f"Streamed response sent to client")
+                return {'statusCode': 200}
+            
             if corrected_message != original_message:
                 logger.info("Corrections were made to the message")
                 
                 ec2_response = send_to_ec2(corrected_message)
                 logger.info(f"EC2 response: {json.dumps(ec2_response)}")
                 
-                ec2_content = ec2_response.get('response', "")
+                ec2_content = ec2_response.get('response', "").replace(f'Hi from EC2. Your message: "{corrected_message}"', '')
                 
-                custom_response = f"I've corrected your message: '{original_message}' → '{corrected_message}'\n\nAnswer: {ec2_content.replace(f'Hi from EC2. Your message: \"{corrected_message}\"', '')}"
+                custom_response = f"I've corrected your message: '{original_message}' → '{corrected_message}'\n\nAnswer: {ec2_content}"
                 
                 response_data = {
                     'response': custom_response
@@ -286,17 +303,21 @@ def correct_grammar_with_openai(message):
         logger.error(f"Error in correct_grammar_with_openai: {str(e)}")
         return message
 
-def send_message_to_client(event, connection_id, payload):
-    """Send message back to the connected client"""
+def get_api_client(event):
+    """Create the API Gateway client used to post to the WebSocket connections"""
     domain = event['requestContext']['domainName']
     stage = event['requestContext']['stage']
     
-    logger.info(f"Preparing to send message to client {connection_id}")
-    
-    api_client = boto3.client(
+    return boto3.client(
         'apigatewaymanagementapi',
         endpoint_url=f"https://{domain}/{stage}"
     )
+
+def send_message_to_client(event, connection_id, payload, api_client=None):
+    """Send message back to the connected client"""
+    logger.info(f"Preparing to send message to client {connection_id}")
+    
+    api_client = api_client or get_api_client(event)
     
     api_client.post_to_connection(
         ConnectionId=connection_id,
@@ -331,4 +352,97 @@ def send_to_ec2(message):
     except Exception as e:
         error_message = f"Error sending request to EC2: {str(e)}"
         logger.error(error_message)
-        return {"response": f"Error communicating with EC2: {str(e)}"}
\ No newline at end of file
+        return {"response": f"Error communicating with EC2: {str(e)}"}
+
+def send_to_ec2_stream(message):
+    """
+    Send a message to EC2 and yield the streamed response as it arrives
+    
+    Yields:
+        tuple: (event, data) for each server-sent event, where event is "token",
+        "replace", "done" or "error"
+    """
+    try:
+        logger.info(f"Streaming message to EC2: '{message}'")
+        
+        payload = {
+            'message': message,
+            'stream': True
+        }
+        
+        # the read timeout applies between chunks, not to the whole response
+        with requests.post(
+            EC2_ENDPOINT,
+            json=payload,
+            headers={'Accept': 'text/event-stream'},
+            stream=True,
+            timeout=(10, 180)
+        ) as response:
+            if response.status_code != 200:
+                logger.error(f"Error from EC2: {response.status_code} - {response.text}")
+                yield 'error', {'error': str(response.status_code)}
+                return
+            
+            if not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                # server without streaming support (app.py) sends the whole response at once
+                yield 'done', response.json()
+                return
+            
+            event_name = 'message'
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith('event:'):
+                    event_name = line[len('event:'):].strip()
+                elif line.startswith('data:'):
+                    yield event_name, json.loads(line[len('data:'):].strip())
+                elif not line:
+                    event_name = 'message'
+    except Exception as e:
+        logger.error(f"Error streaming request to EC2: {str(e)}")
+        yield 'error', {'error': str(e)}
+
+def relay_ec2_stream(event, connection_id, message, prefix=""):
+    """
+    Relay the EC2 response to the client while it is being generated
+    
+    Tokens are posted as {"type": "token", "token": ...} frames, at most one frame per
+    STREAM_FLUSH_INTERVAL, followed by a {"type": "done", "response": ...} frame with
+    the full response so clients can replace the streamed text with the final answer.
+    A final answer that does not continue the streamed text is posted right away as a
+    {"type": "replace", "response": ...} frame.
+    """
+    api_client = get_api_client(event)
+    pending = prefix
+    streamed = ""
+    response_text = None
+    last_flush = 0.0
+    
+    for event_name, data in send_to_ec2_stream(message):
+        if event_name == 'token':
+            pending += data.get('token', '')
+            if time.monotonic() - last_flush >= STREAM_FLUSH_INTERVAL:
+                api_client.post_to_connection(
+                    ConnectionId=connection_id,
+                    Data=json.dumps({'type': 'token', 'token': pending})
+                )
+                streamed += pending
+                pending = ""
+                last_flush = time.monotonic()
+        elif event_name == 'replace':
+            streamed = prefix + data.get('response', '')
+            pending = ""
+            api_client.post_to_connection(
+                ConnectionId=connection_id,
+                Data=json.dumps({'type': 'replace', 'response': streamed})
+            )
+            last_flush = time.monotonic()
+        elif event_name == 'done':
+            response_text = prefix + data.get('response', '')
+        elif event_name == 'error':
+            response_text = f"Error processing on EC2: {data.get('error', '')}"
+    
+    if response_text is None:
+        # the stream ended without a final event, so send what was received
+        response_text = streamed + pending
+    
+    send_message_to_client(event, connection_id, {'type': 'done', 'response': response_text}, api_client)
+
@@ -1 +1 @@
-from .base import DukeApiServiceBase
\ No newline at end of file
+from .duke_api_service.base import DukeApiServiceBase
\ No newline at end of file
@@ -0,0 +1,226 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from services.embedding_cache import normalize_text
+import numpy as np
+import threading
+import time
+
+# Seconds an answer stays valid, by the domain that produced it: event listings change
+# daily and "this weekend" moves, while program and course pages rarely change
+DEFAULT_DOMAIN_TTLS = {
+    "events": 15 * 60,
+    "locations": 24 * 3600,
+    "curriculum": 7 * 24 * 3600,
+    "general": 3600,
+}
+
+# Tools of the function-calling engine, by the domain they answer for
+TOOL_DOMAINS = {
+    "search_duke_documents": "curriculum",
+    "get_courses_by_subject": "curriculum",
+    "get_course_details": "curriculum",
+    "get_course_with_extreme_details": "curriculum",
+    "get_places_by_value": "locations",
+    "get_all_places": "locations",
+    "get_place_details_by_id": "locations",
+    "get_events_by_future_days": "events",
+}
+
+def answer_domains(metadata: Dict[str, Any]) -> List[str]:
+    """
+    Get the domains an answer was built from
+
+    Args:
+        metadata: The query metadata reported by the router agent
+
+    Returns:
+        The routed agents, the domains of the tools called by the function-calling
+        engine, or ["general"] when neither is known
+    """
+    if metadata.get("routed_to"):
+        return list(metadata["routed_to"])
+    domains = {TOOL_DOMAINS.get(name, "general") for name in metadata.get("tool_calls", [])}
+    return sorted(domains) or ["general"]
+
+class CacheLookup:
+    """Result of a cache lookup; the query embedding is kept so a miss can be stored without embedding again"""
+
+    def __init__(self, vector: np.ndarray, answer: Optional[str] = None, similarity: float = 0.0,
+                 cached_query: Optional[str] = None):
+        self.vector = vector
+        self.answer = answer
+        self.similarity = similarity
+        self.cached_query = cached_query
+
+    @property
+    def hit(self) -> bool:
+        return self.answer is not None
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by query meaning rather than exact text
+
+    Queries are normalized (case and whitespace) and embedded; a lookup compares the
+    embedding against every cached query with one matrix-vector product and returns the
+    stored answer of the nearest one if its cosine similarity reaches the threshold.
+    Entries expire after the TTL of the domains that produced them, and the least
+    recently used entry is evicted when the cache is full.
+    """
+
+    def __init__(self, embed: Callable[[str], Sequence[float]],
+                 aembed: Optional[Callable[[str], Awaitable[Sequence[float]]]] = None,
+                 max_size: int = 5000, threshold: float = 0.95,
+                 domain_ttls: Optional[Dict[str, float]] = None):
+        """
+        Initialize the cache
+
+        Args:
+            embed: Function embedding a text
+            aembed: Async version of embed (defaults to running embed directly)
+            max_size: Maximum number of cached answers
+            threshold: Minimum cosine similarity for a cached answer to be returned
+            domain_ttls: Seconds an answer stays valid by domain; answers spanning
+                several domains use the shortest
+        """
+        self.embed = embed
+        self.aembed = aembed
+        self.max_size = max_size
+        self.threshold = threshold
+        self.domain_ttls = {**DEFAULT_DOMAIN_TTLS, **(domain_ttls or {})}
+
+        # Unit-norm embeddings in fixed slots, allocated once the dimension is known
+        self._vectors = None
+        self._expires_at = np.zeros(max_size)
+        self._valid = np.zeros(max_size, dtype=bool)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * max_size
+        self._free = list(range(max_size - 1, -1, -1))
+        self._lru = OrderedDict()  # slot -> None, ordered from least to most recently used
+        self._lock = threading.Lock()
+
+        # Counters used to tune the threshold and size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def ttl_for(self, domains: Sequence[str]) -> float:
+        """Seconds an answer built from these domains stays valid"""
+        return min(self.domain_ttls.get(domain, self.domain_ttls["general"]) for domain in domains or ["general"])
+
+    def _unit(self, embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query: str) -> CacheLookup:
+        """
+        Find a cached answer for a query
+
+        Args:
+            query: The user's query
+
+        Returns:
+            The lookup result, a hit if a live entry is similar enough
+        """
+        # Normalized like the embedding cache's keys, so the curriculum agent's retrieval reuses the embedding
+        return self._search(self._unit(self.embed(normalize_text(query))))
+
+    async def alookup(self, query: str) -> CacheLookup:
+        """Async version of lookup"""
+        text = normalize_text(query)
+        embedding = await self.aembed(text) if self.aembed else self.embed(text)
+        return self._search(self._unit(embedding))
+
+    def _search(self, vector: np.ndarray) -> CacheLookup:
+        with self._lock:
+            self._evict_expired(time.time())
+            if self._vectors is None or not self._valid.any():
+                self.misses += 1
+                return CacheLookup(vector)
+
+            similarities = self._vectors @ vector
+            similarities[~self._valid] = -1.0
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity < self.threshold:
+                self.misses += 1
+                return CacheLookup(vector, similarity=similarity)
+
+            self.hits += 1
+            self._lru.move_to_end(slot)
+            entry = self._entries[slot]
+            return CacheLookup(vector, entry["answer"], similarity, entry["query"])
+
+    def store(self, lookup: CacheLookup, query: str, answer: str, domains: Sequence[str]):
+        """
+        Cache the answer of a query that missed
+
+        Args:
+            lookup: The missed lookup, holding the query embedding
+            query: The user's query
+            answer: The answer to cache
+            domains: The domains the answer was built from, which set its TTL
+        """
+        ttl = self.ttl_for(domains)
+        if ttl <= 0 or not answer:
+            return
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, len(lookup.vector)), dtype=np.float32)
+            now = time.time()
+            self._evict_expired(now)
+            if not self._free:
+                self._evict(next(iter(self._lru)))
+                self.lru_evictions += 1
+
+            slot = self._free.pop()
+            self._vectors[slot] = lookup.vector
+            self._expires_at[slot] = now + ttl
+            self._valid[slot] = True
+            self._entries[slot] = {"query": query, "answer": answer, "domains": list(domains)}
+            self._lru[slot] = None
+            self.stores += 1
+
+    def _evict_expired(self, now: float):
+        for slot in np.flatnonzero(self._valid & (self._expires_at <= now)):
+            self._evict(int(slot))
+            self.ttl_evictions += 1
+
+    def _evict(self, slot: int):
+        self._valid[slot] = False
+        self._entries[slot] = None
+        del self._lru[slot]
+        self._free.append(slot)
+
+    def clear(self):
+        """Drop every cached answer (e.g. after re-indexing the documents)"""
+        with self._lock:
+            for slot in list(self._lru):
+                self._evict(slot)
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache's size and counters
+
+        Returns:
+            A dictionary of sizing and hit-rate metrics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._lru),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "domain_ttls": self.domain_ttls,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "lru_evictions": self.lru_evictions,
+                "ttl_evictions": self.ttl_evictions,
+            }
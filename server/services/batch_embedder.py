@@ -0,0 +1,191 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import openai
+import os
+import random
+import threading
+import time
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# The embeddings endpoint takes at most 2048 inputs and 300k tokens per request
+MAX_BATCH_INPUTS = 2048
+MAX_BATCH_TOKENS = 300000
+
+# Errors worth retrying: rate limits, timeouts, dropped connections and 5xx responses
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+def token_batches(items: Iterable[Tuple], count_tokens: Callable[[str], int],
+                  max_tokens: int, max_inputs: int) -> Iterator[List[Tuple[Any, str]]]:
+    """
+    Group (key, text) items into batches of at most max_tokens tokens and max_inputs inputs
+
+    Items are read lazily and kept in order; a single item larger than max_tokens gets
+    a batch of its own. Items may be (key, text, tokens) when the token count is
+    already known, so the text isn't tokenized again.
+    """
+    batch, batch_tokens = [], 0
+    for item in items:
+        key, text = item[0], item[1]
+        tokens = item[2] if len(item) > 2 else count_tokens(text)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_inputs):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append((key, text))
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked to wait before retrying, if it said"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+class BatchEmbedder:
+    """
+    Embeds a stream of texts in token-bounded batches with bounded concurrency
+
+    Texts are packed into as few embeddings requests as the batch limits allow, and up
+    to `concurrency` requests are in flight at once. Rate limits and transient errors
+    are retried with exponential backoff and jitter (or the server's Retry-After).
+    Results are yielded as each batch completes, so the caller can upsert them while
+    the next batches are being embedded.
+    """
+
+    def __init__(self, client, count_tokens: Callable[[str], int], model: str = EMBEDDING_MODEL,
+                 max_batch_tokens: int = 50000, max_batch_inputs: int = 512, concurrency: int = 4,
+                 max_retries: int = 6, backoff_seconds: float = 1.0, max_backoff_seconds: float = 60.0):
+        """
+        Initialize the embedder
+
+        Args:
+            client: OpenAI client (its own retries are disabled; the embedder retries instead)
+            count_tokens: Function returning the number of tokens of a text
+            model: The embedding model name
+            max_batch_tokens: Maximum number of tokens per request
+            max_batch_inputs: Maximum number of texts per request
+            concurrency: Maximum number of requests in flight
+            max_retries: Retries of a request on rate limits and transient errors
+            backoff_seconds: Base delay of the exponential backoff
+            max_backoff_seconds: Maximum delay between retries
+        """
+        self.client = client.with_options(max_retries=0)
+        self.count_tokens = count_tokens
+        self.model = model
+        self.max_batch_tokens = min(max_batch_tokens, MAX_BATCH_TOKENS)
+        self.max_batch_inputs = min(max_batch_inputs, MAX_BATCH_INPUTS)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        # Counters reported at the end of ingestion
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.embedded = 0
+        self.failed = 0
+
+    def create(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed one batch, retrying rate limits and transient errors
+
+        Returns:
+            The embeddings in the order of the texts
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._lock:
+                    self.requests += 1
+                response = self.client.embeddings.create(input=texts, model=self.model)
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt))
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+    def embed_batch(self, batch: List[Tuple[Any, str]]) -> List[Tuple[Any, List[float]]]:
+        """
+        Embed a batch of (key, text) items
+
+        A rejected batch is split in halves to isolate the inputs the API refuses (such
+        as a text over the model's token limit); those, and batches that still fail
+        after the retries, are reported and left out.
+        """
+        try:
+            embeddings = self.create([text for _, text in batch])
+        except openai.BadRequestError as e:
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                return self.embed_batch(batch[:middle]) + self.embed_batch(batch[middle:])
+            print(f"[ERROR] Embedding rejected for a text of {self.count_tokens(batch[0][1])} tokens: {e}")
+            embeddings = None
+        except Exception as e:
+            print(f"[ERROR] Embedding failed for a batch of {len(batch)} texts: {e}")
+            embeddings = None
+
+        with self._lock:
+            if embeddings is None:
+                self.failed += len(batch)
+                return []
+            self.embedded += len(batch)
+        return [(key, embedding) for (key, _), embedding in zip(batch, embeddings)]
+
+    def embed(self, items: Iterable[Tuple[Any, str]]) -> Iterator[Tuple[Any, List[float]]]:
+        """
+        Embed a stream of (key, text) items
+
+        The items are consumed lazily, so reading and chunking the next files overlaps
+        with the requests in flight.
+
+        Yields:
+            (key, embedding) pairs in the order the batches complete
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = set()
+            for batch in token_batches(items, self.count_tokens, self.max_batch_tokens, self.max_batch_inputs):
+                if len(pending) >= self.concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+                pending.add(executor.submit(self.embed_batch, batch))
+            for future in as_completed(pending):
+                yield from future.result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "embedded": self.embedded,
+                "failed": self.failed,
+            }
+
+def batch_embedder_from_env(client, count_tokens: Callable[[str], int]) -> BatchEmbedder:
+    return BatchEmbedder(
+        client,
+        count_tokens,
+        max_batch_tokens=int(os.getenv("EMBED_BATCH_TOKENS", "50000")),
+        max_batch_inputs=int(os.getenv("EMBED_BATCH_SIZE", "512")),
+        concurrency=int(os.getenv("EMBED_CONCURRENCY", "4")),
+        max_retries=int(os.getenv("EMBED_MAX_RETRIES", "6")),
+    )
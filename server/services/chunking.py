@@ -0,0 +1,145 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence
+import tiktoken
+
+ENCODING_NAME = "cl100k_base"
+
+class Chunk(NamedTuple):
+    text: str
+    char_start: int  # Offsets of the chunk in the document
+    char_end: int
+    tokens: int
+
+def paragraphs_with_offsets(text: str):
+    """
+    Split text on blank lines
+
+    Returns:
+        (paragraph, start offset) of each non-empty paragraph, stripped of surrounding whitespace
+    """
+    paragraphs = []
+    position = 0
+    for raw in text.split("\n\n"):
+        paragraph = raw.strip()
+        if paragraph:
+            paragraphs.append((paragraph, position + len(raw) - len(raw.lstrip())))
+        position += len(raw) + 2
+    return paragraphs
+
+def pack_paragraphs(paragraphs, paragraph_tokens: Sequence[Sequence[int]], max_tokens: int,
+                    encoding) -> List[Chunk]:
+    """
+    Group tokenized paragraphs into chunks of at most max_tokens tokens
+
+    The paragraphs' token counts decide the chunk boundaries and are kept as the
+    chunks' token counts, so nothing is tokenized twice. A paragraph over the limit
+    is cut into windows of max_tokens tokens, sliced from the paragraph at the
+    tokens' character offsets instead of decoded back. Chunks stay in page order.
+    """
+    chunks = []
+    current, current_tokens = [], 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            start = current[0][1]
+            end = current[-1][1] + len(current[-1][0])
+            chunks.append(Chunk("\n\n".join(paragraph for paragraph, _ in current), start, end, current_tokens))
+        current, current_tokens = [], 0
+
+    for (paragraph, start), tokens in zip(paragraphs, paragraph_tokens):
+        count = len(tokens)
+        if count > max_tokens:
+            flush()  # the paragraphs before it come first
+            offsets = encoding.decode_with_offsets(tokens)[1] + [len(paragraph)]
+            for i in range(0, count, max_tokens):
+                window_start, window_end = offsets[i], offsets[min(i + max_tokens, count)]
+                chunks.append(Chunk(paragraph[window_start:window_end], start + window_start, start + window_end,
+                                    min(max_tokens, count - i)))
+            continue
+        if current_tokens + count > max_tokens:
+            flush()
+        current.append((paragraph, start))
+        current_tokens += count
+    flush()
+    return chunks
+
+def chunk_text(text: str, max_tokens: int, encoding=None) -> List[Chunk]:
+    """
+    Split a document into paragraph chunks of at most max_tokens tokens
+
+    Args:
+        text: The document
+        max_tokens: Maximum tokens per chunk
+        encoding: tiktoken encoding (cl100k_base by default)
+
+    Returns:
+        The chunks, with their offsets in text and token counts
+    """
+    encoding = encoding or tiktoken.get_encoding(ENCODING_NAME)
+    paragraphs = paragraphs_with_offsets(text)
+    tokens = [encoding.encode_ordinary(paragraph) for paragraph, _ in paragraphs]
+    return pack_paragraphs(paragraphs, tokens, max_tokens, encoding)
+
+# Encoding of a process pool worker, loaded once per process
+_process_encoding = None
+
+def _chunk_in_process(arguments):
+    global _process_encoding
+    if _process_encoding is None:
+        _process_encoding = tiktoken.get_encoding(ENCODING_NAME)
+    text, max_tokens = arguments
+    return chunk_text(text, max_tokens, _process_encoding)
+
+class Chunker:
+    """
+    Chunks documents in batches
+
+    The paragraphs of a whole batch of documents are tokenized with one call to
+    tiktoken's batch encoder, which runs the BPE on `threads` threads without the GIL.
+    With processes > 0, documents are chunked in a process pool instead, which also
+    spreads the splitting and packing over several cores.
+    """
+
+    def __init__(self, max_tokens: int, threads: int = 4, processes: int = 0, encoding=None):
+        """
+        Args:
+            max_tokens: Maximum tokens per chunk
+            threads: Threads of the batch tokenizer
+            processes: Size of the process pool (0 chunks in this process)
+            encoding: tiktoken encoding (cl100k_base by default)
+        """
+        self.max_tokens = max_tokens
+        self.threads = max(1, threads)
+        self.encoding = encoding or tiktoken.get_encoding(ENCODING_NAME)
+        self.processes = processes
+        self.pool: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(processes) if processes > 0 else None
+
+    def chunk(self, text: str) -> List[Chunk]:
+        return chunk_text(text, self.max_tokens, self.encoding)
+
+    def chunk_many(self, texts: Sequence[str]) -> List[List[Chunk]]:
+        """
+        Chunk a batch of documents
+
+        Returns:
+            The chunks of each document, in order
+        """
+        if self.pool is not None:
+            chunksize = max(1, len(texts) // (4 * self.processes))
+            return list(self.pool.map(_chunk_in_process, [(text, self.max_tokens) for text in texts], chunksize=chunksize))
+
+        documents = [paragraphs_with_offsets(text) for text in texts]
+        flat = [paragraph for paragraphs in documents for paragraph, _ in paragraphs]
+        tokens = self.encoding.encode_ordinary_batch(flat, num_threads=self.threads) if flat else []
+        results, position = [], 0
+        for paragraphs in documents:
+            results.append(pack_paragraphs(paragraphs, tokens[position:position + len(paragraphs)],
+                                           self.max_tokens, self.encoding))
+            position += len(paragraphs)
+        return results
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,167 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+from services.crawl_frontier import canonical_url
+
+class CrawlCache:
+    """
+    What the last crawls fetched from each URL: its validators (ETag, Last-Modified),
+    the hash of its extracted title and content, and its outgoing links
+
+    A recrawl sends the validators as a conditional GET. When the server answers 304
+    Not Modified, or the page comes back with the same content hash, the page is not
+    saved again, and the cached links are followed instead, so the pages behind an
+    unchanged page are still reached. Pages that are new or whose content changed
+    are recorded for the crawl's change report.
+
+    Workers update the cache concurrently. The entry of a new or changed page is only
+    kept once saved(url) says the page is on disk, so a cache saved at a checkpoint
+    never records content that a crash kept from being written.
+    """
+
+    def __init__(self, path):
+        """
+        Load the cache; a missing cache is empty
+
+        Args:
+            path: Path of the cache JSON file
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.unsaved: Dict[str, Dict[str, Any]] = {}  # entries of pages not written yet
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)["pages"]
+        self.lock = threading.Lock()
+        self.new: List[str] = []
+        self.changed: List[str] = []
+        self.gone: List[str] = []
+        self.not_modified = 0
+        self.unchanged = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a URL fetched before"""
+        entry = self.entries.get(canonical_url(url))
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified_links(self, url: str) -> Optional[List[str]]:
+        """
+        Record a 304 answer for a URL
+
+        Returns:
+            The cached links of the page, or None if it isn't cached (the page must be fetched again)
+        """
+        key = canonical_url(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry["checked_at"] = time.time()
+            self.not_modified += 1
+            return entry["links"]
+
+    def update(self, url: str, headers, title: str, content: str, links: Iterable[str]) -> bool:
+        """
+        Record a fetched page
+
+        Args:
+            url: The page URL
+            headers: The response headers
+            title: The extracted title
+            content: The extracted content
+            links: The page's outgoing links
+
+        Returns:
+            Whether the page is new or its content changed since the last crawl
+        """
+        key = canonical_url(url)
+        digest = hashlib.sha256(f"{title}\n{content}".encode("utf-8")).hexdigest()
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            modified = entry is None or entry["content_hash"] != digest
+            if entry is None:
+                self.new.append(url)
+            elif modified:
+                self.changed.append(url)
+            else:
+                self.unchanged += 1
+            (self.unsaved if modified else self.entries)[key] = {
+                "url": url,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "content_hash": digest,
+                "links": list(links),
+                "fetched_at": now if modified else entry["fetched_at"],
+                "checked_at": now,
+            }
+        return modified
+
+    def saved(self, url: str):
+        """Keep the entry of a new or changed page, now that it is written"""
+        key = canonical_url(url)
+        with self.lock:
+            if key in self.unsaved:
+                self.entries[key] = self.unsaved.pop(key)
+
+    def remove(self, url: str):
+        """Drop a page the server says is gone (404 or 410); it is reported as missing"""
+        with self.lock:
+            entry = self.entries.pop(canonical_url(url), None)
+            if entry is not None:
+                self.gone.append(entry["url"])
+
+    def report(self, reached: Optional[set] = None,
+               in_scope: Callable[[str], bool] = lambda url: True) -> Dict[str, Any]:
+        """
+        Changes found by this crawl
+
+        Args:
+            reached: Canonical URLs reached by a crawl that ran until its frontier was empty
+                (None if it stopped early); the cached pages in scope it did not reach are
+                reported as missing, and dropped from the cache, with the pages that are gone
+            in_scope: Whether a cached URL is under the crawl's start URLs
+        """
+        missing = list(self.gone)
+        if reached is not None:
+            with self.lock:
+                for key in [key for key, entry in self.entries.items() if key not in reached and in_scope(entry["url"])]:
+                    missing.append(self.entries.pop(key)["url"])
+        return {
+            "new": self.new,
+            "changed": self.changed,
+            "missing": sorted(missing),
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+        }
+
+    def save(self):
+        """Write the cache atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with self.lock:
+            data = json.dumps({"pages": self.entries})
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temporary, self.path)
+
+def write_report(report: Dict[str, Any], path):
+    """Write a crawl's change report as JSON"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(temporary, path)
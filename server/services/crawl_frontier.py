@@ -0,0 +1,113 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import heapq
+import json
+import os
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+@lru_cache(maxsize=65536)
+def canonical_url(url: str) -> str:
+    """
+    Canonical form of a URL, the same for every spelling of one page
+
+    The scheme and host are lowercased, default ports and the fragment dropped, the
+    trailing slash removed, and the query parameters sorted, without utm_* and other
+    tracking parameters. Results are cached: pages link to the same URLs again and again.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip('/')
+    query = sorted((key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                   if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS)
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+class Frontier:
+    """
+    Crawl frontier: the URLs waiting to be fetched, in priority order, and every URL seen
+
+    URLs are compared in canonical form, against a set, so checking a link costs the
+    same however large the crawl. Waiting URLs are kept in a heap ordered by
+    priority(url, depth), lowest first, then by discovery order. The frontier can be
+    saved and loaded, so a crawl resumes with its seen URLs and pending queue (and
+    URLs that were being fetched when it was saved) without reading the saved pages.
+    """
+
+    def __init__(self, priority: Callable[[str, int], float] = lambda url, depth: depth):
+        """
+        Args:
+            priority: Function of a URL and its link depth from the start URL; lower is crawled sooner
+        """
+        self.priority = priority
+        self.seen = set()
+        self.heap: List[Tuple[float, int, str, int]] = []
+        self.in_progress: Dict[str, Tuple[float, int]] = {}
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def pending(self) -> int:
+        """URLs left to fetch: queued or in progress"""
+        return len(self.heap) + len(self.in_progress)
+
+    def __contains__(self, url: str) -> bool:
+        return canonical_url(url) in self.seen
+
+    def _push(self, url: str, depth: int, priority: float):
+        heapq.heappush(self.heap, (priority, self.sequence, url, depth))
+        self.sequence += 1
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """Queue a URL unless it was seen before; returns whether it was queued"""
+        key = canonical_url(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self._push(url, depth, self.priority(url, depth))
+        return True
+
+    def mark_seen(self, urls: Iterable[str]):
+        """Record URLs as seen (already crawled) without queueing them"""
+        self.seen.update(canonical_url(url) for url in urls)
+
+    def pop(self) -> Tuple[str, int]:
+        """Take the next URL to fetch, as (url, depth); it is in progress until done(url)"""
+        priority, _, url, depth = heapq.heappop(self.heap)
+        self.in_progress[url] = (priority, depth)
+        return url, depth
+
+    def done(self, url: str):
+        self.in_progress.pop(url, None)
+
+    def save(self, path):
+        """Write the seen URLs and the queue (with the URLs in progress) atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pending = [[url, depth, priority] for priority, _, url, depth in sorted(self.heap)]
+        pending = [[url, depth, priority] for url, (priority, depth) in self.in_progress.items()] + pending
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"seen": sorted(self.seen), "pending": pending}, f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, priority: Callable[[str, int], float] = lambda url, depth: depth) -> Optional["Frontier"]:
+        """Load a saved frontier; returns None if there is none"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        frontier = cls(priority)
+        frontier.seen = set(state["seen"])
+        for url, depth, url_priority in state["pending"]:
+            frontier._push(url, depth, url_priority)
+        return frontier
@@ -0,0 +1,183 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from services.crawl_frontier import Frontier
+
+# scrape(url, session) -> (title, content, links); title and content are None for pages not worth saving
+ScrapeFunction = Callable[[str, requests.Session], Tuple[Optional[str], Optional[str], List[str]]]
+
+class HostLimiter:
+    """
+    Per-host politeness: at most `concurrency` requests in flight to a host, and request
+    starts spaced at least `delay` seconds apart on each host
+
+    The crawl loop counts the requests in flight (start/finish) and only dispatches a URL
+    when its host has a free slot; the worker then waits for the host's next start time,
+    so a slow or rate-limited host doesn't hold back the others.
+    """
+
+    def __init__(self, concurrency: int = 4, delay: float = 0.1):
+        self.concurrency = max(1, concurrency)
+        self.delay = delay
+        self.in_flight: Dict[str, int] = {}
+        self.next_start: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def available(self, host: str) -> bool:
+        return self.in_flight.get(host, 0) < self.concurrency
+
+    def start(self, host: str):
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+
+    def finish(self, host: str):
+        self.in_flight[host] -= 1
+
+    def wait(self, host: str):
+        """Sleep until the host's next request may start (called by the workers)"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+def crawl_scopes(start_urls: Iterable[str]) -> List[Tuple[str, str]]:
+    """(host, base path) of each start URL; a link is followed if it is under one of them"""
+    scopes = []
+    for start_url in start_urls:
+        parsed = urlparse(start_url)
+        scopes.append((parsed.netloc, parsed.path.rstrip('/')))
+    return scopes
+
+def in_scope(url: str, scopes: List[Tuple[str, str]]) -> bool:
+    parsed = urlparse(url)
+    return any(parsed.netloc == host and parsed.path.startswith(base_path) for host, base_path in scopes)
+
+class Crawler:
+    """
+    Concurrent crawl engine
+
+    Pages are fetched on a thread pool. Each worker thread keeps its own requests
+    session, so connections to a host are pooled and kept alive instead of opened for
+    every page. All start URLs share one frontier, taken in priority order, and the
+    per-host limits replace a global sleep between requests: hosts are crawled in
+    parallel, each at its own polite rate.
+    """
+
+    def __init__(self, scrape: ScrapeFunction, workers: int = 16, host_concurrency: int = 4,
+                 host_delay: float = 0.1):
+        """
+        Args:
+            scrape: Function fetching and parsing a page with the given session
+            workers: Threads fetching pages
+            host_concurrency: Maximum requests in flight to one host
+            host_delay: Minimum seconds between request starts on one host
+        """
+        self.scrape = scrape
+        self.workers = max(1, workers)
+        self.limiter = HostLimiter(host_concurrency, host_delay)
+        self.local = threading.local()
+        self.sessions: List[requests.Session] = []
+        self.sessions_lock = threading.Lock()
+        self.pages = 0
+        self.saved = 0
+
+    def session(self) -> requests.Session:
+        """The calling thread's session"""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.limiter.concurrency)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.local.session = session
+            with self.sessions_lock:
+                self.sessions.append(session)
+        return session
+
+    def fetch(self, url: str):
+        self.limiter.wait(urlparse(url).netloc)
+        return self.scrape(url, self.session())
+
+    def crawl(self, start_urls: Iterable[str], frontier: Optional[Frontier] = None,
+              max_pages: int = 0) -> Iterator[Tuple[str, str, str]]:
+        """
+        Crawl from the start URLs, following the links under any of them
+
+        Args:
+            start_urls: URLs to start from; each also bounds the crawl to its host and path
+            frontier: Frontier to continue (a new one by default); start URLs it has seen are not queued again
+            max_pages: Stop dispatching after this many pages (0 crawls until the frontier is empty);
+                the URLs left stay in the frontier
+
+        Yields:
+            (url, title, content) of each page worth saving, as pages complete
+        """
+        start_urls = list(start_urls)
+        scopes = crawl_scopes(start_urls)
+        frontier = frontier if frontier is not None else Frontier()
+        for url in start_urls:
+            frontier.add(url, 0)
+
+        # (url, depth) taken from the frontier and waiting for a free slot on their host; at most
+        # `workers` URLs are taken ahead, so newly found links can still be crawled before the rest
+        deferred: Dict[str, deque] = {}
+        waiting = 0
+        in_flight = {}
+        dispatched = 0
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            def dispatch(url, depth):
+                nonlocal dispatched
+                self.limiter.start(urlparse(url).netloc)
+                in_flight[pool.submit(self.fetch, url)] = (url, depth)
+                dispatched += 1
+
+            def budget_left():
+                return not max_pages or dispatched < max_pages
+
+            while (frontier and budget_left()) or in_flight:
+                while frontier and len(in_flight) + waiting < self.workers and budget_left():
+                    url, depth = frontier.pop()
+                    host = urlparse(url).netloc
+                    if self.limiter.available(host):
+                        dispatch(url, depth)
+                    else:
+                        deferred.setdefault(host, deque()).append((url, depth))
+                        waiting += 1
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = in_flight.pop(future)
+                    host = urlparse(url).netloc
+                    self.limiter.finish(host)
+                    self.pages += 1
+                    try:
+                        title, content, links = future.result()
+                    except Exception as e:
+                        print(f"Error scraping {url}: {e}")
+                        title, content, links = None, None, []
+                    print(f"[{self.pages}] Processed: {url}")
+
+                    for link in links:
+                        if in_scope(link, scopes):
+                            frontier.add(link, depth + 1)
+                    frontier.done(url)
+                    if deferred.get(host) and budget_left():
+                        dispatch(*deferred[host].popleft())
+                        waiting -= 1
+
+                    if title and content:
+                        self.saved += 1
+                        yield url, title, content
+
+        for session in self.sessions:
+            session.close()
+        self.sessions = []
@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+
+DEFAULT_STORE_PATH = Path(__file__).resolve().parent.parent / "data" / "document_store"
+
+# The texts, then the JSON id -> (offset, length) table, then the table's length
+STORE_FILE = "documents.pack"
+TABLE_LENGTH = struct.Struct("<Q")
+
+# Stores written before the table moved into the packed file kept it in a file of its own
+LEGACY_TEXTS_FILE = "documents.bin"
+LEGACY_INDEX_FILE = "documents.json"
+
+class DocumentStoreWriter:
+    """
+    Writes the texts of indexed documents into a single packed file
+
+    Texts are appended to a temporary file as they are ingested, so the corpus is
+    never held in memory; close() appends the id -> (offset, length) table and moves
+    the file into place with one atomic rename, so a crash leaves either the previous
+    store or the new one, never the texts of one with the table of the other.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Args:
+            path: Directory of the document store
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path / (STORE_FILE + ".tmp"), "wb")
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+        self.size = 0
+
+    def add(self, vector_id: str, text: str):
+        """
+        Add the text of a vector
+
+        Args:
+            vector_id: The id of the vector in the index
+            text: The text retrieved for the vector
+        """
+        data = text.encode("utf-8")
+        self.file.write(data)
+        self.offsets[vector_id] = (self.size, len(data))
+        self.size += len(data)
+
+    def close(self):
+        """Finish writing and replace the previous store"""
+        table = json.dumps(self.offsets).encode("utf-8")
+        self.file.write(table)
+        self.file.write(TABLE_LENGTH.pack(len(table)))
+        self.file.close()
+        os.replace(self.path / (STORE_FILE + ".tmp"), self.path / STORE_FILE)
+        for name in (LEGACY_INDEX_FILE, LEGACY_TEXTS_FILE):
+            (self.path / name).unlink(missing_ok=True)
+
+    def abort(self):
+        """Discard the texts written so far and keep the previous store"""
+        self.file.close()
+        os.remove(self.path / (STORE_FILE + ".tmp"))
+
+    def __enter__(self) -> "DocumentStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+class DocumentStore:
+    """
+    Read-only store of the texts behind the vector index, keyed by vector id
+
+    The packed file is memory-mapped, so opening the store reads only the offset
+    table, a lookup is a dict access plus a slice of the mapping, and workers on the
+    same host share the pages. The location comes from DOCUMENT_STORE_PATH or the
+    default under server/data, never from the working directory.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Open the store; a missing store is empty
+
+        Args:
+            path: Directory of the document store
+        """
+        self.path = Path(path)
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+        self._mmap = None
+        self._view = memoryview(b"")
+
+        if (self.path / STORE_FILE).exists():
+            with open(self.path / STORE_FILE, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            footer = len(self._mmap) - TABLE_LENGTH.size
+            (length,) = TABLE_LENGTH.unpack(self._mmap[footer:])
+            self.offsets = {vector_id: tuple(span)
+                            for vector_id, span in json.loads(self._mmap[footer - length:footer]).items()}
+            self._view = memoryview(self._mmap)[:footer - length]
+        elif (self.path / LEGACY_INDEX_FILE).exists():
+            with open(self.path / LEGACY_INDEX_FILE, "r", encoding="utf-8") as f:
+                self.offsets = {vector_id: tuple(span) for vector_id, span in json.load(f).items()}
+            if os.path.getsize(self.path / LEGACY_TEXTS_FILE):
+                with open(self.path / LEGACY_TEXTS_FILE, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+
+    def get_bytes(self, vector_id: str) -> Optional[memoryview]:
+        """
+        Get the UTF-8 text of a vector without copying it
+
+        Args:
+            vector_id: The id of the vector in the index
+
+        Returns:
+            A view into the mapped file, or None if the id is not stored
+        """
+        span = self.offsets.get(vector_id)
+        if span is None:
+            return None
+        offset, length = span
+        return self._view[offset:offset + length]
+
+    def get(self, vector_id: str) -> Optional[str]:
+        """
+        Get the text of a vector
+
+        Args:
+            vector_id: The id of the vector in the index
+
+        Returns:
+            The text, or None if the id is not stored
+        """
+        data = self.get_bytes(vector_id)
+        return str(data, "utf-8") if data is not None else None
+
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def stats(self):
+        """Number of stored texts and size of the packed file"""
+        return {"documents": len(self.offsets), "bytes": len(self._view)}
+
+def document_store_path() -> str:
+    return os.getenv("DOCUMENT_STORE_PATH", str(DEFAULT_STORE_PATH))
@@ -1,5 +1,7 @@
 # services/duke_api_service/base.py
+import asyncio
 import requests
+import httpx
 import json
 import os
 import logging
@@ -13,9 +15,11 @@ class DukeApiServiceBase:
     def __init__(self, api_base_url: str, api_key: Optional[str] = None):
         self.api_base_url = api_base_url
         self.api_key = api_key
-        
-    def _make_request(self, endpoint: str, method: str = "GET", params: Optional[Dict[str, Any]] = None):
-        """Make a request to the Duke API"""
+        # event loop -> pooled client; a client only works in the loop it was first used in
+        self._async_clients = {}
+
+    def _build_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None):
+        """Build the URL, headers and params for a Duke API request"""
         url = f"{self.api_base_url}/{endpoint}"
         headers = {}
         # headers["Authorization"] = f"Bearer {self.api_key}"
@@ -28,6 +32,12 @@ class DukeApiServiceBase:
 
         if self.api_key:
             params["access_token"] = self.api_key
+
+        return url, headers, params
+        
+    def _make_request(self, endpoint: str, method: str = "GET", params: Optional[Dict[str, Any]] = None):
+        """Make a request to the Duke API"""
+        url, headers, params = self._build_request(endpoint, params)
             
         try:
             if method == "GET":
@@ -42,6 +52,41 @@ class DukeApiServiceBase:
             # Log error
             print(f"Error accessing Duke API: {e}")
             return None
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """The pooled client of the running event loop, created on its first request"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            # Forget the clients of loops that are gone (e.g. each asyncio.run)
+            for closed in [other for other in self._async_clients if other.is_closed()]:
+                del self._async_clients[closed]
+            client = self._async_clients[loop] = httpx.AsyncClient(timeout=30)
+        return client
+
+    async def aclose(self):
+        """Close the running event loop's client (on shutdown)"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def _amake_request(self, endpoint: str, method: str = "GET", params: Optional[Dict[str, Any]] = None):
+        """Make a request to the Duke API without blocking the event loop"""
+        url, headers, params = self._build_request(endpoint, params)
+        client = self._async_client()
+
+        try:
+            if method == "GET":
+                response = await client.get(url, params=params, headers=headers)
+            elif method == "POST":
+                response = await client.post(url, json=params, headers=headers)
+
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError: the response isn't JSON
+            print(f"Error accessing Duke API: {e}")
+            return None
     
     def load_metadata(self, metadata_name: str) -> Dict:
         """Load metadata from JSON file"""
@@ -38,6 +38,19 @@ class PlacesApiService(DukeApiServiceBase):
             return []
 
         return api_response
+
+    async def aget_places_by_value(self, place_value: str) -> List[Dict]:
+        """Async version of get_places_by_value"""
+        if place_value not in self.places_values:
+            print('Place Value for the place Duke API invalid!')
+            return []
+
+        api_response = await self._amake_request("places/items", params={'tag': place_value})
+
+        if not api_response:
+            return []
+
+        return api_response
     
     def get_places_by_all_values(self) -> List[Dict]:
         """
@@ -75,6 +88,15 @@ class PlacesApiService(DukeApiServiceBase):
 
         return api_response
 
+    async def aget_place_details_by_id(self, place_id: str) -> Dict:
+        """Async version of get_place_details_by_id"""
+        api_response = await self._amake_request("places/items/index", params={'place_id': place_id})
+
+        if not api_response:
+            return []
+
+        return api_response
+
         
 
 def main():
@@ -0,0 +1,234 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import numpy as np
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Share of max_disk_entries kept when the on-disk tier is pruned, so pruning runs once per many inserts
+DISK_PRUNE_TARGET = 0.9
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case, which don't change what a query asks"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+class EmbeddingCache:
+    """
+    Cache of text embeddings keyed by model name and normalized text
+
+    A bounded LRU dict in memory sits in front of an optional SQLite file. The file
+    stores each embedding as a float16 blob (3 KB for ada-002 instead of ~30 KB as
+    JSON), survives restarts and is shared by every worker process on the host;
+    SQLite's WAL mode lets them read while one writes.
+
+    The file holds at most max_disk_entries embeddings: past that, the least
+    recently used are deleted down to DISK_PRUNE_TARGET of the limit. Its size is
+    counted once when it is opened and at each prune, and kept as running counters
+    in between (writes of other processes show up at the next prune).
+    """
+
+    def __init__(self, max_entries: int = 10000, db_path: Optional[str] = None,
+                 max_disk_entries: int = 100000):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of embeddings kept in memory
+            db_path: Path to the SQLite file of the on-disk tier (None keeps the cache in memory only)
+            max_disk_entries: Maximum number of embeddings kept in the SQLite file (0 for no limit)
+        """
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.disk_entries = 0
+        self.disk_bytes = 0
+
+        # key -> float32 embedding, ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            # Files written before the disk tier was bounded have no used_at column
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(embeddings)")}
+            if "used_at" not in columns:
+                self.conn.execute("ALTER TABLE embeddings ADD COLUMN used_at REAL NOT NULL DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings (used_at)")
+            self.conn.commit()
+            self._count_disk()
+
+        # Counters used to size the cache
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def key(self, model: str, text: str) -> str:
+        return f"{model}\n{normalize_text(text)}"
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up an embedding, promoting on-disk hits to memory
+
+        Args:
+            model: The embedding model name
+            text: The embedded text
+
+        Returns:
+            The embedding, or None on a miss
+        """
+        key = self.key(model, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return vector.tolist()
+
+            row = None
+            if self.conn is not None:
+                row = self.conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self.conn.execute("UPDATE embeddings SET used_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            vector = np.frombuffer(row[0], dtype=np.float16).astype(np.float32)
+            self._remember(key, vector)
+            return vector.tolist()
+
+    def put(self, model: str, text: str, embedding: List[float]):
+        """
+        Store an embedding in memory and, if enabled, on disk
+
+        Args:
+            model: The embedding model name
+            text: The embedded text
+            embedding: The embedding
+        """
+        key = self.key(model, text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self.conn is not None:
+                blob = vector.astype(np.float16).tobytes()
+                now = time.time()
+                inserted = self.conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, created_at, used_at) VALUES (?, ?, ?, ?)",
+                    (key, blob, now, now)
+                ).rowcount
+                if inserted:
+                    self.disk_entries += 1
+                    self.disk_bytes += len(blob)
+                else:
+                    self.conn.execute("UPDATE embeddings SET vector = ?, used_at = ? WHERE key = ?", (blob, now, key))
+                self.conn.commit()
+                if self.max_disk_entries and self.disk_entries > self.max_disk_entries:
+                    self._prune_disk()
+
+    def _count_disk(self):
+        """Count the embeddings and blob bytes of the SQLite file"""
+        self.disk_entries, self.disk_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+
+    def _prune_disk(self):
+        """Delete the least recently used embeddings of the SQLite file, down to DISK_PRUNE_TARGET of the limit"""
+        deleted = self.conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (int(self.max_disk_entries * DISK_PRUNE_TARGET),)
+        ).rowcount
+        self.conn.commit()
+        self.disk_evictions += deleted
+        self._count_disk()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def embed(self, model: str, text: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Get an embedding from the cache, computing and storing it on a miss
+
+        Args:
+            model: The embedding model name
+            text: The text to embed
+            compute: Function calling the embedding model
+
+        Returns:
+            The embedding
+        """
+        embedding = self.get(model, text)
+        if embedding is None:
+            embedding = compute(text)
+            self.put(model, text, embedding)
+        return embedding
+
+    async def aembed(self, model: str, text: str, compute: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Async version of embed (lookups are local and fast, so only the model call is awaited)"""
+        embedding = self.get(model, text)
+        if embedding is None:
+            embedding = await compute(text)
+            self.put(model, text, embedding)
+        return embedding
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache's size and counters
+
+        Returns:
+            A dictionary of hit ratio and memory/disk usage metrics
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "memory_entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_bytes": self._bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+            if self.conn is not None:
+                stats.update(disk_entries=self.disk_entries, disk_bytes=self.disk_bytes,
+                             max_disk_entries=self.max_disk_entries, disk_evictions=self.disk_evictions,
+                             disk_file_bytes=os.path.getsize(self.db_path))
+            return stats
+
+def create_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Build the embedding cache from the environment
+
+    Disabled with EMBEDDING_CACHE=false; EMBEDDING_CACHE_SIZE bounds the memory tier,
+    EMBEDDING_CACHE_DB_PATH enables the on-disk tier and EMBEDDING_CACHE_DB_MAX_ENTRIES
+    bounds it.
+    """
+    if os.getenv("EMBEDDING_CACHE", "true").lower() != "true":
+        return None
+    return EmbeddingCache(
+        max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+        db_path=os.getenv("EMBEDDING_CACHE_DB_PATH"),
+        max_disk_entries=int(os.getenv("EMBEDDING_CACHE_DB_MAX_ENTRIES", "100000"))
+    )
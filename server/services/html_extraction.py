@@ -0,0 +1,192 @@
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+import os
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # Optional, only needed for the lxml backend
+    etree = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Optional, only needed for the selectolax backend
+    LexborHTMLParser = None
+
+# Links to files aren't crawled; str.endswith takes the whole tuple at once
+FILE_EXTENSIONS = ('.pdf', '.doc', '.docx', '.jpg', '.jpeg', '.png', '.gif',
+                   '.ppt', '.pptx', '.xls', '.xlsx', '.zip', '.mp3', '.mp4')
+
+# Elements left out of the main content (and whose links aren't followed)
+SKIPPED_TAGS = frozenset(["script", "style", "nav", "footer", "header", "aside"])
+
+class Extraction(NamedTuple):
+    title: Optional[str]  # None when the page has no usable <title>
+    content: str
+    links: List[str]  # Absolute URLs, without links to files
+
+def extract_main_content(soup) -> str:
+    """
+    Extract the main content from the webpage, removing navigation, ads, etc.
+
+    Args:
+        soup: The BeautifulSoup object containing the parsed HTML
+
+    Returns:
+        The main content text of the webpage
+    """
+    # Remove script and style elements
+    for script in soup(list(SKIPPED_TAGS)):
+        script.extract()
+    return clean_text(soup.get_text(separator=' '))
+
+def clean_text(text: str) -> str:
+    """One phrase per line: lines and double-space separated phrases, stripped, without empty ones"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def resolve_links(url: str, hrefs: List[str]) -> List[str]:
+    """Absolute URLs of a page's hrefs, without links to files"""
+    links = []
+    for href in hrefs:
+        # handle relative URLs
+        full_url = href if href.startswith(('http://', 'https://')) else urljoin(url, href)
+        if not full_url.lower().endswith(FILE_EXTENSIONS):
+            links.append(full_url)
+    return links
+
+class _PageCollector:
+    """
+    Collects the title, main text and links of a page from a stream of parser events,
+    in one pass and without building a tree
+
+    The methods follow lxml's parser target interface (start, end, data, close); the
+    html.parser backend calls them from its own handlers. Text and links inside
+    SKIPPED_TAGS are dropped, and the title is the first <title>, if it holds only text.
+    """
+
+    def __init__(self):
+        self.skip_depth = 0
+        self.title_parts: Optional[List[str]] = None
+        self.in_title = False
+        self.texts: List[str] = []
+        self.hrefs: List[str] = []
+
+    def start(self, tag: str, attrib: Dict[str, Optional[str]]):
+        if self.in_title:
+            self.title_parts = []  # markup in the title: no usable title
+            self.in_title = False
+        if tag == "title" and self.title_parts is None:
+            self.title_parts = []
+            self.in_title = True
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == "a" and not self.skip_depth:
+            href = attrib.get("href")
+            if href is not None:
+                self.hrefs.append(href)
+
+    def end(self, tag: str):
+        if tag == "title":
+            self.in_title = False
+        elif tag in SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, data: str):
+        if self.in_title:
+            self.title_parts.append(data)
+        if not self.skip_depth:
+            self.texts.append(data)
+
+    def close(self) -> Tuple[Optional[str], str, List[str]]:
+        title = "".join(self.title_parts) if self.title_parts else None
+        return (title.strip() if title else None), clean_text(" ".join(self.texts)), self.hrefs
+
+class _StreamingHTMLParser(HTMLParser):
+    """html.parser events forwarded to a _PageCollector"""
+
+    def __init__(self, collector: _PageCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        if tag in SKIPPED_TAGS or tag == "title":
+            self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+def _extract_html_parser(html: str):
+    collector = _PageCollector()
+    parser = _StreamingHTMLParser(collector)
+    parser.feed(html)
+    parser.close()
+    return collector.close()
+
+def _extract_lxml(html: str):
+    parser = etree.HTMLParser(target=_PageCollector())
+    parser.feed(html)
+    return parser.close()
+
+def _extract_selectolax(html: str):
+    tree = LexborHTMLParser(html)
+    title_node = tree.css_first("title")
+    title = title_node.text(deep=True) if title_node is not None else None
+    tree.strip_tags(list(SKIPPED_TAGS))
+    hrefs = [node.attributes["href"] for node in tree.css("a[href]") if node.attributes.get("href") is not None]
+    text = tree.root.text(separator=' ') if tree.root is not None else ""
+    return (title.strip() if title else None), clean_text(text), hrefs
+
+def _extract_bs4(html: str):
+    soup = BeautifulSoup(html, 'html.parser')
+    title_tag = soup.find('title')
+    title = title_tag.string.strip() if title_tag and title_tag.string else None
+    content = extract_main_content(soup)
+    hrefs = [a['href'] for a in soup.find_all('a', href=True)]
+    return title, content, hrefs
+
+BACKENDS: Dict[str, Callable[[str], Tuple[Optional[str], str, List[str]]]] = {
+    "html.parser": _extract_html_parser,
+    "bs4": _extract_bs4,
+}
+if etree is not None:
+    BACKENDS["lxml"] = _extract_lxml
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = _extract_selectolax
+
+def default_backend() -> str:
+    """
+    The HTML_PARSER backend; "auto" (the default) is the standard library's html.parser,
+    the backend checked against bs4 (the previous BeautifulSoup extraction). lxml and
+    selectolax are only used when HTML_PARSER names them.
+    """
+    backend = os.getenv("HTML_PARSER", "auto")
+    if backend == "auto":
+        return "html.parser"
+    if backend not in BACKENDS:
+        raise ValueError(f"HTML parser backend {backend!r} is not installed (available: {', '.join(BACKENDS)})")
+    return backend
+
+def extract_page(html: str, url: str, backend: Optional[str] = None) -> Extraction:
+    """
+    Extract the title, main content and links of a page
+
+    Args:
+        html: The page HTML
+        url: The page URL, to resolve relative links
+        backend: Parser backend (see BACKENDS; default_backend() by default)
+
+    Returns:
+        The title (None if missing), main content and absolute links of the page
+    """
+    title, content, hrefs = BACKENDS[backend or default_backend()](html)
+    return Extraction(title, content, resolve_links(url, hrefs))
@@ -0,0 +1,109 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+
+DEFAULT_MANIFEST_PATH = Path(__file__).resolve().parent.parent / "data" / "ingestion_manifest.json"
+
+def document_id(source: str) -> str:
+    """
+    Stable id of a scraped page, derived from its path in the scraped data
+
+    The same page keeps the same id (and its chunks the same vector ids) from one
+    ingestion to the next, whatever else is added or removed.
+    """
+    return "doc_" + hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class IngestionManifest:
+    """
+    Record of what is in the vector index: for each document, the hash of the content
+    that was embedded and the ids of its vectors
+
+    Ingestion embeds only the documents whose hash changed (or that are new), and
+    deletes the vectors of documents that are gone and of chunks a document no longer
+    has. If the settings that shape the vectors (embedding model, chunk size) differ
+    from the recorded ones, every document counts as changed.
+
+    Ingestion saves the manifest at checkpoints while it runs, recording only the
+    documents whose vectors are all uploaded, so an interrupted run resumes with the
+    documents it had not finished. complete is False until a run saves it at the end.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH, settings: Optional[Dict[str, Any]] = None):
+        """
+        Load the manifest; a missing manifest is empty
+
+        Args:
+            path: Path of the manifest JSON file
+            settings: Ingestion settings the recorded vectors must match
+        """
+        self.path = Path(path)
+        self.settings = settings or {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.exists = self.path.exists()
+        self.complete = False
+        if self.exists:
+            with open(self.path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.documents = manifest["documents"]
+            self.complete = manifest.get("complete", True)
+            if manifest.get("settings", {}) != self.settings:
+                # Keep the vector ids, to delete the ones the new settings don't produce
+                for entry in self.documents.values():
+                    entry["content_hash"] = None
+
+    def changed(self, doc_id: str, digest: str) -> bool:
+        """Whether a document must be embedded: it is new, its content changed or the settings did"""
+        entry = self.documents.get(doc_id)
+        return entry is None or entry["content_hash"] != digest
+
+    def stale_ids(self, doc_id: str, vector_ids: Iterable[str]) -> List[str]:
+        """Recorded vector ids of a document that its new vectors don't overwrite"""
+        current = set(vector_ids)
+        return [vector_id for vector_id in self.documents.get(doc_id, {}).get("vector_ids", []) if vector_id not in current]
+
+    def record(self, doc_id: str, entry: Dict[str, Any]):
+        """
+        Record the vectors of a document
+
+        Args:
+            doc_id: The document id
+            entry: {"file_path", "content_hash", "vector_ids"}; a content_hash of None makes
+                the next ingestion embed the document again
+        """
+        self.documents[doc_id] = entry
+
+    def remove_missing(self, seen: Iterable[str]) -> List[str]:
+        """
+        Forget the documents not seen in this ingestion
+
+        Returns:
+            The vector ids of the removed documents
+        """
+        seen = set(seen)
+        removed = []
+        for doc_id in [doc_id for doc_id in self.documents if doc_id not in seen]:
+            removed.extend(self.documents.pop(doc_id)["vector_ids"])
+        return removed
+
+    def save(self, complete: bool = True):
+        """
+        Write the manifest atomically
+
+        Args:
+            complete: Whether the ingestion finished (False at intermediate checkpoints)
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "complete": complete, "documents": self.documents}, f)
+        os.replace(temporary, self.path)
+        self.exists = True
+        self.complete = complete
+
+def ingestion_manifest_path() -> str:
+    return os.getenv("INGESTION_MANIFEST_PATH", str(DEFAULT_MANIFEST_PATH))
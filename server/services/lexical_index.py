@@ -0,0 +1,223 @@
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import json
+import os
+import re
+
+DEFAULT_LEXICAL_INDEX_PATH = Path(__file__).resolve().parent.parent / "data" / "lexical_index"
+
+TABLE_FILE = "lexical.json"
+ARRAY_FILES = ("offsets", "postings_docs", "postings_tfs", "doc_lengths")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "the to what when where which who will with you your".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for BM25
+
+    Course codes are indexed in every form users type them: "AIPI540" also yields
+    "aipi" and "540", and "AIPI 540" also yields "aipi540".
+    """
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    terms = []
+    for i, word in enumerate(words):
+        if word in STOPWORDS:
+            continue
+        terms.append(word)
+        parts = re.findall(r"[a-z]+|[0-9]+", word)
+        if len(parts) > 1:
+            terms.extend(parts)
+        elif word.isalpha() and i + 1 < len(words) and words[i + 1].isdigit():
+            terms.append(word + words[i + 1])
+    return terms
+
+class LexicalIndexWriter:
+    """
+    Builds a BM25 inverted index over the ingested chunks
+
+    Postings are kept as flat arrays in CSR layout: for term t, postings_docs and
+    postings_tfs[offsets[t]:offsets[t + 1]] hold the documents containing it and the
+    term's frequency in each.
+    """
+
+    def __init__(self, path=DEFAULT_LEXICAL_INDEX_PATH):
+        """
+        Args:
+            path: Directory of the lexical index
+        """
+        self.path = Path(path)
+        self.terms: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.doc_lengths: List[int] = []
+        self._term_ids: List[int] = []
+        self._docs: List[int] = []
+        self._tfs: List[int] = []
+
+    def add(self, vector_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Index a chunk
+
+        Args:
+            vector_id: The chunk's id in the vector index and document store
+            text: The chunk text
+            metadata: The chunk's vector metadata (source page and position)
+        """
+        doc = len(self.ids)
+        terms = tokenize(text)
+        self.ids.append(vector_id)
+        self.metadata.append(metadata or {})
+        self.doc_lengths.append(len(terms))
+        for term, tf in Counter(terms).items():
+            self._term_ids.append(self.terms.setdefault(term, len(self.terms)))
+            self._docs.append(doc)
+            self._tfs.append(tf)
+
+    def close(self):
+        """Sort the postings by term and write the index"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        term_ids = np.asarray(self._term_ids, dtype=np.int64)
+        # A stable sort keeps each term's postings in document order
+        order = np.argsort(term_ids, kind="stable")
+        arrays = {
+            "offsets": np.concatenate([[0], np.cumsum(np.bincount(term_ids, minlength=len(self.terms)))]).astype(np.int64),
+            "postings_docs": np.asarray(self._docs, dtype=np.int32)[order],
+            "postings_tfs": np.asarray(self._tfs, dtype=np.uint16 if max(self._tfs, default=0) < 2 ** 16 else np.int32)[order],
+            "doc_lengths": np.asarray(self.doc_lengths, dtype=np.int32),
+        }
+        for name in ARRAY_FILES:
+            temporary = self.path / f"{name}.npy.tmp"
+            with open(temporary, "wb") as f:
+                np.save(f, arrays[name])
+            os.replace(temporary, self.path / f"{name}.npy")
+
+        temporary = self.path / (TABLE_FILE + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"terms": list(self.terms), "ids": self.ids, "metadata": self.metadata}, f)
+        os.replace(temporary, self.path / TABLE_FILE)
+
+    def __enter__(self) -> "LexicalIndexWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+class LexicalIndex:
+    """
+    Read-only BM25 index over the ingested chunks
+
+    The postings arrays are memory-mapped; a query touches only the postings of its
+    terms, scoring them with one vectorized update per term. query() returns matches
+    in the same shape as the vector index, so retrieval treats both the same way.
+    """
+
+    def __init__(self, path=DEFAULT_LEXICAL_INDEX_PATH, k1: float = 1.5, b: float = 0.75):
+        """
+        Open the index; a missing index is empty
+
+        Args:
+            path: Directory of the lexical index
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.terms: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+
+        if not (self.path / TABLE_FILE).exists():
+            return
+        with open(self.path / TABLE_FILE, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        self.terms = {term: term_id for term_id, term in enumerate(table["terms"])}
+        self.ids = table["ids"]
+        self.metadata = table["metadata"]
+        for name in ARRAY_FILES:
+            setattr(self, name, np.load(self.path / f"{name}.npy", mmap_mode="r"))
+
+        # Length normalization and IDF don't depend on the query, so compute them once
+        lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+        self.length_norms = self.k1 * (1 - self.b + self.b * lengths / max(float(lengths.mean()), 1.0))
+        document_frequencies = np.diff(np.asarray(self.offsets)).astype(np.float32)
+        self.idf = np.log(1 + (len(self.ids) - document_frequencies + 0.5) / (document_frequencies + 0.5))
+
+    def search(self, text: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every chunk containing a query term
+
+        Returns:
+            (rows, scores) of the top_k chunks by decreasing BM25 score
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term, count in Counter(tokenize(text)).items():
+            term_id = self.terms.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tfs = self.postings_tfs[start:end].astype(np.float32)
+            # Documents appear once in a term's postings, so a fancy-indexed add is safe
+            scores[docs] += count * self.idf[term_id] * tfs * (self.k1 + 1) / (tfs + self.length_norms[docs])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        rows = candidates[np.argsort(-scores[candidates])]
+        return rows, scores[rows]
+
+    def query(self, text: str, top_k: int = 10, include_metadata: bool = False) -> Dict[str, Any]:
+        """
+        Query the index with text
+
+        Args:
+            text: The user's query
+            top_k: Number of matches
+            include_metadata: Include each match's metadata
+
+        Returns:
+            {"matches": [{"id", "score", "metadata"}, ...]} by decreasing BM25 score
+        """
+        matches = []
+        for row, score in zip(*self.search(text, top_k)):
+            match = {"id": self.ids[row], "score": float(score)}
+            if include_metadata:
+                match["metadata"] = self.metadata[row]
+            matches.append(match)
+        return {"matches": matches}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+def reciprocal_rank_fusion(*responses: Dict[str, Any], k: int = 60, top_k: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Merge ranked match lists by reciprocal rank fusion
+
+    Each match scores the sum of 1 / (k + rank) over the lists it appears in, so
+    chunks ranked well by both BM25 and the embeddings come first without having to
+    calibrate the two score scales against each other.
+
+    Args:
+        responses: Query responses ({"matches": [...]}) from the vector and lexical indexes
+        k: RRF damping constant
+        top_k: Number of fused matches to return (all by default)
+
+    Returns:
+        A query response with the fused matches and their RRF scores
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for response in responses:
+        for rank, match in enumerate(response["matches"], start=1):
+            entry = fused.setdefault(match["id"], {"id": match["id"], "score": 0.0, "metadata": match["metadata"]})
+            entry["score"] += 1 / (k + rank)
+    matches = sorted(fused.values(), key=lambda match: match["score"], reverse=True)
+    return {"matches": matches[:top_k] if top_k else matches}
+
+def lexical_index_path() -> str:
+    return os.getenv("LEXICAL_INDEX_PATH", str(DEFAULT_LEXICAL_INDEX_PATH))
@@ -0,0 +1,187 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+import numpy as np
+import json
+import os
+import re
+import zlib
+
+DEFAULT_REPORT_PATH = Path(__file__).resolve().parent.parent / "data" / "near_duplicates.json"
+
+def page_url(text: str) -> Optional[str]:
+    """The URL the scraper wrote on the first line of a page, if any"""
+    first_line = text.split("\n", 1)[0]
+    return first_line[5:].strip() if first_line.startswith("URL: ") else None
+
+def canonical_rank(key: str, text: str) -> Tuple:
+    """
+    Sort key choosing the canonical page of a cluster: the page whose URL has no query
+    string, then the shortest URL (or path), so "/program?sort=asc", "/program/print" and
+    "/program/page/2" all collapse to "/program"
+    """
+    url = page_url(text) or key
+    parsed = urlparse(url)
+    return (bool(parsed.query), len(parsed.path), len(url), url)
+
+def shingle_hashes(text: str, k: int = 5) -> np.ndarray:
+    """
+    32-bit hashes of the distinct k-word shingles of a text
+
+    Words are hashed once with CRC-32 and combined into shingle hashes with vectorized
+    arithmetic, so the hashes are the same in every process (unlike hash()).
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    codes = {word: zlib.crc32(word.encode("utf-8")) for word in set(words)}
+    ids = np.fromiter(map(codes.__getitem__, words), dtype=np.uint64, count=len(words))
+    k = min(k, len(ids))
+    count = len(ids) - k + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for j in range(k):
+        hashes = hashes * np.uint64(1000003) + ids[j:j + count]
+    return np.unique((hashes ^ (hashes >> np.uint64(32))) & np.uint64(0xFFFFFFFF))
+
+class MinHasher:
+    """MinHash signatures, whose share of equal values estimates the Jaccard similarity of the shingle sets"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Multiply-shift hash functions: the top 32 bits of (a * x + b) mod 2^64, a odd
+        self.a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text (None when it has no words)"""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not len(hashes):
+            return None
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) >> np.uint64(32)).min(axis=1)
+
+def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(signature == other))
+
+class LSHIndex:
+    """
+    Locality-sensitive hashing over MinHash signatures
+
+    Each signature is cut into bands of rows; pages sharing any band land in the same
+    bucket and become candidates, so a page is compared only with pages likely to be
+    similar instead of with the whole corpus.
+    """
+
+    def __init__(self, bands: int = 16, rows: int = 8):
+        self.bands = bands
+        self.rows = rows
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+
+    def _keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: str, signature: np.ndarray):
+        for band, band_key in self._keys(signature):
+            self.buckets[band].setdefault(band_key, []).append(key)
+
+    def candidates(self, signature: np.ndarray) -> set:
+        found = set()
+        for band, band_key in self._keys(signature):
+            found.update(self.buckets[band].get(band_key, ()))
+        return found
+
+class Cluster(NamedTuple):
+    canonical: str
+    duplicates: List[Tuple[str, float]]  # (key, estimated similarity to the canonical page)
+
+def find_near_duplicates(documents: Iterable[Tuple[str, str]], threshold: float = 0.9,
+                         num_perm: int = 128, bands: int = 16,
+                         rank: Callable[[str, str], Tuple] = canonical_rank) -> List[Cluster]:
+    """
+    Cluster near-duplicate pages
+
+    Candidates found through the LSH index are linked if their estimated Jaccard
+    similarity is at least threshold. Links are transitive (A~B and B~C connect A and
+    C even when they aren't similar), so each connected group is then split around
+    canonical pages: its lowest-ranked page takes every member at least threshold
+    similar to it as duplicates, and the members left over form clusters of their own
+    the same way. Every duplicate is similar to the canonical page it is dropped for.
+
+    Args:
+        documents: (key, text) of each page
+        threshold: Minimum estimated Jaccard similarity of the pages' word shingles
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must be a multiple)
+        rank: Sort key of a page (key, text); the smallest of a cluster is its canonical page
+
+    Returns:
+        The clusters of two or more pages
+    """
+    hasher = MinHasher(num_perm)
+    index = LSHIndex(bands, num_perm // bands)
+    signatures: Dict[str, np.ndarray] = {}
+    ranks: Dict[str, Tuple] = {}
+    parents: Dict[str, str] = {}
+
+    def find(key):
+        while parents[key] != key:
+            parents[key] = parents[parents[key]]
+            key = parents[key]
+        return key
+
+    for key, text in documents:
+        # The URL line differs between copies of a page, so it is left out of the shingles
+        body = text.split("\n", 1)[-1] if page_url(text) else text
+        signature = hasher.signature(body)
+        if signature is None:
+            continue
+        signatures[key] = signature
+        ranks[key] = rank(key, text)
+        parents[key] = key
+        for candidate in index.candidates(signature):
+            if similarity(signature, signatures[candidate]) >= threshold:
+                parents[find(key)] = find(candidate)
+        index.add(key, signature)
+
+    groups: Dict[str, List[str]] = {}
+    for key in parents:
+        groups.setdefault(find(key), []).append(key)
+    clusters = []
+    for members in groups.values():
+        remaining = sorted(members, key=lambda key: ranks[key])
+        while len(remaining) > 1:
+            canonical = remaining[0]
+            scores = [(key, similarity(signatures[key], signatures[canonical])) for key in remaining[1:]]
+            duplicates = sorted(((key, score) for key, score in scores if score >= threshold),
+                                key=lambda item: -item[1])
+            if duplicates:
+                clusters.append(Cluster(canonical, duplicates))
+            remaining = [key for key, score in scores if score < threshold]
+    return clusters
+
+def write_report(clusters: List[Cluster], path, threshold: float):
+    """Write the clusters, canonical page and removed duplicates, as JSON"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "threshold": threshold,
+        "clusters": len(clusters),
+        "duplicates_removed": sum(len(cluster.duplicates) for cluster in clusters),
+        "groups": [
+            {
+                "canonical": cluster.canonical,
+                "duplicates": [{"page": key, "similarity": round(score, 3)} for key, score in cluster.duplicates],
+            }
+            for cluster in sorted(clusters, key=lambda cluster: -len(cluster.duplicates))
+        ],
+    }
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(temporary, path)
+
+def near_duplicates_report_path() -> str:
+    return os.getenv("NEAR_DUPLICATES_REPORT_PATH", str(DEFAULT_REPORT_PATH))
@@ -0,0 +1,133 @@
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+import hashlib
+import json
+import os
+import time
+from services.crawl_frontier import canonical_url
+
+INDEX_FILENAME = "pages.jsonl"
+
+def domain_folder_name(domain: str) -> str:
+    return domain.replace('.', '_').replace(':', '_')
+
+def write_atomic(file_path: str, text: str):
+    """Write a file through a temporary file, so readers never see a partial page"""
+    temporary = file_path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temporary, file_path)
+
+class PageWriter:
+    """
+    Writes crawled pages to disk as they arrive, instead of buffering the crawl
+
+    Pages are saved under <output folder>/<domain>/<program>/<filename>.txt, each
+    written atomically. Every domain folder has a page index (pages.jsonl), one JSON
+    line per saved page, appended as it is written: the URL, its file relative to the
+    domain folder, program and title. The index keeps a page in the same file when it
+    is saved again, moves it (deleting the old file) when its name changes, and gives
+    a page whose filename another URL already has a name of its own, where the pages
+    used to overwrite each other. close() compacts the indexes to the latest line per
+    page.
+    """
+
+    def __init__(self, output_folder: str, program_for: Callable[[str], Optional[str]],
+                 filename_for: Callable[[str, str], str]):
+        """
+        Args:
+            output_folder: Folder of the domain folders
+            program_for: Function giving a URL's program folder (None for "general")
+            filename_for: Function giving a page's filename from its URL and title
+        """
+        self.output_folder = output_folder
+        self.program_for = program_for
+        self.filename_for = filename_for
+        self.indexes: Dict[str, Dict[str, Dict]] = {}  # domain -> canonical URL -> index entry
+        self.files: Dict[str, Dict[str, str]] = {}  # domain -> file -> canonical URL
+        self.index_files = {}
+
+    def domain_folder(self, domain: str) -> str:
+        return os.path.join(self.output_folder, domain_folder_name(domain))
+
+    def _open_index(self, domain: str):
+        folder = self.domain_folder(domain)
+        os.makedirs(folder, exist_ok=True)
+        index = read_index(folder)
+        self.indexes[domain] = index
+        self.files[domain] = {entry["file"]: key for key, entry in index.items()}
+        path = os.path.join(folder, INDEX_FILENAME)
+        self.index_files[domain] = open(path, "a", encoding="utf-8")
+        if os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # start on a new line if a crash cut the last one short
+                    self.index_files[domain].write("\n")
+
+    def write(self, url: str, title: str, content: str) -> str:
+        """
+        Save a page and add it to its domain's index
+
+        Returns:
+            The path of the saved file
+        """
+        domain = urlparse(url).netloc
+        if domain not in self.indexes:
+            self._open_index(domain)
+        index, files = self.indexes[domain], self.files[domain]
+        key = canonical_url(url)
+        program = self.program_for(url) or "general"
+
+        relative = f"{program}/{self.filename_for(url, title)}"
+        if files.get(relative, key) != key:
+            # another page has this name: keep both
+            stem, extension = os.path.splitext(relative)
+            relative = f"{stem}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}{extension}"
+
+        folder = self.domain_folder(domain)
+        file_path = os.path.join(folder, relative)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        write_atomic(file_path, f"URL: {url}\n\n{content}")
+
+        previous = index.get(key)
+        if previous is not None and previous["file"] != relative:
+            files.pop(previous["file"], None)
+            try:
+                os.remove(os.path.join(folder, previous["file"]))
+            except FileNotFoundError:
+                pass
+        entry = {"url": url, "file": relative, "program": program, "title": title, "saved_at": time.time()}
+        index[key] = entry
+        files[relative] = key
+        self.index_files[domain].write(json.dumps(entry) + "\n")
+        self.index_files[domain].flush()
+        return file_path
+
+    def close(self):
+        """Close the indexes, rewriting each with one line per page"""
+        for domain, index_file in self.index_files.items():
+            index_file.close()
+            lines = "".join(json.dumps(entry) + "\n" for entry in self.indexes[domain].values())
+            write_atomic(os.path.join(self.domain_folder(domain), INDEX_FILENAME), lines)
+        self.index_files = {}
+
+def read_index(domain_folder: str) -> Dict[str, Dict]:
+    """
+    Read a domain folder's page index
+
+    Returns:
+        The latest entry of each page, by canonical URL (empty if there is no index)
+    """
+    index = {}
+    path = os.path.join(domain_folder, INDEX_FILENAME)
+    if not os.path.exists(path):
+        return index
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            index[canonical_url(entry["url"])] = entry
+    return index
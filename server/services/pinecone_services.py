@@ -1,10 +1,24 @@
 import os
+import sys
+import time
+import threading
+import contextlib
 import openai
 from pathlib import Path
 from dotenv import load_dotenv
-from pinecone import Pinecone, ServerlessSpec
 import tiktoken
 
+# Run as a script from server/services, so make the services package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from services.vector_index import LocalVectorIndex, open_vector_index, use_local_index
+from services.document_store import DocumentStoreWriter, document_store_path
+from services.lexical_index import LexicalIndexWriter, lexical_index_path
+from services.batch_embedder import EMBEDDING_MODEL, batch_embedder_from_env, token_batches
+from services.ingestion_manifest import IngestionManifest, content_hash, document_id, ingestion_manifest_path
+from services.pipeline import Pipeline, Stage, batched
+from services.chunking import Chunker
+from services.near_duplicates import find_near_duplicates, near_duplicates_report_path, write_report
+
 # Load environment variables
 env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
@@ -15,176 +29,339 @@ INDEX_NAME = os.getenv("PINECONE_INDEX", "agenticchatbotdb")
 NAMESPACE = os.getenv("PINECONE_NAMESPACE", "ns1")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-MAX_TOKENS = 8000
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))  # Retrieval works on chunks of at most this size
+# With lexical retrieval only, the chunks are not embedded and no vector index is used
+EMBED_CHUNKS = os.getenv("RETRIEVAL_MODE", "hybrid") != "lexical"
+
+# Ingestion pipeline: workers per stage, queue capacity, and seconds between checkpoints and reports
+READ_WORKERS = int(os.getenv("INGEST_READ_WORKERS", "4"))
+CHUNK_WORKERS = int(os.getenv("INGEST_CHUNK_WORKERS", "4"))  # Threads of the batch tokenizer
+CHUNK_PROCESSES = int(os.getenv("INGEST_CHUNK_PROCESSES", "0"))  # Chunk in a process pool of this size instead
+CHUNK_BATCH_SIZE = int(os.getenv("INGEST_CHUNK_BATCH", "64"))  # Pages tokenized per batch
+UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", "2"))
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "256"))
+CHECKPOINT_SECONDS = float(os.getenv("INGEST_CHECKPOINT_SECONDS", "60"))
+REPORT_SECONDS = float(os.getenv("INGEST_REPORT_SECONDS", "10"))
+UPSERT_BATCH_SIZE = 100
+
+# Near-duplicate pages (same content under another URL) are left out of every index
+DEDUPLICATE = os.getenv("NEAR_DUPLICATES", "true").lower() == "true"
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+SCRAPED_DATA_DIR = SERVER_DIR / "data" / "scraped_data"
+AGENTS_DIR = SERVER_DIR / "agents"
 
-pc = Pinecone(api_key=API_KEY)
 client = openai.OpenAI(api_key=OPENAI_API_KEY)
 tokenizer = tiktoken.get_encoding("cl100k_base")
 
-# Check if Pinecone index exists, create if it doesn't
-existing_indexes = pc.list_indexes().names()
-if INDEX_NAME not in existing_indexes:
-    print(f"Index '{INDEX_NAME}' not found. Creating index...")
-    pc.create_index(
-        name=INDEX_NAME,
-        dimension=1536,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region=ENVIRONMENT)
-    )
+def get_index():
+    """
+    Open the index to upload to: the local index when VECTOR_BACKEND=local, otherwise
+    the Pinecone index, which is created if it doesn't exist
+    """
+    if not use_local_index():
+        from pinecone import Pinecone, ServerlessSpec
+        pc = Pinecone(api_key=API_KEY)
+        existing_indexes = pc.list_indexes().names()
+        if INDEX_NAME not in existing_indexes:
+            print(f"Index '{INDEX_NAME}' not found. Creating index...")
+            pc.create_index(
+                name=INDEX_NAME,
+                dimension=1536,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region=ENVIRONMENT)
+            )
+    return open_vector_index(INDEX_NAME)
+
+def chunk_document(doc_id, file_path, chunks):
+    """
+    Make a vector of each chunk of a page
 
-index = pc.Index(INDEX_NAME)
+    Args:
+        doc_id: The page's document id
+        file_path: Path of the page
+        chunks: The page's Chunks
 
-def split_by_paragraphs(text, max_tokens=MAX_TOKENS):
+    Returns:
+        (vector, chunk text, token count) for each chunk, the vector holding its id and metadata
     """
-    Split text into chunks by paragraphs while respecting token limits.
-    This preserves natural text boundaries without requiring NLTK.
+    vectors = []
+    for chunk_index, chunk in enumerate(chunks):
+        vector = {
+            'id': f"{doc_id}-{chunk_index}",
+            'metadata': {
+                # Relative to the agents directory, like before
+                'file_path': os.path.relpath(file_path, AGENTS_DIR),
+                'doc_id': doc_id,
+                'chunk_index': chunk_index,
+                # Where the chunk is in the page, so it can be read without the rest of the page
+                'char_start': chunk.char_start,
+                'char_end': chunk.char_end
+            }
+        }
+        vectors.append((vector, chunk.text, chunk.tokens))
+    return vectors
+
+def delete_vectors(index, ids):
+    for start in range(0, len(ids), 1000):
+        index.delete(ids=ids[start:start + 1000])
+
+class Ingestion:
     """
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = []
-    current_token_count = 0
-    
-    for paragraph in paragraphs:
-        paragraph = paragraph.strip()
-        if not paragraph:
-            continue
-            
-        paragraph_tokens = tokenizer.encode(paragraph)
-        tokens_count = len(paragraph_tokens)
-        
-        # If a single paragraph exceeds the max, we need to split it
-        if tokens_count > max_tokens:
-            # Process oversized paragraph with a sliding window approach
-            for i in range(0, len(paragraph_tokens), max_tokens):
-                window = paragraph_tokens[i:i + max_tokens]
-                chunks.append(tokenizer.decode(window))
-            continue
-            
-        # If adding this paragraph would exceed max tokens, start a new chunk
-        if current_token_count + tokens_count > max_tokens:
-            if current_chunk:
-                chunks.append("\n\n".join(current_chunk))
-                current_chunk = []
-                current_token_count = 0
-        
-        # Add paragraph to current chunk
-        current_chunk.append(paragraph)
-        current_token_count += tokens_count
-    
-    # Add the last chunk if there's anything left
-    if current_chunk:
-        chunks.append("\n\n".join(current_chunk))
-    
-    return chunks
-
-def generate_embedding(text):
-    """Generate embeddings for text content preserving all content."""
-    try:
-        if not text.strip():
-            print("Warning: Empty text passed to generate_embedding")
-            return [0.01] * 1536  # Return non-zero embedding to avoid Pinecone error
-        
-        # Get token count
-        token_count = len(tokenizer.encode(text))
-        
-        # If text fits within token limit, embed it directly
-        if token_count <= MAX_TOKENS:
-            response = client.embeddings.create(
-                input=[text],
-                model="text-embedding-ada-002"
-            )
-            return response.data[0].embedding
-        
-        # Otherwise, split and average embeddings
-        chunks = split_by_paragraphs(text, MAX_TOKENS)
-        
-        if not chunks:
-            print("Warning: No chunks generated")
-            return [0.01] * 1536
-            
-        embeddings = []
-        for chunk in chunks:
-            if not chunk.strip():
-                continue
-                
-            response = client.embeddings.create(
-                input=[chunk],
-                model="text-embedding-ada-002"
-            )
-            embeddings.append(response.data[0].embedding)
-
-        # If no embeddings were generated, return a placeholder
-        if not embeddings:
-            print("Warning: No embeddings generated")
-            return [0.01] * 1536
-            
-        # Average across chunks
-        avg_embedding = [sum(values) / len(values) for values in zip(*embeddings)]
-        
-        # Ensure we don't have an all-zero embedding (causes Pinecone error)
-        if all(v == 0 for v in avg_embedding):
-            print("Warning: All-zero embedding detected, adding small values")
-            avg_embedding = [0.01] * 1536
-            
-        return avg_embedding
-        
-    except Exception as e:
-        print(f"Error generating embedding: {str(e)}")
-        # Return non-zero embedding to avoid Pinecone error
-        return [0.01] * 1536
+    Uploads the scraped pages as a pipeline of stages connected by bounded queues:
+    read files -> chunk -> batch -> embed -> upsert
+
+    Each stage has its own workers, so disk reads, tokenization, embedding requests
+    and uploads overlap instead of taking turns on one thread. Every page is chunked
+    into the document store and BM25 index; only new or changed pages (per the
+    ingestion manifest) continue to the embedder. A page is committed to the manifest
+    once all of its vectors are uploaded, and the manifest (and local index) are
+    checkpointed every CHECKPOINT_SECONDS, so an interrupted run resumes from the last
+    checkpoint instead of starting over.
+    """
+
+    def __init__(self, base_directory, index, embedder=None, chunker=None):
+        """
+        Args:
+            base_directory: Directory of the scraped .txt files
+            index: Vector index to upload to, or None to skip embedding (lexical retrieval only)
+            embedder: BatchEmbedder for the chunks (required with an index)
+            chunker: Chunker of the pages (CHUNK_MAX_TOKENS chunks, tokenized on CHUNK_WORKERS threads by default)
+        """
+        self.base_directory = Path(base_directory)
+        self.index = index
+        self.embedder = embedder
+        self.chunker = chunker or Chunker(CHUNK_MAX_TOKENS, threads=CHUNK_WORKERS, processes=CHUNK_PROCESSES,
+                                          encoding=tokenizer)
+        self.documents = DocumentStoreWriter(document_store_path())
+        self.lexical = LexicalIndexWriter(lexical_index_path())
+        self.manifest = IngestionManifest(ingestion_manifest_path(), {
+            'embedding_model': EMBEDDING_MODEL,
+            'chunk_max_tokens': CHUNK_MAX_TOKENS,
+            'chunk_metadata': ['doc_id', 'chunk_index', 'char_start', 'char_end'],
+        })
+        # Only a finished run's manifest accounts for every vector in the index
+        self.sweep = not (self.manifest.exists and self.manifest.complete)
+
+        # Guards the writers, the manifest and the progress below
+        self.lock = threading.RLock()
+        # The local index is an in-memory matrix until saved, so its updates take the lock too
+        self.index_lock = self.lock if isinstance(index, LocalVectorIndex) else contextlib.nullcontext()
+        self.pending = {}  # doc_id -> manifest entry, vectors left to upload and vector ids to delete after
+        self.duplicates = set()  # Paths of the near-duplicate pages left out
+        self.seen = set()
+        self.current_ids = set()
+        self.count = 0
+        self.changed = 0
+        self.committed = 0
+        self.last_checkpoint = time.monotonic()
+
+    def files(self):
+        for root, dirs, files in os.walk(self.base_directory):
+            for file in files:
+                if file.endswith('.txt'):
+                    file_path = os.path.join(root, file)
+                    if self.relative_path(file_path) not in self.duplicates:
+                        yield file_path
+
+    def relative_path(self, file_path):
+        return Path(file_path).relative_to(self.base_directory).as_posix()
+
+    def deduplicate(self):
+        """
+        Find near-duplicate pages by MinHash and LSH, keeping the canonical page of each
+        cluster, and write the clusters to the near-duplicates report
+        """
+        started = time.perf_counter()
+        pages = ((self.relative_path(file_path), content)
+                 for file_path in self.files() for _, content in self.read(file_path))
+        clusters = find_near_duplicates(pages, threshold=NEAR_DUPLICATE_THRESHOLD)
+        self.duplicates = {page for cluster in clusters for page, _ in cluster.duplicates}
+        report_path = near_duplicates_report_path()
+        write_report(clusters, report_path, NEAR_DUPLICATE_THRESHOLD)
+        print(f"Skipping {len(self.duplicates)} near-duplicate pages in {len(clusters)} clusters "
+              f"({time.perf_counter() - started:.1f} s, report at '{report_path}')")
+
+    def read(self, file_path):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return [(file_path, f.read())]
+        except Exception as e:
+            print(f"Error processing {file_path}: {str(e)}")
+            return []
+
+    def chunk(self, documents):
+        """Chunk the pages in batches; yields the chunks to embed"""
+        for batch in batched(documents, CHUNK_BATCH_SIZE):
+            results = self.chunker.chunk_many([content for _, content in batch])
+            for (file_path, content), chunks in zip(batch, results):
+                yield from self.register(file_path, content, chunks)
+
+    def register(self, file_path, content, chunks):
+        """Add a chunked page to the document store and BM25 index; returns the chunks to embed"""
+        doc_id = document_id(self.relative_path(file_path))
+        vectors = chunk_document(doc_id, file_path, chunks)
+        digest = content_hash(content)
+
+        with self.lock:
+            for vector, chunk, _ in vectors:
+                self.documents.add(vector['id'], chunk)
+                self.lexical.add(vector['id'], chunk, vector['metadata'])
+                self.current_ids.add(vector['id'])
+            self.seen.add(doc_id)
+            self.count += 1
+
+            if self.index is None or not self.manifest.changed(doc_id, digest):
+                return []
+            vector_ids = [vector['id'] for vector, _, _ in vectors]
+            self.pending[doc_id] = {
+                'entry': {
+                    'file_path': os.path.relpath(file_path, AGENTS_DIR),
+                    'content_hash': digest,
+                    'vector_ids': vector_ids
+                },
+                'remaining': len(vectors),
+                'stale_ids': self.manifest.stale_ids(doc_id, vector_ids)
+            }
+            self.changed += 1
+            if not vectors:
+                self.commit(doc_id)
+        print(f"Changed: {os.path.basename(file_path)}")
+        return vectors
+
+    def batch(self, chunks):
+        # The chunks carry their token counts, so they are not tokenized again
+        return token_batches(chunks, lambda text: len(tokenizer.encode(text)),
+                             self.embedder.max_batch_tokens, self.embedder.max_batch_inputs)
+
+    def embed(self, batch):
+        embedded = self.embedder.embed_batch(batch)
+        return [embedded] if embedded else []
+
+    def upsert(self, embedded):
+        vectors = [{**vector, 'values': embedding} for vector, embedding in embedded]
+        for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+            batch = vectors[start:start + UPSERT_BATCH_SIZE]
+            with self.index_lock:
+                self.index.upsert(vectors=batch)
+            with self.lock:
+                for vector in batch:
+                    doc_id = vector['metadata']['doc_id']
+                    self.pending[doc_id]['remaining'] -= 1
+                    if self.pending[doc_id]['remaining'] == 0:
+                        self.commit(doc_id)
+        with self.lock:
+            if time.monotonic() - self.last_checkpoint >= CHECKPOINT_SECONDS:
+                self.checkpoint()
+        return []
+
+    def commit(self, doc_id):
+        """Record a page whose vectors are all uploaded, deleting the chunks it no longer has (lock held)"""
+        progress = self.pending.pop(doc_id)
+        if progress['stale_ids']:
+            with self.index_lock:
+                delete_vectors(self.index, progress['stale_ids'])
+        self.manifest.record(doc_id, progress['entry'])
+        self.committed += 1
+
+    def checkpoint(self):
+        """Persist the uploaded vectors and the manifest of committed pages (lock held)"""
+        if isinstance(self.index, LocalVectorIndex):
+            self.index.save()
+        self.manifest.save(complete=False)
+        self.last_checkpoint = time.monotonic()
+        print(f"Checkpoint: {self.committed} of {self.changed} changed documents committed so far")
+
+    def run(self):
+        stages = [
+            Stage('read', self.read, workers=READ_WORKERS, queue_size=QUEUE_SIZE),
+            Stage('chunk', stream=self.chunk, queue_size=QUEUE_SIZE),
+        ]
+        if self.index is not None:
+            stages += [
+                Stage('batch', stream=self.batch, queue_size=QUEUE_SIZE),
+                # Each embed worker has one request in flight
+                Stage('embed', self.embed, workers=self.embedder.concurrency, queue_size=self.embedder.concurrency),
+                Stage('upsert', self.upsert, workers=UPSERT_WORKERS, queue_size=QUEUE_SIZE),
+            ]
+        pipeline = Pipeline(stages, report_seconds=REPORT_SECONDS)
+
+        if DEDUPLICATE:
+            self.deduplicate()
+        print("Processing files...")
+        errors = pipeline.run(self.files())
+        elapsed = pipeline.elapsed
+        print(f"Processed {self.count} documents in {elapsed:.1f} s ({self.count / max(elapsed, 1e-9):.1f} documents/s)")
+        print(pipeline.report())
+
+        if errors:
+            print("[ERROR] Pipeline stages failed: " + ", ".join(f"{name} ({count} errors)" for name, count in errors.items()))
+            # The stores would miss the pages after the failure, so keep the previous ones
+            self.documents.abort()
+            print("Kept the previous document store and BM25 index")
+        else:
+            self.documents.close()
+            print(f"Saved {self.count} documents to the document store at '{self.documents.path}'")
+            self.lexical.close()
+            print(f"Saved the BM25 index of {len(self.lexical.ids)} chunks at '{self.lexical.path}'")
+        self.chunker.close()
+
+        if self.index is None:
+            return
+        stats = self.embedder.stats()
+        print(f"Embedded {stats['embedded']} chunks of {self.changed} new or changed documents in "
+              f"{stats['requests']} requests ({stats['retries']} retries, {stats['failed']} failed)")
+        self.finish(failed=bool(errors))
+
+    def finish(self, failed: bool = False):
+        """
+        Delete the vectors of removed pages and save the completed manifest
+
+        Args:
+            failed: Whether a pipeline stage failed. Pages after the failure were never
+                seen, so nothing is deleted and the manifest is saved as incomplete
+                (the next run sweeps the index again).
+        """
+        for doc_id, progress in self.pending.items():
+            # Some chunks failed to embed: embed the page again next time, and keep every
+            # id it may have vectors under so they are deleted if it goes away
+            entry = progress['entry']
+            entry['content_hash'] = None
+            entry['vector_ids'] = entry['vector_ids'] + progress['stale_ids']
+            self.manifest.record(doc_id, entry)
+        if self.pending:
+            print(f"{len(self.pending)} documents were not fully embedded and will be embedded again next run")
+
+        if failed:
+            if isinstance(self.index, LocalVectorIndex) and self.changed:
+                self.index.save()
+            self.manifest.save(complete=False)
+            print("No vectors were deleted and the manifest is saved as incomplete; run the ingestion again")
+            return
+
+        removed_ids = self.manifest.remove_missing(self.seen)
+        stale_ids = list(removed_ids)
+        if self.sweep:
+            # Without a finished run's manifest, vectors may be left by earlier ingestions
+            # (such as the doc_<n> ids assigned in walk order) or by an interrupted run
+            known = self.current_ids | set(removed_ids)
+            stale_ids.extend(vector_id for page in self.index.list() for vector_id in page if vector_id not in known)
+        delete_vectors(self.index, stale_ids)
+        print(f"Deleted {len(stale_ids)} stale vectors ({len(removed_ids)} of removed documents)")
+
+        if isinstance(self.index, LocalVectorIndex) and (self.changed or stale_ids):
+            self.index.save()
+        self.manifest.save(complete=True)
+        if isinstance(self.index, LocalVectorIndex):
+            print(f"Saved {len(self.index)} vectors from {self.count} documents to the local index at '{self.index.path}'")
+        else:
+            print(f"Uploaded {len(self.current_ids)} vectors from {self.count} documents to Pinecone index '{INDEX_NAME}'")
 
 def main():
-    # Base directory containing the data structure
-    base_directory = "../data/scraped_data"
-    
-    # Prepare to collect vectors
-    vectors = []
-    count = 0
-    
-    # Walk through all files
-    print("Processing files...")
-    for root, dirs, files in os.walk(base_directory):
-        for file in files:
-            if file.endswith('.txt'):
-                file_path = os.path.join(root, file)
-                
-                try:
-                    # Read file content
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Generate embedding from content
-                    embedding = generate_embedding(content)
-                    
-                    # Create vector with filename in metadata
-                    vector = {
-                        'id': f"doc_{count}",
-                        'values': embedding,
-                        'metadata': {
-                            'file_path': file_path
-                        }
-                    }
-                    
-                    vectors.append(vector)
-                    count += 1
-                    
-                    print(f"Processed: {file}")
-                    
-                    # Upload in batches of 100
-                    if len(vectors) >= 100:
-                        index.upsert(vectors=vectors)
-                        print(f"Uploaded batch of {len(vectors)} vectors")
-                        vectors = []
-                        
-                except Exception as e:
-                    print(f"Error processing {file_path}: {str(e)}")
-    
-    # Upload any remaining vectors
-    if vectors:
-        index.upsert(vectors=vectors)
-        print(f"Uploaded final batch of {len(vectors)} vectors")
-    
-    print(f"Successfully uploaded {count} vectors to Pinecone index '{INDEX_NAME}'")
+    index = get_index() if EMBED_CHUNKS else None
+    embedder = batch_embedder_from_env(client, lambda text: len(tokenizer.encode(text))) if index is not None else None
+    Ingestion(SCRAPED_DATA_DIR, index, embedder).run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
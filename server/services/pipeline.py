@@ -0,0 +1,205 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import queue
+import threading
+import time
+
+# Marks the end of a stage's input
+_DONE = object()
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group items into lists of at most size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class Stage:
+    """
+    One step of a pipeline, run by its own pool of worker threads
+
+    A stage reads items from a bounded input queue, so a slow stage makes the ones
+    before it wait instead of buffering the whole corpus in memory.
+    """
+
+    def __init__(self, name: str, function: Optional[Callable[[Any], Iterable[Any]]] = None,
+                 workers: int = 1, queue_size: int = 100,
+                 stream: Optional[Callable[[Iterator[Any]], Iterator[Any]]] = None):
+        """
+        Args:
+            name: Name shown in the reports
+            function: Maps an input item to an iterable of output items (none to drop it)
+            workers: Number of worker threads
+            queue_size: Capacity of the input queue
+            stream: Maps the whole input stream to an output stream instead of item by
+                item, for stateful steps such as batching (runs on a single thread)
+        """
+        self.name = name
+        self.function = function
+        self.stream = stream
+        self.workers = 1 if stream is not None else max(1, workers)
+        self.inputs = queue.Queue(queue_size)
+
+        # Counters for the throughput and queue depth reports
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.produced = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+
+    def put(self, item: Any):
+        self.inputs.put(item)
+        depth = self.inputs.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _items(self) -> Iterator[Any]:
+        while True:
+            item = self.inputs.get()
+            if item is _DONE:
+                return
+            yield item
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues
+
+    Every stage runs concurrently with the others, and each with its own number of
+    workers, so reading files, chunking, embedding and uploading overlap. A monitor
+    prints each stage's throughput and queue depth while the pipeline runs.
+    """
+
+    def __init__(self, stages: List[Stage], report_seconds: float = 10.0):
+        """
+        Args:
+            stages: The stages, in order
+            report_seconds: Interval between progress reports (0 disables them)
+        """
+        self.stages = stages
+        self.report_seconds = report_seconds
+        self.started = None
+        self.elapsed = 0.0
+
+    def _emit(self, index: int, outputs: Iterable[Any]):
+        """Pass a stage's outputs to the next stage (the last stage's are dropped)"""
+        stage = self.stages[index]
+        following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        for output in outputs:
+            with stage._lock:
+                stage.produced += 1
+            if following is not None:
+                following.put(output)
+
+    def _work(self, index: int, remaining: List[int]):
+        stage = self.stages[index]
+        if stage.stream is not None:
+            start = time.perf_counter()
+            try:
+                for output in stage.stream(self._counted(stage)):
+                    stage.busy_seconds += time.perf_counter() - start
+                    self._emit(index, [output])
+                    start = time.perf_counter()
+                stage.busy_seconds += time.perf_counter() - start
+            except Exception as e:
+                print(f"[ERROR] Pipeline stage '{stage.name}' failed: {e}")
+                stage.errors += 1
+                # Drain the input so the stages before don't block forever
+                for _ in stage._items():
+                    pass
+        else:
+            for item in stage._items():
+                start = time.perf_counter()
+                try:
+                    outputs = list(stage.function(item) or ())
+                except Exception as e:
+                    print(f"[ERROR] Pipeline stage '{stage.name}' failed on an item: {e}")
+                    outputs = []
+                    with stage._lock:
+                        stage.errors += 1
+                with stage._lock:
+                    stage.processed += 1
+                    stage.busy_seconds += time.perf_counter() - start
+                self._emit(index, outputs)
+
+        # The last worker of a stage to finish ends the next stage's input
+        with stage._lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last and index + 1 < len(self.stages):
+            following = self.stages[index + 1]
+            for _ in range(following.workers):
+                following.inputs.put(_DONE)
+
+    def _counted(self, stage: Stage) -> Iterator[Any]:
+        """A stream stage's input, leaving the time spent waiting for it out of the busy time"""
+        items = stage._items()
+        while True:
+            start = time.perf_counter()
+            item = next(items, _DONE)
+            stage.busy_seconds -= time.perf_counter() - start
+            if item is _DONE:
+                return
+            stage.processed += 1
+            yield item
+
+    def _monitor(self, stop: threading.Event):
+        while not stop.wait(self.report_seconds):
+            elapsed = time.perf_counter() - self.started
+            print("[pipeline] " + " | ".join(
+                f"{stage.name} {stage.processed} ({stage.processed / elapsed:.1f}/s, queue {stage.inputs.qsize()})"
+                for stage in self.stages
+            ))
+
+    def run(self, items: Iterable[Any]) -> Dict[str, int]:
+        """
+        Feed items to the first stage and wait until every stage has finished
+
+        A failing item is dropped and a failing stream stage stops (its remaining input
+        is drained), without stopping the other stages, so the caller must check the
+        errors before treating the run as complete.
+
+        Returns:
+            The error count of each stage that had errors (empty if the run succeeded);
+            the elapsed seconds are in self.elapsed
+        """
+        self.started = time.perf_counter()
+        remaining = [stage.workers for stage in self.stages]
+        threads = [
+            threading.Thread(target=self._work, args=(index, remaining), name=f"{stage.name}-{worker}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        stop = threading.Event()
+        if self.report_seconds:
+            threading.Thread(target=self._monitor, args=(stop,), daemon=True).start()
+
+        try:
+            first = self.stages[0]
+            for item in items:
+                first.put(item)
+            for _ in range(first.workers):
+                first.inputs.put(_DONE)
+            for thread in threads:
+                # Join in short steps so Ctrl-C still interrupts the run
+                while thread.is_alive():
+                    thread.join(0.5)
+        finally:
+            stop.set()
+            self.elapsed = time.perf_counter() - self.started
+        return {stage.name: stage.errors for stage in self.stages if stage.errors}
+
+    def report(self) -> str:
+        """Throughput, utilization and peak queue depth of each stage"""
+        elapsed = max(self.elapsed, 1e-9)
+        lines = [f"{'stage':<10}{'workers':>8}{'in':>9}{'out':>9}{'items/s':>10}{'busy':>7}{'max queue':>11}{'errors':>8}"]
+        for stage in self.stages:
+            busy = stage.busy_seconds / (elapsed * stage.workers)
+            lines.append(f"{stage.name:<10}{stage.workers:>8}{stage.processed:>9}{stage.produced:>9}"
+                         f"{stage.processed / elapsed:>10.1f}{busy:>7.0%}{stage.max_depth:>11}{stage.errors:>8}")
+        return "\n".join(lines)
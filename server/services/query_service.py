@@ -1,13 +1,60 @@
 from agents.router_agent import RouterAgent
+from agents.agent_factory import get_agent_factory
+from agents.streaming import append_piece
 from langchain.chains.conversation.memory import ConversationBufferMemory
+from services.session_store import SessionStore, SQLiteBackend
+from services.answer_cache import SemanticAnswerCache, CacheLookup, DEFAULT_DOMAIN_TTLS, answer_domains
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import asyncio
+import os
+import time
+
+def create_answer_cache(agent_factory) -> Optional[SemanticAnswerCache]:
+    """
+    Build the semantic answer cache from the environment
+
+    Disabled with ANSWER_CACHE=false; per-domain TTLs are read from
+    ANSWER_CACHE_TTL_<DOMAIN> (in seconds, 0 disables caching for the domain).
+
+    Args:
+        agent_factory: The agent factory, whose curriculum agent embeds the queries
+
+    Returns:
+        The cache, or None if it is disabled
+    """
+    if os.getenv("ANSWER_CACHE", "true").lower() != "true":
+        return None
+    domain_ttls = {
+        domain: float(os.getenv(f"ANSWER_CACHE_TTL_{domain.upper()}", ttl))
+        for domain, ttl in DEFAULT_DOMAIN_TTLS.items()
+    }
+    return SemanticAnswerCache(
+        embed=agent_factory.curriculum_agent.embed_text,
+        aembed=agent_factory.curriculum_agent.aembed_text,
+        max_size=int(os.getenv("ANSWER_CACHE_MAX_SIZE", "5000")),
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+        domain_ttls=domain_ttls
+    )
 
 class QueryService:
     """Service for processing user queries"""
     
     def __init__(self):
         """Initialize the query service with session management"""
-        self.sessions = {}  # Store session memories
-        self.agents = {}  # Store agents for each session
+        self.agent_factory = get_agent_factory()  # Shared agents, built once per process
+
+        # Bounded store of session memories; evicted sessions go to SQLite when SESSION_DB_PATH is set
+        db_path = os.getenv("SESSION_DB_PATH")
+        self.sessions = SessionStore(
+            max_size=int(os.getenv("SESSION_MAX_SIZE", "1000")),
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")),
+            backend=SQLiteBackend(db_path) if db_path else None,
+            memory_factory=self.agent_factory.create_memory
+        )
+
+        # Answers to earlier queries with the same meaning, shared by all sessions
+        self.answer_cache = create_answer_cache(self.agent_factory)
     
     def get_or_create_memory(self, session_id: str) -> ConversationBufferMemory:
         """
@@ -19,9 +66,7 @@ class QueryService:
         Returns:
             A conversation memory for the session
         """
-        if session_id not in self.sessions:
-            self.sessions[session_id] = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-        return self.sessions[session_id]
+        return self.sessions.get_or_create(session_id)
     
     def get_or_create_agent(self, session_id: str) -> RouterAgent:
         """
@@ -33,10 +78,67 @@ class QueryService:
         Returns:
             A router agent for the session
         """
-        if session_id not in self.agents:
-            memory = self.get_or_create_memory(session_id)
-            self.agents[session_id] = RouterAgent(memory=memory)
-        return self.agents[session_id]
+        # Routers only wrap the session memory around the shared agents, so they are cheap to create per request
+        memory = self.get_or_create_memory(session_id)
+        return self.agent_factory.create_router(memory)
+
+    @contextmanager
+    def session_agent(self, session_id: str):
+        """Router agent of a session, whose memory stays pinned in the store until the turn is saved"""
+        with self.sessions.session(session_id) as memory:
+            yield self.agent_factory.create_router(memory)
+
+    @asynccontextmanager
+    async def asession_agent(self, session_id: str):
+        """Async version of session_agent, which reads and writes the session backend (SQLite) off the event loop"""
+        memory = await asyncio.to_thread(self.sessions.acquire, session_id)
+        try:
+            yield self.agent_factory.create_router(memory)
+        finally:
+            # Shielded, so a cancelled request (client gone) still unpins its session
+            await asyncio.shield(asyncio.to_thread(self.sessions.release, session_id))
+
+    def use_cache(self, agent: RouterAgent) -> bool:
+        """Whether a query may be answered from (and stored in) the answer cache"""
+        # Follow-up questions depend on the conversation, so only opening questions are cached
+        return self.answer_cache is not None and not agent.get_chat_history()
+
+    def lookup_cache(self, agent: RouterAgent, query: str) -> Optional[CacheLookup]:
+        """Look up a query in the answer cache; embedding failures fall through to the agents"""
+        if not self.use_cache(agent):
+            return None
+        try:
+            return self.answer_cache.lookup(query)
+        except Exception as e:
+            print(f"[WARN] Answer cache lookup failed: {e}")
+            return None
+
+    async def alookup_cache(self, agent: RouterAgent, query: str) -> Optional[CacheLookup]:
+        """Async version of lookup_cache"""
+        if not self.use_cache(agent):
+            return None
+        try:
+            return await self.answer_cache.alookup(query)
+        except Exception as e:
+            print(f"[WARN] Answer cache lookup failed: {e}")
+            return None
+
+    def cache_hit_metadata(self, lookup: CacheLookup, start: float) -> Dict[str, Any]:
+        """Metadata of a query answered from the cache"""
+        return {
+            "cache": "hit",
+            "cache_similarity": round(lookup.similarity, 4),
+            "cached_query": lookup.cached_query,
+            "total_ms": round(1000 * (time.perf_counter() - start), 1),
+        }
+
+    def store_answer(self, lookup: Optional[CacheLookup], query: str, response: str, metadata: Dict[str, Any]):
+        """Cache the answer of a query that missed, unless part of it came from a failed agent"""
+        if lookup is None:
+            return
+        metadata["cache"] = "miss"
+        if all(agent["status"] == "ok" for agent in metadata.get("agents", {}).values()):
+            self.answer_cache.store(lookup, query, response, answer_domains(metadata))
     
     def process_query(self, query: str, session_id: str = "default") -> str:
         """
@@ -49,16 +151,113 @@ class QueryService:
         Returns:
             The agent's response
         """
+        return self.process_query_with_metadata(query, session_id)[0]
+
+    def process_query_with_metadata(self, query: str, session_id: str = "default") -> Tuple[str, Dict[str, Any]]:
+        """
+        Process a user query and report how it was handled
+        
+        Args:
+            query: The user's query
+            session_id: The user's session ID
+            
+        Returns:
+            The agent's response, and metadata with the routing decision and the
+            routing, per-agent, combine and total latencies
+        """
         # Get or create the router agent for this session
-        agent = self.get_or_create_agent(session_id)
+        with self.session_agent(session_id) as agent:
+            # Create a curriculum agent with the session memory
+            # TODO: IMPLEMENT THE CODE FOR CHOOSING WHICH TOOL TO USE
+            # agent = LocationsAgent(memory=memory)
+            # agent = CurriculumAgent(memory=memory)
+            # agent = EventsAgent(memory=memory)
+            # print('\nProcessing query here!!!')
+            print('\nProcessing query through router agent...')
+
+            start = time.perf_counter()
+            lookup = self.lookup_cache(agent, query)
+            if lookup is not None and lookup.hit:
+                agent.memory.save_context({"input": query}, {"output": lookup.answer})
+                return lookup.answer, self.cache_hit_metadata(lookup, start)
+
+            # Process the query through the router agent
+            response, metadata = agent.process_query_with_metadata(query)
+            self.store_answer(lookup, query, response, metadata)
+            return response, metadata
+
+    async def aprocess_query(self, query: str, session_id: str = "default") -> str:
+        """
+        Process a user query without blocking the event loop (used by the ASGI app)
+        
+        Args:
+            query: The user's query
+            session_id: The user's session ID
+            
+        Returns:
+            The agent's response
+        """
+        return (await self.aprocess_query_with_metadata(query, session_id))[0]
+
+    async def aprocess_query_with_metadata(self, query: str, session_id: str = "default") -> Tuple[str, Dict[str, Any]]:
+        """Async version of process_query_with_metadata"""
+        async with self.asession_agent(session_id) as agent:
+            start = time.perf_counter()
+            lookup = await self.alookup_cache(agent, query)
+            if lookup is not None and lookup.hit:
+                await agent.memory.asave_context({"input": query}, {"output": lookup.answer})
+                return lookup.answer, self.cache_hit_metadata(lookup, start)
+
+            response, metadata = await agent.aprocess_query_with_metadata(query)
+            self.store_answer(lookup, query, response, metadata)
+            return response, metadata
+
+    async def astream_query(self, query: str, session_id: str = "default", metadata: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Process a user query, yielding the response as the LLM generates it
         
-        # Create a curriculum agent with the session memory
-        # TODO: IMPLEMENT THE CODE FOR CHOOSING WHICH TOOL TO USE
-        # agent = LocationsAgent(memory=memory)
-        # agent = CurriculumAgent(memory=memory)
-        # agent = EventsAgent(memory=memory)
-        # print('\nProcessing query here!!!')
-        print('\nProcessing query through router agent...')
+        Args:
+            query: The user's query
+            session_id: The user's session ID
+            metadata: Optional dict that is filled with the routing decision and latencies once the response is complete
+            
+        Yields:
+            Pieces of the agent's response
+        """
+        async with self.asession_agent(session_id) as agent:
+            start = time.perf_counter()
+            lookup = await self.alookup_cache(agent, query)
+            if lookup is not None and lookup.hit:
+                await agent.memory.asave_context({"input": query}, {"output": lookup.answer})
+                yield lookup.answer
+                if metadata is not None:
+                    metadata.update(self.cache_hit_metadata(lookup, start))
+                return
+
+            parts = []
+            agent_metadata = {}
+            async for token in agent.astream_query(query, agent_metadata):
+                append_piece(parts, token)
+                yield token
+            self.store_answer(lookup, query, "".join(parts), agent_metadata)
+            if metadata is not None:
+                metadata.update(agent_metadata)
+    
+    def flush(self):
+        """Persist the sessions still in memory (on shutdown)"""
+        self.sessions.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get session store and cache metrics
         
-        # Process the query through the router agent
-        return agent.process_query(query)
\ No newline at end of file
+        Returns:
+            Size, hit/miss and eviction counters of the session store, the answer cache
+            and the embedding cache (None for a disabled cache)
+        """
+        embedding_cache = self.agent_factory.embedding_cache
+        return {
+            "sessions": self.sessions.stats(),
+            "answer_cache": self.answer_cache.stats() if self.answer_cache is not None else None,
+            "embeddings": embedding_cache.stats() if embedding_cache is not None else None,
+        }
\ No newline at end of file
@@ -0,0 +1,346 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Callable, Dict, Optional
+from langchain.chains.conversation.memory import ConversationBufferMemory
+from langchain.schema import messages_from_dict, messages_to_dict
+import json
+import sqlite3
+import threading
+import time
+
+# Seconds between prunes of the sessions whose backend copy outlived the TTL
+PRUNE_INTERVAL_SECONDS = 60
+
+def default_memory_factory() -> ConversationBufferMemory:
+    """Create the memory used for a new session"""
+    return ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+
+def serialize_memory(memory) -> Dict[str, Any]:
+    """
+    Convert a session memory into a JSON-serializable payload
+
+    Args:
+        memory: The session's conversation memory
+
+    Returns:
+        A dictionary holding the memory's messages and rolling summary, if any
+    """
+    payload = {"messages": messages_to_dict(memory.chat_memory.messages)}
+    summary = getattr(memory, "moving_summary_buffer", None)
+    if summary:
+        payload["summary"] = summary
+    return payload
+
+def restore_memory(memory, payload: Dict[str, Any]):
+    """
+    Load a payload produced by serialize_memory into a memory
+
+    Args:
+        memory: A freshly created conversation memory
+        payload: The stored payload
+
+    Returns:
+        The restored memory
+    """
+    memory.chat_memory.add_messages(messages_from_dict(payload.get("messages", [])))
+    if payload.get("summary") and hasattr(memory, "moving_summary_buffer"):
+        memory.moving_summary_buffer = payload["summary"]
+    return memory
+
+class SessionBackend:
+    """Interface for the persistence tier behind the session store"""
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a previously evicted session
+
+        Args:
+            session_id: The user's session ID
+
+        Returns:
+            The stored payload, or None if the session is unknown
+        """
+        raise NotImplementedError
+
+    def save(self, session_id: str, payload: Dict[str, Any]):
+        """
+        Persist a session that is being evicted
+
+        Args:
+            session_id: The user's session ID
+            payload: The serialized session memory
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        """
+        Remove a session from the backend
+
+        Args:
+            session_id: The user's session ID
+        """
+        raise NotImplementedError
+
+    def prune(self, older_than: float):
+        """
+        Remove the sessions saved before a time
+
+        Args:
+            older_than: Wall-clock time (time.time()) of the oldest session to keep
+        """
+        raise NotImplementedError
+
+class InMemoryBackend(SessionBackend):
+    """Default backend that keeps nothing once a session leaves the store, so evicted sessions start over"""
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def save(self, session_id: str, payload: Dict[str, Any]):
+        pass
+
+    def delete(self, session_id: str):
+        pass
+
+    def prune(self, older_than: float):
+        pass
+
+class SQLiteBackend(SessionBackend):
+    """Backend that stores evicted sessions in SQLite so they can be rehydrated on their next message"""
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the session database
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, payload TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        self.conn.commit()
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id: str, payload: Dict[str, Any]):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, payload, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(payload), time.time())
+            )
+            self.conn.commit()
+
+    def delete(self, session_id: str):
+        with self.lock:
+            self.conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self.conn.commit()
+
+    def prune(self, older_than: float):
+        with self.lock:
+            self.conn.execute("DELETE FROM sessions WHERE updated_at < ?", (older_than,))
+            self.conn.commit()
+
+class SessionStore:
+    """
+    Bounded store of session memories with LRU and idle-TTL eviction
+
+    Sessions evicted to make room (LRU) are handed to the backend, to be rehydrated on
+    their next message. Sessions idle for longer than the TTL are over: they are
+    dropped from the backend too, which is also pruned of the sessions it has held
+    for longer than the TTL. A session is pinned while a request uses its memory
+    (acquire/release, or the session() context manager) and is not evicted until the
+    turn is saved; the store may hold more than max_size sessions while they are pinned.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 3600,
+                 backend: Optional[SessionBackend] = None,
+                 memory_factory: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the session store
+
+        Args:
+            max_size: Maximum number of sessions kept in memory
+            ttl_seconds: Idle time after which a session is dropped (0 disables the TTL and the backend pruning)
+            backend: Persistence tier for evicted sessions (defaults to InMemoryBackend)
+            memory_factory: Callable creating the memory for a new session
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend or InMemoryBackend()
+        self.memory_factory = memory_factory or default_memory_factory
+
+        # session_id -> [memory, last_access, pins], ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_prune = 0.0
+
+        # Counters used to size the store
+        self.hits = 0
+        self.misses = 0
+        self.rehydrations = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def get_or_create(self, session_id: str):
+        """
+        Get the memory for a session, rehydrating or creating it if it is not resident
+
+        Args:
+            session_id: The user's session ID
+
+        Returns:
+            The session's conversation memory
+        """
+        return self._get(session_id, pin=False)
+
+    def acquire(self, session_id: str):
+        """
+        Get the memory for a session like get_or_create, pinned until release(session_id)
+
+        Args:
+            session_id: The user's session ID
+
+        Returns:
+            The session's conversation memory
+        """
+        return self._get(session_id, pin=True)
+
+    def release(self, session_id: str):
+        """
+        Unpin a session acquired for a request, once its turn is saved
+
+        Args:
+            session_id: The user's session ID
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            entry[1] = time.monotonic()
+            entry[2] = max(0, entry[2] - 1)
+            self._entries.move_to_end(session_id)
+            self._evict_overflow()
+
+    @contextmanager
+    def session(self, session_id: str):
+        """Context manager holding a session's memory pinned for the duration of a request"""
+        memory = self.acquire(session_id)
+        try:
+            yield memory
+        finally:
+            self.release(session_id)
+
+    def _get(self, session_id: str, pin: bool):
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired(now)
+
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self.hits += 1
+                entry[1] = now
+                entry[2] += int(pin)
+                self._entries.move_to_end(session_id)
+                return entry[0]
+
+            self.misses += 1
+            memory = self.memory_factory()
+            payload = self.backend.load(session_id)
+            if payload:
+                restore_memory(memory, payload)
+                self.rehydrations += 1
+
+            self._entries[session_id] = [memory, now, int(pin)]
+            self._evict_overflow()
+            return memory
+
+    def _evict_overflow(self):
+        """Evict the least recently used unpinned sessions while the store is over max_size"""
+        if len(self._entries) <= self.max_size:
+            return
+        unpinned = (session_id for session_id, (_, _, pins) in self._entries.items() if not pins)
+        for session_id in list(islice(unpinned, len(self._entries) - self.max_size)):
+            self._evict(session_id)
+            self.lru_evictions += 1
+
+    def _evict_expired(self, now: float):
+        """Drop sessions that have been idle for longer than the TTL, and prune the backend"""
+        if not self.ttl_seconds:
+            return
+        # Entries are ordered by last access, so expired sessions are at the front
+        expired = []
+        for session_id, (_, last_access, pins) in self._entries.items():
+            if now - last_access < self.ttl_seconds:
+                break
+            if not pins:
+                expired.append(session_id)
+        for session_id in expired:
+            del self._entries[session_id]
+            self.backend.delete(session_id)
+            self.ttl_evictions += 1
+
+        if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self._last_prune = now
+            self.backend.prune(time.time() - self.ttl_seconds)
+
+    def _evict(self, session_id: str):
+        """Remove a session from memory and hand it to the backend"""
+        memory, _, _ = self._entries.pop(session_id)
+        self.backend.save(session_id, serialize_memory(memory))
+
+    def remove(self, session_id: str):
+        """
+        Forget a session entirely, both in memory and in the backend
+
+        Args:
+            session_id: The user's session ID
+        """
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self.backend.delete(session_id)
+
+    def flush(self):
+        """Persist every resident session to the backend (e.g. on shutdown)"""
+        with self._lock:
+            for session_id, (memory, _, _) in self._entries.items():
+                self.backend.save(session_id, serialize_memory(memory))
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the store's size and counters
+
+        Returns:
+            A dictionary of sizing metrics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "rehydrations": self.rehydrations,
+                "lru_evictions": self.lru_evictions,
+                "ttl_evictions": self.ttl_evictions,
+                "evictions": self.lru_evictions + self.ttl_evictions,
+            }
@@ -0,0 +1,293 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+import json
+import os
+
+try:
+    import hnswlib
+except ImportError:  # Optional, only needed for the HNSW graph
+    hnswlib = None
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / "data" / "vector_index"
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+HNSW_FILE = "hnsw.bin"
+
+# Rows scored per matrix-vector product; bounds the float32 copy made for float16 indexes
+BLOCK_ROWS = 4096
+
+class LocalVectorIndex:
+    """
+    In-process replacement for a Pinecone index, stored as a NumPy matrix on disk
+
+    The embeddings are L2-normalized rows of a float32 (or float16) matrix saved as
+    .npy and opened with np.load(mmap_mode="r"), so loading is instant and workers on
+    the same host share the pages. Ids and metadata are kept in a JSON table in row
+    order. Queries are a cosine top-k over every row, or over an HNSW graph when one
+    was built with hnswlib. upsert, delete and query take the same arguments as the
+    Pinecone index and return the same shape, so ingestion and retrieval code work
+    with either.
+
+    A directory holds a single index; the namespace arguments are accepted for
+    compatibility and ignored.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, dtype: str = "float32", hnsw: bool = False,
+                 hnsw_m: int = 16, hnsw_ef_construction: int = 200, hnsw_ef_search: int = 64):
+        """
+        Open the index stored in a directory, or start an empty one
+
+        Args:
+            path: Directory holding the index files
+            dtype: "float32" or "float16" storage for new indexes (existing ones keep theirs)
+            hnsw: Build an HNSW graph on save (requires hnswlib)
+            hnsw_m: Number of graph neighbors per node
+            hnsw_ef_construction: Candidate list size while building the graph
+            hnsw_ef_search: Candidate list size while querying (raised to top_k if smaller)
+        """
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.hnsw = hnsw
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+
+        self.vectors = None
+        self._buffer = None  # In-memory rows with spare capacity; self.vectors is a view of them
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+        self.graph = None
+
+        if (self.path / METADATA_FILE).exists():
+            self.load()
+
+    def load(self):
+        """Memory-map the saved matrix and read the id and metadata table"""
+        with open(self.path / METADATA_FILE, "r", encoding="utf-8") as f:
+            table = json.load(f)
+        self.ids = table["ids"]
+        self.metadata = table["metadata"]
+        self.positions = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self.vectors = None
+        self._buffer = None
+        self.graph = None
+        if not self.ids:
+            return
+
+        self.vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r")
+        self.dtype = self.vectors.dtype
+        if (self.path / HNSW_FILE).exists():
+            if hnswlib is None:
+                print("[WARN] hnswlib is not installed, querying the local index without its HNSW graph")
+            else:
+                self.graph = hnswlib.Index(space="ip", dim=self.vectors.shape[1])
+                self.graph.load_index(str(self.path / HNSW_FILE), max_elements=len(self.ids))
+                self.graph.set_ef(self.hnsw_ef_search)
+
+    def save(self):
+        """Write the matrix, the table and (if enabled) the HNSW graph, replacing the files atomically"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        vectors = self.vectors if self.ids else np.zeros((0, 0), dtype=self.dtype)
+
+        temporary = self.path / (VECTORS_FILE + ".tmp")
+        with open(temporary, "wb") as f:
+            np.save(f, vectors)
+        os.replace(temporary, self.path / VECTORS_FILE)
+
+        temporary = self.path / (METADATA_FILE + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "metadata": self.metadata}, f)
+        os.replace(temporary, self.path / METADATA_FILE)
+
+        graph_path = self.path / HNSW_FILE
+        if self.hnsw and hnswlib is None:
+            print("[WARN] hnswlib is not installed, saving the local index without an HNSW graph")
+        if self.hnsw and hnswlib is not None and len(self.ids):
+            graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+            graph.init_index(max_elements=len(self.ids), ef_construction=self.hnsw_ef_construction, M=self.hnsw_m)
+            graph.add_items(np.asarray(vectors, dtype=np.float32), np.arange(len(self.ids)))
+            graph.save_index(str(graph_path) + ".tmp")
+            os.replace(str(graph_path) + ".tmp", graph_path)
+        elif graph_path.exists():
+            # A stale graph would point at the old rows
+            graph_path.unlink()
+
+        # Reopen from disk so the index is memory-mapped again
+        self.load()
+
+    def _writable(self, rows: int) -> np.ndarray:
+        """
+        Get an in-memory buffer with room for rows vectors
+
+        A memory-mapped matrix is copied into memory before it is modified, and the
+        buffer doubles when it runs out of room, so an upsert copies only its own rows
+        instead of the whole matrix.
+        """
+        if self._buffer is None or len(self._buffer) < rows:
+            buffer = np.empty((max(rows, 2 * len(self.ids)), self.vectors.shape[1]), dtype=self.dtype)
+            buffer[:len(self.ids)] = self.vectors[:len(self.ids)]
+            self._buffer = buffer
+        return self._buffer
+
+    def upsert(self, vectors: Iterable[Dict[str, Any]], namespace: Optional[str] = None):
+        """
+        Insert or replace vectors (call save to persist them)
+
+        Args:
+            vectors: Dicts with "id", "values" and optional "metadata", like Pinecone's upsert
+            namespace: Ignored
+        """
+        vectors = list(vectors)
+        if not vectors:
+            return
+        values = np.asarray([vector["values"] for vector in vectors], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values = (values / np.where(norms == 0, 1, norms)).astype(self.dtype)
+
+        if self.vectors is None or not len(self.ids):
+            self.vectors = np.zeros((0, values.shape[1]), dtype=self.dtype)
+            self._buffer = None
+        matrix = self._writable(len(self.ids) + len(vectors))
+
+        for vector, row_values in zip(vectors, values):
+            row = self.positions.get(vector["id"])
+            if row is None:
+                row = len(self.ids)
+                self.positions[vector["id"]] = row
+                self.ids.append(vector["id"])
+                self.metadata.append(vector.get("metadata", {}))
+            else:
+                self.metadata[row] = vector.get("metadata", {})
+            matrix[row] = row_values
+        self.vectors = matrix[:len(self.ids)]
+        self.graph = None
+
+    def delete(self, ids: Sequence[str], namespace: Optional[str] = None):
+        """
+        Delete vectors by id (call save to persist the deletion)
+
+        Args:
+            ids: The vector ids
+            namespace: Ignored
+        """
+        rows = {self.positions[vector_id] for vector_id in ids if vector_id in self.positions}
+        if not rows:
+            return
+        keep = np.array([row not in rows for row in range(len(self.ids))], dtype=bool)
+        self.vectors = self._buffer = np.asarray(self.vectors)[keep]
+        self.ids = [vector_id for vector_id, kept in zip(self.ids, keep) if kept]
+        self.metadata = [metadata for metadata, kept in zip(self.metadata, keep) if kept]
+        self.positions = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self.graph = None
+
+    def list(self, prefix: Optional[str] = None, limit: int = 100, namespace: Optional[str] = None) -> Iterator[List[str]]:
+        """
+        List vector ids like a Pinecone serverless index
+
+        Args:
+            prefix: Only list ids starting with this prefix
+            limit: Number of ids per page
+            namespace: Ignored
+
+        Yields:
+            Pages of vector ids
+        """
+        ids = [vector_id for vector_id in self.ids if not prefix or vector_id.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a unit-norm query with every row"""
+        if self.dtype == np.float32:
+            return self.vectors @ query
+        return np.concatenate([
+            self.vectors[start:start + BLOCK_ROWS].astype(np.float32) @ query
+            for start in range(0, len(self.ids), BLOCK_ROWS)
+        ])
+
+    def search(self, vector: Sequence[float], top_k: int):
+        """
+        Find the rows nearest to a vector
+
+        Returns:
+            (rows, scores) sorted by decreasing cosine similarity
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        top_k = min(top_k, len(self.ids))
+        if top_k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        if self.graph is not None:
+            self.graph.set_ef(max(self.hnsw_ef_search, top_k))
+            rows, distances = self.graph.knn_query(query, k=top_k)
+            return rows[0].astype(np.int64), 1 - distances[0]
+
+        scores = self.scores(query)
+        rows = np.argpartition(-scores, top_k - 1)[:top_k] if top_k < len(scores) else np.arange(len(scores))
+        rows = rows[np.argsort(-scores[rows])]
+        return rows, scores[rows]
+
+    def query(self, vector: Sequence[float], top_k: int = 10, include_metadata: bool = False,
+              namespace: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Query the index like a Pinecone index
+
+        Args:
+            vector: The query embedding
+            top_k: Number of matches
+            include_metadata: Include each match's metadata
+            namespace: Ignored
+
+        Returns:
+            {"matches": [{"id", "score", "metadata"}, ...]} by decreasing similarity
+        """
+        rows, scores = self.search(vector, top_k)
+        matches = []
+        for row, score in zip(rows, scores):
+            match = {"id": self.ids[row], "score": float(score)}
+            if include_metadata:
+                match["metadata"] = self.metadata[row]
+            matches.append(match)
+        return {"matches": matches}
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        return {
+            "dimension": int(self.vectors.shape[1]) if self.vectors is not None and self.vectors.ndim == 2 else 0,
+            "total_vector_count": len(self.ids),
+            "dtype": str(self.dtype),
+            "hnsw": self.graph is not None,
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+def local_index_from_env() -> LocalVectorIndex:
+    """Open the local index configured by LOCAL_INDEX_PATH, LOCAL_INDEX_DTYPE and LOCAL_INDEX_HNSW"""
+    return LocalVectorIndex(
+        path=os.getenv("LOCAL_INDEX_PATH", str(DEFAULT_INDEX_PATH)),
+        dtype=os.getenv("LOCAL_INDEX_DTYPE", "float32"),
+        hnsw=os.getenv("LOCAL_INDEX_HNSW", "false").lower() == "true"
+    )
+
+def use_local_index() -> bool:
+    """Whether VECTOR_BACKEND selects the local index instead of Pinecone"""
+    return os.getenv("VECTOR_BACKEND", "pinecone").lower() == "local"
+
+def open_vector_index(index_name: str):
+    """
+    Open the index that retrieval and ingestion use, chosen by VECTOR_BACKEND
+
+    Args:
+        index_name: The Pinecone index name (unused for the local index)
+
+    Returns:
+        The local index, or a Pinecone index handle
+    """
+    if use_local_index():
+        return local_index_from_env()
+    from pinecone import Pinecone
+    return Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(index_name)
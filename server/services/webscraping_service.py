@@ -1,10 +1,41 @@
 import os
+import sys
 import requests
-from bs4 import BeautifulSoup
 import re
-from urllib.parse import urlparse, urljoin
 import time
-from collections import deque
+from functools import partial
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Run as a script from server/services, so make the services package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from services.crawl_cache import CrawlCache, write_report
+from services.crawl_frontier import Frontier, canonical_url
+from services.crawler import Crawler, crawl_scopes, in_scope
+from services.page_writer import PageWriter, domain_folder_name, read_index
+from services.html_extraction import FILE_EXTENSIONS, default_backend, extract_page
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# only links on hosts containing this are kept
+LINK_DOMAIN = 'duke.edu'
+
+# crawl concurrency and per-host politeness
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "16"))
+CRAWL_HOST_CONCURRENCY = int(os.getenv("CRAWL_HOST_CONCURRENCY", "4"))
+CRAWL_HOST_DELAY = float(os.getenv("CRAWL_HOST_DELAY", "0.1"))
+# pages fetched per crawl (0 for no limit); the rest of the frontier is saved for the next crawl
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "0"))
+# parser backend of the page extraction (HTML_PARSER: auto = html.parser, or lxml, selectolax, bs4)
+HTML_PARSER_BACKEND = default_backend()
+
+# seconds between saves of the crawl cache and frontier while pages are written
+CRAWL_CHECKPOINT_SECONDS = float(os.getenv("CRAWL_CHECKPOINT_SECONDS", "60"))
+
+# a program's index page is crawled with the pages this many links closer to the start URL
+PROGRAM_INDEX_BOOST = 1
 
 def create_valid_filename(title):
     """
@@ -27,34 +58,16 @@ def create_valid_filename(title):
     # Remove leading/trailing underscores
     return title.strip('_')
 
-def extract_main_content(soup):
-    """
-    Extract the main content from the webpage, removing navigation, ads, etc.
-    
-    Inputs:
-        - soup (BeautifulSoup): The BeautifulSoup object containing the parsed HTML.
-    
-    Returns:
-        - str: The main content text of the webpage.
-    """
-    # Remove script and style elements
-    for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
-        script.extract()
-    
-    # Get text and remove extra whitespace
-    text = soup.get_text(separator=' ')
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = '\n'.join(chunk for chunk in chunks if chunk)
-    
-    return text
-
-def scrape_website(url):
+def scrape_website(url, session=None, cache=None):
     """
     Scrape a website and return its title, main content, and links.
     
     Inputs:
         - url (str): The URL of the website to scrape.
+        - session (requests.Session): Session whose pooled connections to reuse (optional).
+        - cache (CrawlCache): Cache of earlier crawls (optional). The page is requested
+          with its cached validators, and if it is not modified (304) or its content is
+          unchanged, title and content are None and the cached or new links are returned.
     
     Returns:
         - tuple: A tuple containing:
@@ -62,63 +75,48 @@ def scrape_website(url):
             - content (str): The main content of the webpage.
             - links (list): A list of valid URLs found on the page.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
         # skip file URLs
-        file_extensions = ['.pdf', '.doc', '.docx', '.jpg', '.jpeg', '.png', '.gif', 
-                          '.ppt', '.pptx', '.xls', '.xlsx', '.zip', '.mp3', '.mp4']
-        if any(url.lower().endswith(ext) for ext in file_extensions):
+        if url.lower().endswith(FILE_EXTENSIONS):
             print(f"Skipping file URL: {url}")
             return None, None, []
         
-        response = requests.get(url, headers=headers, timeout=10)
+        client = session or requests
+        if cache is not None:
+            response = client.get(url, headers={**HEADERS, **cache.conditional_headers(url)}, timeout=10)
+            if response.status_code == 304:
+                links = cache.not_modified_links(url)
+                if links is not None:
+                    return None, None, links
+                response = client.get(url, headers=HEADERS, timeout=10)
+        else:
+            response = client.get(url, headers=HEADERS, timeout=10)
 
         # raise exception for 4XX/5XX responses
         response.raise_for_status()  
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # extract title
-        title_tag = soup.find('title')
-        if title_tag and title_tag.string:
-            title = title_tag.string.strip()
-        else:
+        # title, main content and links (resolved, without file URLs) in one pass
+        title, content, page_links = extract_page(response.text, url, HTML_PARSER_BACKEND)
+        if not title:
             # use URL path if title not found
             parsed_url = urlparse(url)
             title = parsed_url.path.strip('/')
             if not title:
                 title = parsed_url.netloc
         
-        # extract content
-        content = extract_main_content(soup)
+        # only keep Duke URLs, but preserve their full structure (including query params)
+        links = [link for link in page_links if LINK_DOMAIN in urlparse(link).netloc]
         
-        # get all links
-        links = []
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            
-            # handle relative URLs
-            if not href.startswith(('http://', 'https://')):
-                full_url = urljoin(url, href)
-            else:
-                full_url = href
-            
-            # skip file URLs in links
-            if any(full_url.lower().endswith(ext) for ext in file_extensions):
-                continue
-                
-            # only keep Duke URLs, but preserve their full structure (including query params)
-            parsed = urlparse(full_url)
-            if 'duke.edu' in parsed.netloc:
-                links.append(full_url)
+        # same content as the saved page: only its links are needed
+        if cache is not None and not cache.update(url, response.headers, title, content, links):
+            return None, None, links
         
         return title, content, links
     
     except Exception as e:
         print(f"Error scraping {url}: {e}")
+        if cache is not None and isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code in (404, 410):
+            cache.remove(url)
         return None, None, []
 
 def get_program_name(url):
@@ -155,43 +153,97 @@ def normalize_url(url):
     Normalize URLs for consistent comparison by:
     1. Removing fragments (#)
     2. Handling trailing slashes consistently
+    3. Lowercasing the host, dropping default ports and sorting query parameters
+    """
+    return canonical_url(url)
+
+def crawl_priority(url, depth):
     """
-    # Remove fragment
-    url = url.split('#')[0]
+    Get the crawl priority of a URL (lower is crawled sooner).
     
-    # Handle trailing slash consistently
-    if url.endswith('/'):
-        url = url[:-1]
-        
-    return url
+    Shallow pages come first, and a program's index page (such as /aipi on
+    masters.pratt.duke.edu) comes before the other pages at its depth.
+    
+    Inputs:
+        - url (str): The URL.
+        - depth (int): Links followed from the start URL to reach it.
+    
+    Returns:
+        - int: The priority.
+    """
+    program = get_program_name(url)
+    if program and urlparse(url).path.strip('/').split('/')[-1] == program:
+        return depth - PROGRAM_INDEX_BOOST
+    return depth
 
-def crawl_domain(base_url, output_folder):
+def frontier_path(output_folder):
     """
-    Crawl a domain and save content by program.
+    Get the path of the saved crawl frontier, kept with the pages it describes.
+    """
+    return os.getenv("CRAWL_FRONTIER_PATH") or os.path.join(output_folder, "crawl_frontier.json")
+
+def cache_path(output_folder):
+    """
+    Get the path of the crawl cache (validators, content hashes and links of crawled pages).
+    """
+    return os.getenv("CRAWL_CACHE_PATH") or os.path.join(output_folder, "crawl_cache.json")
+
+def load_frontier(start_urls, output_folder, cache):
+    """
+    Load the saved crawl frontier, or start a new crawl pass.
+    
+    A frontier with URLs left is resumed. Once a pass has emptied it, the next crawl
+    starts over from the start URLs and revisits every page, with conditional
+    requests against the cache. Without a cache (pages saved before it existed), the
+    saved pages are marked as seen instead of being fetched again.
     
     Inputs:
-        - base_url (str): The base URL to start crawling from.
-        - output_folder (str): The folder where the scraped data will be saved.
+        - start_urls (list): The URLs the crawl starts from.
+        - output_folder (str): The folder where the scraped data is saved.
+        - cache (CrawlCache): The crawl cache.
     
     Returns:
-        - dict: A dictionary mapping program names to lists of scraped pages.
+        - Frontier: The frontier, with the URLs seen by this pass.
     """
-    # parse the base URL to get domain and path
-    base_parsed = urlparse(base_url)
-    domain = base_parsed.netloc
-    base_path = base_parsed.path.rstrip('/')
+    frontier = Frontier.load(frontier_path(output_folder), crawl_priority)
+    if frontier is not None and frontier.pending():
+        print(f"Resuming crawl frontier: {len(frontier.seen)} URLs seen, {frontier.pending()} pending")
+        return frontier
     
-    # create domain folder
-    domain_folder = os.path.join(output_folder, domain.replace('.', '_'))
+    frontier = Frontier(crawl_priority)
+    if not len(cache):
+        # no cache yet: read the URLs of the saved pages once
+        for domain in {urlparse(start_url).netloc for start_url in start_urls}:
+            frontier.mark_seen(load_visited(domain_folder_for(domain, output_folder)))
+    else:
+        print(f"Recrawling with {len(cache)} cached pages")
+    return frontier
+
+def domain_folder_for(domain, output_folder):
+    """
+    Get (and create) the folder of a domain's pages.
+    """
+    domain_folder = os.path.join(output_folder, domain_folder_name(domain))
     if not os.path.exists(domain_folder):
         os.makedirs(domain_folder)
         print(f"Created domain folder: {domain_folder}")
+    return domain_folder
+
+def load_visited(domain_folder):
+    """
+    Get the URLs of the pages already saved in a domain folder.
+    
+    Inputs:
+        - domain_folder (str): The folder of the domain's pages.
+    
+    Returns:
+        - set: The URLs in the domain's page index, or else read from the first line of each saved page.
+    """
+    index = read_index(domain_folder)
+    if index:
+        return {entry["url"] for entry in index.values()}
     
-    # track visited URLs and programs
     visited = set()
-    queue = deque([base_url])
-    program_urls = {}
-
     for root, dirs, files in os.walk(domain_folder):
         for file in files:
             if file.endswith('.txt'):
@@ -201,108 +253,117 @@ def crawl_domain(base_url, output_folder):
                     with open(file_path, 'r', encoding='utf-8') as f:
                         first_line = f.readline().strip()
                         if first_line.startswith('URL: '):
-                            url = first_line[5:].strip()
-                            normalized_url = normalize_url(url)
-                            visited.add(normalized_url)
-                            visited.add(url)
+                            visited.add(first_line[5:].strip())
                 except Exception as e:
                     print(f"Error reading file {file_path}: {e}")
+    return visited
+
+def page_filename(url, title):
+    """
+    Get the filename of a saved page.
     
-    # first phase: Discover all URLs and organize by program
-    pages_processed = 0
+    Inputs:
+        - url (str): The page URL.
+        - title (str): The page title.
     
-    print(f"Starting discovery of {base_url}")
+    Returns:
+        - str: The filename, from the title (or the URL path if the title is too short).
+    """
+    filename = create_valid_filename(title)
+    if len(filename) < 3:
+        path = urlparse(url).path.strip('/')
+        filename = create_valid_filename(path.replace('/', '_'))
+    if not filename:
+        filename = "index"
     
-    while queue:
-        url = queue.popleft()
-        normalized_url = normalize_url(url)
-        
-        if url in visited or normalized_url in visited:
-            continue
-        
-        visited.add(url)
-        pages_processed += 1
-        
-        print(f"[{pages_processed}] Processing: {url}")
-        
-        title, content, links = scrape_website(url)
-        
-        # check if this URL is valid and should be saved
-        if title and content:
-            # get program for this URL
-            program = get_program_name(url)
-            
-            # add to program URLs
-            if program:
-                if program not in program_urls:
-                    program_urls[program] = []
-                program_urls[program].append((url, title, content))
-            else:
-                # for URLs without a clear program, put in a "general" folder
-                if "general" not in program_urls:
-                    program_urls["general"] = []
-                program_urls["general"].append((url, title, content))
-        
-        # add new URLs to queue
-        for link in links:
-            parsed_link = urlparse(link)
-            
-            # only process URLs on same domain
-            if parsed_link.netloc != domain:
-                continue
-                
-            # only follow links that start with or extend the base path
-            link_path = parsed_link.path
-            if not link_path.startswith(base_path):
-                continue
-                
-            # add to queue if not already visited or queued
-            if link not in visited and link not in queue:
-                queue.append(link)
-        
-        # brief delay
-        time.sleep(0.2)
+    # add extension
+    if not filename.endswith('.txt'):
+        filename += '.txt'
     
-    print(f"Discovery complete. Found {sum(len(urls) for urls in program_urls.values())} pages across {len(program_urls)} programs.")
+    # truncate if too long
+    if len(filename) > 100:
+        filename = filename[:100]
     
-    # second phase: Save content by program
-    for program, pages in program_urls.items():
-        program_folder = os.path.join(domain_folder, program)
-        
-        if not os.path.exists(program_folder):
-            os.makedirs(program_folder)
-            print(f"Created program folder: {program_folder}")
-        
-        print(f"\nSaving {len(pages)} pages for program: {program}")
-        
-        for url, title, content in pages:
-            # create filename
-            filename = create_valid_filename(title)
-            if len(filename) < 3:
-                path = urlparse(url).path.strip('/')
-                filename = create_valid_filename(path.replace('/', '_'))
-            if not filename:
-                filename = "index"
-            
-            # add extension
-            if not filename.endswith('.txt'):
-                filename += '.txt'
-            
-            # truncate if too long
-            if len(filename) > 100:
-                filename = filename[:100]
-            
-            # save to file
-            file_path = os.path.join(program_folder, filename)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f"URL: {url}\n\n")
-                f.write(content)
-            
+    return filename
+
+def crawl(start_urls, output_folder, workers=CRAWL_WORKERS, host_concurrency=CRAWL_HOST_CONCURRENCY,
+          host_delay=CRAWL_HOST_DELAY, max_pages=CRAWL_MAX_PAGES):
+    """
+    Crawl from several start URLs at once and save content by domain and program.
+    
+    All start URLs share one frontier, and pages are fetched concurrently with
+    per-host limits. Each page is written as soon as it is extracted, and the
+    frontier is saved at checkpoints and at the end, so the next crawl continues
+    from it. Pages are fetched with conditional requests against the crawl cache:
+    only new and changed pages are saved, and the changes are written to
+    crawl_changes.json in the output folder.
+    
+    Inputs:
+        - start_urls (list): The URLs to start crawling from; links are followed under each one's domain and path.
+        - output_folder (str): The folder where the scraped data will be saved.
+        - workers (int): Threads fetching pages.
+        - host_concurrency (int): Maximum requests in flight to one host.
+        - host_delay (float): Minimum seconds between requests to one host.
+        - max_pages (int): Pages to fetch in this crawl (0 for no limit).
+    
+    Returns:
+        - dict: A dictionary mapping each domain to a dictionary mapping program names to lists of (url, file path) of the saved pages.
+    """
+    cache = CrawlCache(cache_path(output_folder))
+    frontier = load_frontier(start_urls, output_folder, cache)
+    
+    def checkpoint():
+        # the cache only records pages that are written, and the frontier refetches the pages in flight
+        cache.save()
+        frontier.save(frontier_path(output_folder))
+    
+    print(f"Starting crawl of {', '.join(start_urls)}")
+    crawler = Crawler(partial(scrape_website, cache=cache), workers=workers, host_concurrency=host_concurrency,
+                      host_delay=host_delay)
+    writer = PageWriter(output_folder, get_program_name, page_filename)
+    saved_pages = {urlparse(start_url).netloc: {} for start_url in start_urls}
+    last_checkpoint = time.monotonic()
+    try:
+        for url, title, content in crawler.crawl(start_urls, frontier, max_pages):
+            file_path = writer.write(url, title, content)
+            cache.saved(url)
+            # for URLs without a clear program, the writer uses a "general" folder
+            program = get_program_name(url) or "general"
+            saved_pages.setdefault(urlparse(url).netloc, {}).setdefault(program, []).append((url, file_path))
             print(f"Saved: {file_path}")
-        
-        print(f"Finished saving program: {program}")
+            
+            if time.monotonic() - last_checkpoint >= CRAWL_CHECKPOINT_SECONDS:
+                checkpoint()
+                last_checkpoint = time.monotonic()
+    finally:
+        writer.close()
+    
+    print(f"Crawl complete. Processed {crawler.pages} URLs, saved {crawler.saved} new or changed pages, {frontier.pending()} URLs left in the frontier.")
+    for domain, program_urls in saved_pages.items():
+        print(f"{domain}: {sum(len(urls) for urls in program_urls.values())} pages saved across {len(program_urls)} programs")
     
-    return program_urls
+    # record what changed, then the cache and frontier
+    scopes = crawl_scopes(start_urls)
+    report = cache.report(None if frontier.pending() else frontier.seen, lambda url: in_scope(url, scopes))
+    write_report(report, os.path.join(output_folder, "crawl_changes.json"))
+    print(f"\nChanges: {len(report['new'])} new, {len(report['changed'])} changed, {len(report['missing'])} missing, "
+          f"{report['not_modified'] + report['unchanged']} unchanged pages")
+    checkpoint()
+    
+    return saved_pages
+
+def crawl_domain(base_url, output_folder):
+    """
+    Crawl a domain and save content by program.
+    
+    Inputs:
+        - base_url (str): The base URL to start crawling from.
+        - output_folder (str): The folder where the scraped data will be saved.
+    
+    Returns:
+        - dict: A dictionary mapping program names to lists of (url, file path) of the saved pages.
+    """
+    return crawl([base_url], output_folder)[urlparse(base_url).netloc]
 
 def main():
     # starting points
@@ -317,10 +378,8 @@ def main():
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
     
-    # process each starting point
-    for start_url in start_urls:
-        print(f"\n{'='*80}\nProcessing: {start_url}\n{'='*80}")
-        crawl_domain(start_url, output_folder)
+    # crawl all starting points together
+    crawl(start_urls, output_folder)
     
     print("\nAll sites have been crawled and saved to their respective folders.")
 
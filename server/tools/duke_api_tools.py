@@ -45,10 +45,15 @@ events_api_service = EventsApiService(
     os.getenv('DUKE_API_KEY')
 )
 
+async def aclose_api_services():
+    """Close the pooled HTTP clients of the Duke API services (on shutdown)"""
+    for service in (curriculum_api_service, places_api_service, events_api_service):
+        await service.aclose()
+
 class GetCoursesBySubjectTool(BaseTool):
     name: str = "get_courses_by_subject"
     description: str = (
-        "Get all courses for a specific subject code (e.g., 'COMPSCI', 'MATH').",
+        "Get all courses for a specific subject code (e.g., 'COMPSCI', 'MATH')."
         "Always start with this api call to retrieve the different course IDs once the subject has been figured out."
         "Using this tool is important to learn about all courses in a subject, retrieve their IDs, the semester (term) when they are offered, along other helpful information"
     )
@@ -57,9 +62,8 @@ class GetCoursesBySubjectTool(BaseTool):
     def _run(self, subject_code: str) -> List[Dict]:
         return curriculum_api_service.get_courses_by_subject(subject_code)
     
-    def _arun(self, subject_code: str):
-        # Async implementation if needed
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, subject_code: str) -> List[Dict]:
+        return await curriculum_api_service.aget_courses_by_subject(subject_code)
 
 class GetCourseDetailsTool(BaseTool):
     name: str = "get_course_details"
@@ -71,13 +75,17 @@ class GetCourseDetailsTool(BaseTool):
     )
     args_schema: Type[BaseModel] = CourseDetailsInput
     
-    def _run(self, query: str) -> Dict:
+    def _parse_query(self, query: str) -> List[str]:
         parts = [p.replace(" ", "")for p in query.split(',')]
         if len(parts) != 2 or not all(parts):
             # If not valid, try splitting by dash
             parts = [p.strip() for p in query.split('-')]
         
         print('\n parts extracted from query: ', parts)
+        return parts
+
+    def _run(self, query: str) -> Dict:
+        parts = self._parse_query(query)
         if len(parts) != 2 or not all(parts):
             return {
                 "error": "Invalid input format. Use 'COURSE_ID-OFFER_NUMBER' or 'COURSE_ID,OFFER_NUMBER'"
@@ -87,9 +95,16 @@ class GetCourseDetailsTool(BaseTool):
         result = curriculum_api_service.get_course_details(course_id, 1)
         return result or {"error": "Invalid input format. Use 'COURSE_ID,OFFER_NUMBER'"}
     
-    def _arun(self, query: str):
-        # Async implementation if needed
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, query: str) -> Dict:
+        parts = self._parse_query(query)
+        if len(parts) != 2 or not all(parts):
+            return {
+                "error": "Invalid input format. Use 'COURSE_ID-OFFER_NUMBER' or 'COURSE_ID,OFFER_NUMBER'"
+            }
+
+        course_id, course_offer_number = parts
+        result = await curriculum_api_service.aget_course_details(course_id, 1)
+        return result or {"error": "Invalid input format. Use 'COURSE_ID,OFFER_NUMBER'"}
 
 class GetCourseSectionTool(BaseTool):
     name: str = "get_course_with_extreme_details"
@@ -105,21 +120,28 @@ class GetCourseSectionTool(BaseTool):
     )
     args_schema: Type[BaseModel] = CourseDetailsInput  # we can reuse this
 
+    def _parse_query(self, query: str) -> List[str]:
+        parts = [p.strip() for p in query.split(',')]
+        print('\n parts extracted from query in get_course_with_extreme_details: ', parts)
+        if len(parts) != 3 or not all(parts):
+            # If not valid, try splitting by dash
+            parts = [p.strip() for p in query.split('-')]
+        print('query received in get course section tool:', query)
+        return parts
+
     def _run(self, query: str) -> Dict:
         try:
-            parts = [p.strip() for p in query.split(',')]
-            print('\n parts extracted from query in get_course_with_extreme_details: ', parts)
-            if len(parts) != 3 or not all(parts):
-                # If not valid, try splitting by dash
-                parts = [p.strip() for p in query.split('-')]
-            course_id, course_offer_number, strm = parts
-            print('query received in get course section tool:', query)
+            course_id, course_offer_number, strm = self._parse_query(query)
             return curriculum_api_service.get_class_section(course_id, course_offer_number, strm)
         except Exception as e:
             return {"error": f"Invalid input format or issue fetching course details from its section: {e}"}
 
-    def _arun(self, query: str):
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, query: str) -> Dict:
+        try:
+            course_id, course_offer_number, strm = self._parse_query(query)
+            return await curriculum_api_service.aget_class_section(course_id, course_offer_number, strm)
+        except Exception as e:
+            return {"error": f"Invalid input format or issue fetching course details from its section: {e}"}
 
 # class ListAvailableSubjectsTool(BaseTool):
 #     name: str = "list_available_subjects"
@@ -135,14 +157,13 @@ class GetCourseSectionTool(BaseTool):
 class GetPlacesByValueTool(BaseTool):
     name: str = "get_places_by_value"
     description: str = "Get all places for a specific place value (e.g., 'east_campus', 'west_campus', 'dining', 'central_campus', 'dukecard')"
-    args_schema: Type[BaseModel] = EventInput
+    args_schema: Type[BaseModel] = PlaceValueInput
     
     def _run(self, place_value: str) -> List[Dict]:
         return places_api_service.get_places_by_value(place_value)
     
-    def _arun(self, place_value: str):
-        # Async implementation if needed
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, place_value: str) -> List[Dict]:
+        return await places_api_service.aget_places_by_value(place_value)
 
 class GetAllPlacesTool(BaseTool):
     name: str = "get_all_places"
@@ -166,9 +187,9 @@ class GetPlaceDetailsByIdTool(BaseTool):
         result = places_api_service.get_place_details_by_id(place_id)
         return result or {"error": f"No details found for place ID: {place_id}"}
     
-    def _arun(self, place_id: str):
-        # Async implementation if needed
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, place_id: str) -> Dict:
+        result = await places_api_service.aget_place_details_by_id(place_id)
+        return result or {"error": f"No details found for place ID: {place_id}"}
 
 class GetEventsByFutureDaysTool(BaseTool):
     name: str = "get_events_by_future_days"
@@ -184,9 +205,9 @@ class GetEventsByFutureDaysTool(BaseTool):
         result = events_api_service.get_future_events(future_days)
         return result or {"error": f"No details found for events happening in {future_days}"}
     
-    def _arun(self, place_id: str):
-        # Async implementation if needed
-        raise NotImplementedError("Async not implemented")
+    async def _arun(self, future_days: str) -> Dict:
+        result = await events_api_service.aget_future_events(future_days)
+        return result or {"error": f"No details found for events happening in {future_days}"}
     
 
 def get_curriculum_tools():